@@ -6,10 +6,12 @@ from .llm_models import LLMModels
 from .orchestrator_agent.orchestrator_agent import OrchestratorAgent
 from .learner_agent.learner_agent import LearnerAgent
 from .explainer_agent.explainer_agent import ExplainerAgent
+from .summarizer_agent.summarizer_agent import SummarizerAgent
 
 __all__ = [
     "OrchestratorAgent",
     "LearnerAgent",
     "ExplainerAgent",
+    "SummarizerAgent",
     "LLMModels",
 ]
\ No newline at end of file
@@ -2,7 +2,8 @@
 Agent factory for creating and managing agent singletons.
 """
 
-from typing import Any, Dict, cast
+import threading
+from typing import TYPE_CHECKING, Any, Dict, Optional, cast
 
 import structlog
 
@@ -10,19 +11,31 @@ from app.agents import (
     OrchestratorAgent,
     ExplainerAgent,
     LearnerAgent,
+    SummarizerAgent,
 )
 from app.agents.agent_types import (
     ORCHESTRATOR_NAME,
     EXPLAINER_AGENT_NAME,
     LEARNER_AGENT_NAME,
+    SUMMARIZER_AGENT_NAME,
 )
 from app.agents.config import AgentConfig, AgentFactoryConfig
 
 logger = structlog.get_logger(__name__)
 
+if TYPE_CHECKING:
+    from langgraph.graph.state import CompiledStateGraph
+
+    from app.nodes.orchestrator_node import OrchestratorNode
+    from app.workflows.multi_agentic_workflow import MultiAgentWorkflow
+
 _singletons: Dict[str, Any] = {}
 _initialized: bool = False
 
+_orchestrator_node: Optional["OrchestratorNode"] = None
+_workflow_graph: Optional["CompiledStateGraph"] = None
+_workflow_graph_lock = threading.Lock()
+
 
 def _create_agent_with_config(agent_name: str, agent_class: type, config: AgentConfig) -> Any:
     """Create an agent instance with the given configuration."""
@@ -61,6 +74,11 @@ def initialize_agents(config: AgentFactoryConfig | None = None) -> None:
         LearnerAgent,
         config.learner_agent,
     )
+    _singletons[SUMMARIZER_AGENT_NAME] = _create_agent_with_config(
+        SUMMARIZER_AGENT_NAME,
+        SummarizerAgent,
+        config.summarizer_agent,
+    )
 
     _initialized = True
     logger.info("All agents initialized successfully")
@@ -73,23 +91,38 @@ def get_agent(agent_name: str) -> Any:
     return _singletons.get(agent_name)
 
 
+def get_workflow_graph() -> "CompiledStateGraph":
+    """Get the compiled workflow graph shared by every conversation, compiling it on first use."""
+    from app.nodes.orchestrator_node import OrchestratorNode
+    from app.workflows.multi_agentic_workflow import build_workflow_graph
+
+    global _orchestrator_node, _workflow_graph
+
+    with _workflow_graph_lock:
+        if _workflow_graph is None:
+            if not _initialized:
+                initialize_agents()
+
+            orchestrator_agent = cast(OrchestratorAgent, _singletons.get(ORCHESTRATOR_NAME))
+            _orchestrator_node = OrchestratorNode(orchestrator_agent)
+            _workflow_graph = build_workflow_graph(_orchestrator_node)
+            logger.info("Workflow graph compiled")
+        return _workflow_graph
+
+
 def create_multi_agent_workflow(conversation_id: str | None = None) -> "MultiAgentWorkflow":
-    """Create and return the multi-agent workflow.
-    
+    """Create a workflow session handle on the shared graph.
+
     Args:
         conversation_id: Optional conversation ID to resume an existing conversation
     """
-    from app.nodes.orchestrator_node import OrchestratorNode
     from app.workflows.multi_agentic_workflow import MultiAgentWorkflow
 
-    if not _initialized:
-        initialize_agents()
-
-    orchestrator_agent = cast(OrchestratorAgent, _singletons.get(ORCHESTRATOR_NAME))
-
-    orchestrator_node = OrchestratorNode(orchestrator_agent)
+    graph = get_workflow_graph()
 
     return MultiAgentWorkflow(
-        orchestrator_node=orchestrator_node,
+        orchestrator_node=_orchestrator_node,
         conversation_id=conversation_id,
+        graph=graph,
+        summarizer=cast(SummarizerAgent, _singletons.get(SUMMARIZER_AGENT_NAME)),
     )
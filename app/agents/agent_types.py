@@ -7,4 +7,5 @@ from typing import Final
 ORCHESTRATOR_NAME: Final[str] = "orchestrator_agent"
 EXPLAINER_AGENT_NAME: Final[str] = "explainer_agent"
 LEARNER_AGENT_NAME: Final[str] = "learner_agent"
+SUMMARIZER_AGENT_NAME: Final[str] = "summarizer_agent"
 MULTI_AGENT_WORKFLOW_NAME: Final[str] = "multi_agent_workflow"
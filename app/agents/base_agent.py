@@ -14,6 +14,7 @@ from langchain_google_genai import ChatGoogleGenerativeAI
 from pydantic import BaseModel
 
 from app.agents.state import ExamHelperState
+from app.utils.token_stream import chunk_text, emit_token, streaming_enabled
 
 logger = structlog.get_logger(__name__)
 
@@ -95,6 +96,22 @@ class BaseAgent(BaseLLM):
         """Get the key used to store this agent's result in state."""
         pass
 
+    async def _agenerate(self, messages: List[Any]) -> Any:
+        """Generate a response to ``messages``, streaming its tokens if the turn is streamed.
+
+        Returns:
+            The response content
+        """
+        if not streaming_enabled():
+            response = await self.model.ainvoke(messages)
+            return response.content
+
+        response = None
+        async for chunk in self.model.astream(messages):
+            emit_token(chunk_text(chunk.content))
+            response = chunk if response is None else response + chunk
+        return response.content if response is not None else ""
+
     async def process_query(
         self,
         query: str,
@@ -108,11 +125,11 @@ class BaseAgent(BaseLLM):
                 {"role": "user", "content": query},
             ]
 
-            response = await self.model.ainvoke(messages)
+            content = await self._agenerate(messages)
 
             return {
                 "success": True,
-                self.get_result_key(): response.content,
+                self.get_result_key(): content,
                 "error": [],
             }
         except Exception as e:
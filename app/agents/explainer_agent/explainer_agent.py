@@ -62,7 +62,11 @@ Cool, right? Want another example with games or phones?
 ### So
 Explain everything slowly and kindly.  
 Make it feel like story time, not exam time.  
-Curious minds welcome. 😊"""
+Curious minds welcome. 😊
+
+CONVERSATION CONTEXT:
+{context}
+"""
 
 
 class ExplainerAgent(BaseAgent):
@@ -108,11 +112,11 @@ class ExplainerAgent(BaseAgent):
                 SystemMessage(content=prompt),
                 HumanMessage(content=query),
             ]
-            response = await self.model.ainvoke(messages)
+            content = await self._agenerate(messages)
 
             return {
                 "success": True,
-                self.get_result_key(): response.content,
+                self.get_result_key(): content,
                 "error": [],
             }
         except Exception as e:
@@ -7,6 +7,7 @@ Helps user in providing learning material that can be used to study a certain co
 from typing import Any, Dict, Optional
 
 import structlog
+from langchain_core.messages import AIMessageChunk
 from pydantic import BaseModel
 
 from app.agents.agent_types import LEARNER_AGENT_NAME
@@ -17,6 +18,7 @@ from app.models.response_models import ExamHelperResponse
 from langchain.agents import create_agent
 
 from app.tools.firecrawl_tool import get_learner_tools
+from app.utils.token_stream import chunk_text, emit_token, streaming_enabled
 
 logger = structlog.get_logger(__name__)
 
@@ -293,6 +295,23 @@ class LearnerAgent(BaseAgent):
     def get_response_format(self) -> type[BaseModel]:
         return ExamHelperResponse
 
+    @staticmethod
+    async def _astream_agent(agent: Any, agent_input: Dict[str, Any]) -> Dict[str, Any]:
+        """Run the agent, streaming the tokens of its answer, and return its final state.
+
+        Chunks that carry tool calls are the agent deciding to search
+        rather than answering, so only text chunks are streamed.
+        """
+        result: Dict[str, Any] = {}
+        async for mode, payload in agent.astream(agent_input, stream_mode=["messages", "values"]):
+            if mode == "values":
+                result = payload
+                continue
+            chunk, _ = payload
+            if isinstance(chunk, AIMessageChunk) and not chunk.tool_call_chunks:
+                emit_token(chunk_text(chunk.content))
+        return result
+
     async def process_query(
         self,
         query: str,
@@ -310,13 +329,15 @@ class LearnerAgent(BaseAgent):
                 system_prompt=prompt,
             )
 
-            result = await agent.ainvoke(
-                {
-                    "messages": [
-                        HumanMessage(content=query)
-                    ]
-                }
-            )
+            agent_input = {
+                "messages": [
+                    HumanMessage(content=query)
+                ]
+            }
+            if streaming_enabled():
+                result = await self._astream_agent(agent, agent_input)
+            else:
+                result = await agent.ainvoke(agent_input)
 
             final_output = _extract_text_from_message(result["messages"][-1])
 
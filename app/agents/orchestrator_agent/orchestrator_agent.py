@@ -84,6 +84,9 @@ IMPORTANT:
 
 CURRENT STATE:
 - Intent: {intent}
+
+EARLIER IN THE SESSION (older messages, summarized):
+{summary}
 """
 
 
@@ -113,7 +116,8 @@ class OrchestratorAgent(BaseAgent):
 
     def get_prompt(self, state: Optional[ExamHelperState] = None) -> str:
         intent = state.get("user_intent", "unknown") if state else "unknown"
-        return ORCHESTRATOR_PROMPT.format(intent=intent)
+        summary = state.get("session_summary", "") if state else ""
+        return ORCHESTRATOR_PROMPT.format(intent=intent, summary=summary or "(none yet)")
 
     def get_response_format(self) -> type[BaseModel]:
         return OrchestratorResponse
@@ -23,10 +23,12 @@ class ExamHelperState(TypedDict):
 
 
 def get_conversation_context(state: ExamHelperState, max_messages: int = 6) -> str:
-    """Build conversation context from message history."""
+    """Build conversation context from the session summary and message history."""
     from langchain_core.messages import AIMessage, HumanMessage
 
     context_parts: List[str] = []
+    if state.get("session_summary"):
+        context_parts.append(f"Earlier in the session:\n{state['session_summary']}")
     messages = state.get("messages", [])[-max_messages:]
 
     for msg in messages:
@@ -0,0 +1,5 @@
+"""Summarizer Agent module."""
+
+from .summarizer_agent import SummarizerAgent
+
+__all__ = ["SummarizerAgent"]
\ No newline at end of file
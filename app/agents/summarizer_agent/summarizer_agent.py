@@ -0,0 +1,122 @@
+"""
+Summarizer Agent
+
+Folds older messages of a conversation into its running session summary,
+so that the other agents' prompts only carry the summary and a window of
+recent messages
+"""
+
+from typing import List, Optional
+
+import structlog
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+from pydantic import BaseModel
+
+from app.agents.agent_types import SUMMARIZER_AGENT_NAME
+from app.agents.base_agent import BaseAgent
+from app.agents.llm_models import LLMModels
+from app.agents.state import ExamHelperState
+from app.models.response_models import SessionSummaryResponse
+from app.utils.token_stream import chunk_text
+
+logger = structlog.get_logger(__name__)
+
+
+SUMMARIZER_PROMPT = """
+You keep the running summary of a study session between a student and the Exam Helper.
+
+Fold the new messages into the existing summary. Keep:
+- The topics and subtopics covered, in order
+- The student's goal (simple understanding or exam preparation), level and exam details
+- Which teaching style was used, and what the student found confusing
+- Questions the student left open or wants to come back to
+
+Drop greetings, small talk and the content of the explanations themselves.
+Use short bullet points, at most 200 words in total.
+Reply with the updated summary only.
+
+EXISTING SUMMARY:
+{summary}
+"""
+
+# Longer messages, such as full exam answers, are cut before summarizing
+MAX_MESSAGE_CHARS = 1500
+
+
+def format_transcript(messages: List[BaseMessage]) -> str:
+    """Render messages as a transcript for the summarizer, skipping tool calls."""
+    lines: List[str] = []
+    for msg in messages:
+        if isinstance(msg, HumanMessage):
+            speaker = "Student"
+        elif isinstance(msg, ToolMessage):
+            speaker = f"Exam Helper ({msg.name})" if msg.name else "Exam Helper"
+        elif isinstance(msg, AIMessage) and not getattr(msg, "tool_calls", None):
+            speaker = "Exam Helper"
+        else:
+            continue
+        text = chunk_text(msg.content).strip()
+        if not text:
+            continue
+        if len(text) > MAX_MESSAGE_CHARS:
+            text = text[:MAX_MESSAGE_CHARS] + "..."
+        lines.append(f"{speaker}: {text}")
+    return "\n".join(lines)
+
+
+class SummarizerAgent(BaseAgent):
+    """Agent that maintains the session summary of a conversation."""
+
+    def __init__(
+        self,
+        agent_name: str = SUMMARIZER_AGENT_NAME,
+        api_key: Optional[str] = None,
+        temperature: float = 0.2,
+        model_name: str = LLMModels.GEMINI_2_5_FLASH,
+    ) -> None:
+        super().__init__(
+            agent_name=agent_name,
+            api_key=api_key,
+            temperature=temperature,
+            model_name=model_name,
+        )
+
+    def get_result_key(self) -> str:
+        return "session_summary"
+
+    def get_prompt(self, state: Optional[ExamHelperState] = None) -> str:
+        summary = state.get("session_summary", "") if state else ""
+        return SUMMARIZER_PROMPT.format(summary=summary or "(none yet)")
+
+    def get_response_format(self) -> type[BaseModel]:
+        return SessionSummaryResponse
+
+    async def summarize(self, previous_summary: str, messages: List[BaseMessage]) -> str:
+        """Fold ``messages`` into ``previous_summary``.
+
+        Runs after the turn that produced the messages has been answered,
+        so the response is never streamed to the user.
+
+        Args:
+            previous_summary: Current session summary, empty if there is none
+            messages: Messages leaving the conversation window, oldest first
+
+        Returns:
+            The updated summary, or ``previous_summary`` if there was nothing to fold
+        """
+        transcript = format_transcript(messages)
+        if not transcript:
+            return previous_summary
+
+        prompt = self.get_prompt({"session_summary": previous_summary})
+        response = await self.model.ainvoke([
+            SystemMessage(content=prompt),
+            HumanMessage(content=f"NEW MESSAGES:\n{transcript}"),
+        ])
+        summary = chunk_text(response.content).strip()
+        logger.debug(
+            "Session summary updated",
+            folded_messages=len(messages),
+            summary_chars=len(summary),
+        )
+        return summary or previous_summary
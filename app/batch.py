@@ -0,0 +1,237 @@
+"""
+Batch query runner for the Exam Helper System.
+
+Reads queries from a JSONL file or stdin and runs them concurrently
+through the shared workflow, for example to generate answers for a whole
+question bank. Each input line is a JSON object with a ``query`` and
+optionally a ``conversation_id`` and an ``id`` that is echoed back, or a
+bare JSON string. Queries of the same conversation run in input order;
+queries without one each start a new conversation.
+
+Results are written as JSONL as they complete, and a throughput and
+latency summary is printed to stderr at the end.
+
+Usage:
+    python -m app.batch questions.jsonl [--output answers.jsonl] [--concurrency 8]
+    cat questions.jsonl | python -m app.batch - > answers.jsonl
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import sys
+import time
+from contextlib import suppress
+from typing import Any, Dict, IO, List, Optional
+
+import structlog
+
+from app.utils.conversation_ids import generate_conversation_id, is_valid_conversation_id
+from app.workflows.session_manager import SessionManager, create_session_manager
+
+logger = structlog.get_logger(__name__)
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Get the nearest-rank percentile of ascending values, 0.0 if there are none."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100.0 * len(sorted_values)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def parse_line(line: str, line_number: int) -> Dict[str, Any]:
+    """Parse an input line into a query item.
+
+    Raises:
+        ValueError: If the line is not a query
+    """
+    try:
+        item = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Line {line_number} is not valid JSON: {e}")
+    if isinstance(item, str):
+        item = {"query": item}
+    if not isinstance(item, dict) or not isinstance(item.get("query"), str) or not item["query"].strip():
+        raise ValueError(f"Line {line_number} has no query")
+
+    conversation_id = item.get("conversation_id")
+    if conversation_id is not None and (
+        not isinstance(conversation_id, str) or not is_valid_conversation_id(conversation_id)
+    ):
+        raise ValueError(f"Line {line_number} has an invalid conversation_id")
+    return {
+        "id": item.get("id", line_number),
+        "conversation_id": conversation_id,
+        "query": item["query"],
+    }
+
+
+class BatchRunner:
+    """Runs a stream of queries through the shared workflow with bounded concurrency.
+
+    At most ``concurrency`` turns run at once. Input is read only as fast
+    as turns complete, so the question bank never has to fit in memory.
+    A query waits for the previous query of its conversation before it
+    takes a turn slot.
+    """
+
+    def __init__(self, sessions: SessionManager, concurrency: int = 8) -> None:
+        self.sessions = sessions
+        self.concurrency = max(concurrency, 1)
+        self.latencies: List[float] = []
+        self.succeeded = 0
+        self.failed = 0
+
+    async def _run_query(
+        self,
+        item: Dict[str, Any],
+        previous: Optional[asyncio.Future],
+        slots: asyncio.Semaphore,
+        output: IO[str],
+    ) -> None:
+        if previous is not None:
+            with suppress(Exception):
+                await previous
+
+        async with slots:
+            started = time.perf_counter()
+            try:
+                result = await self.sessions.aprocess_query(item["conversation_id"], item["query"])
+            except Exception as e:
+                logger.error("Batch query failed", id=item["id"], error=str(e))
+                result = {"success": False, "response": None, "error": str(e)}
+            latency = time.perf_counter() - started
+
+        success = bool(result.get("success"))
+        self.latencies.append(latency)
+        if success:
+            self.succeeded += 1
+        else:
+            self.failed += 1
+        self._write(output, {
+            "id": item["id"],
+            "conversation_id": item["conversation_id"],
+            "query": item["query"],
+            "response": result.get("response"),
+            "success": success,
+            "error": result.get("error"),
+            "latency_ms": round(latency * 1000, 1),
+        })
+
+    @staticmethod
+    def _write(output: IO[str], record: Dict[str, Any]) -> None:
+        output.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        output.flush()
+
+    async def run(self, source: IO[str], output: IO[str]) -> Dict[str, Any]:
+        """Run every query of ``source`` and write each result to ``output`` as it completes.
+
+        Args:
+            source: JSONL input
+            output: Where JSONL results are written
+
+        Returns:
+            Summary with counts, wall time, throughput and latency percentiles
+        """
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(self.concurrency)
+        # Bounds the queries read ahead of the ones running
+        backlog = asyncio.Semaphore(self.concurrency * 4)
+        last_turn: Dict[str, asyncio.Future] = {}
+        tasks = set()
+        invalid = 0
+        started = time.perf_counter()
+
+        line_number = 0
+        while True:
+            line = await loop.run_in_executor(None, source.readline)
+            if not line:
+                break
+            line_number += 1
+            if not line.strip():
+                continue
+            try:
+                item = parse_line(line, line_number)
+            except ValueError as e:
+                invalid += 1
+                self._write(output, {"id": line_number, "success": False, "error": str(e)})
+                continue
+
+            if item["conversation_id"] is None:
+                item["conversation_id"] = generate_conversation_id()
+            conversation_id = item["conversation_id"]
+
+            await backlog.acquire()
+            task = asyncio.ensure_future(self._run_query(item, last_turn.get(conversation_id), slots, output))
+            last_turn[conversation_id] = task
+            tasks.add(task)
+
+            def done(finished: asyncio.Future, conversation_id: str = conversation_id) -> None:
+                tasks.discard(finished)
+                backlog.release()
+                if last_turn.get(conversation_id) is finished:
+                    del last_turn[conversation_id]
+
+            task.add_done_callback(done)
+
+        if tasks:
+            await asyncio.gather(*tasks)
+
+        elapsed = time.perf_counter() - started
+        latencies = sorted(self.latencies)
+        return {
+            "queries": len(latencies),
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "invalid": invalid,
+            "elapsed_seconds": round(elapsed, 3),
+            "queries_per_second": round(len(latencies) / elapsed, 3) if elapsed > 0 else 0.0,
+            "latency_ms": {
+                name: round(percentile(latencies, pct) * 1000, 1)
+                for name, pct in (("p50", 50), ("p90", 90), ("p95", 95), ("p99", 99), ("max", 100))
+            },
+        }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Run a JSONL file of queries through the exam helper")
+    parser.add_argument("input", help="JSONL file of queries, or - for stdin")
+    parser.add_argument("--output", default="-", help="JSONL file for the results, defaults to stdout")
+    parser.add_argument("--concurrency", type=int, default=8, help="Maximum number of queries running at once")
+    args = parser.parse_args(argv)
+
+    sessions = create_session_manager()
+    source = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        report = asyncio.run(BatchRunner(sessions, args.concurrency).run(source, output))
+    finally:
+        sessions.stop()
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+
+    latency = report["latency_ms"]
+    print(
+        f"{report['queries']} queries in {report['elapsed_seconds']:.1f}s "
+        f"({report['queries_per_second']:.2f}/s): {report['succeeded']} succeeded, "
+        f"{report['failed']} failed, {report['invalid']} invalid lines",
+        file=sys.stderr,
+    )
+    print(
+        f"latency ms: p50 {latency['p50']}, p90 {latency['p90']}, p95 {latency['p95']}, "
+        f"p99 {latency['p99']}, max {latency['max']}",
+        file=sys.stderr,
+    )
+    return 1 if report["failed"] or report["invalid"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
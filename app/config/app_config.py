@@ -20,6 +20,90 @@ class ExamHelperConfig(BaseModel):
     """Configuration for exam helper specific settings."""
 
     max_response_words: int = Field(default=200, description="Maximum words in response")
+    resume_window_messages: int = Field(
+        default=20, description="Stored messages loaded into state when a session resumes; 0 loads all"
+    )
+    summary_window_messages: int = Field(
+        default=12,
+        description="Recent messages kept in state after a turn; older ones are folded into the session summary, "
+        "0 disables summarization",
+    )
+    summary_batch_messages: int = Field(
+        default=8, description="Messages past the window that trigger a fold, so the summary is not redone every turn"
+    )
+
+
+class StorageConfig(BaseModel):
+    """Configuration for conversation storage."""
+
+    backend: str = Field(default="json", description="Conversation store backend: 'json', 'journal' or 'sqlite'")
+    storage_dir: Optional[str] = Field(default=None, description="Override for the conversation storage directory")
+    journal_compact_threshold: int = Field(
+        default=64, description="Journal records written before a log is compacted in the background"
+    )
+    shard_layout: str = Field(
+        default="flat", description="Directory layout of conversation files: 'flat', 'hash' or 'date'"
+    )
+    search_index: bool = Field(
+        default=False, description="Maintain a full-text index of message content for the file backends"
+    )
+    blob_threshold: int = Field(
+        default=0,
+        description="Message bodies of at least this many bytes are stored once in the blob store; 0 disables it",
+    )
+    serializer: str = Field(default="json", description="File format: 'json', 'json-pretty' or 'binary'")
+    compression: str = Field(
+        default="none", description="Message body compression for the binary format: 'none', 'zlib' or 'lzma'"
+    )
+    cache_entries: int = Field(default=256, description="Maximum conversations kept in the in-process cache")
+    cache_bytes: int = Field(default=64 * 1024 * 1024, description="Maximum bytes kept in the in-process cache")
+    fsync: bool = Field(default=False, description="Flush every conversation write to disk before it completes")
+    io_workers: int = Field(
+        default=8, description="Threads running blocking store calls for the async store API"
+    )
+    checkpointer: str = Field(
+        default="sqlite", description="Workflow checkpoint storage: 'sqlite' persists it, 'memory' does not"
+    )
+    checkpoint_history: int = Field(
+        default=1, description="Checkpoints kept per conversation thread, newest first; 0 keeps every checkpoint"
+    )
+    write_behind: bool = Field(default=False, description="Queue saves for a background writer")
+    flush_interval: float = Field(
+        default=1.0, description="Seconds a queued save may wait; bounds what a crash can lose"
+    )
+    max_pending_saves: int = Field(default=64, description="Queued conversations that trigger an early flush")
+    archive_after_days: int = Field(
+        default=0, description="Days without activity before a conversation is archived; 0 disables archiving"
+    )
+    purge_after_days: int = Field(
+        default=0, description="Days after its last activity that an archived conversation is purged; 0 keeps it"
+    )
+    retention_batch_size: int = Field(default=100, description="Conversations archived per retention batch")
+    retention_sweep_interval: float = Field(
+        default=3600.0, description="Seconds between background retention sweeps; 0 disables the sweeper"
+    )
+
+
+class SessionConfig(BaseModel):
+    """Configuration for live workflow sessions."""
+
+    ttl_seconds: float = Field(default=1800.0, description="Seconds a session may stay idle before it is evicted")
+    max_sessions: int = Field(default=1000, description="Live sessions kept before the least recently used is evicted")
+    max_resident_mb: int = Field(
+        default=0, description="Resident memory above which idle sessions are evicted; 0 disables the check"
+    )
+    sweep_interval: float = Field(default=60.0, description="Seconds between idle-session sweeps; 0 disables them")
+
+
+class ServerConfig(BaseModel):
+    """Configuration for the HTTP/WebSocket server."""
+
+    host: str = Field(default="127.0.0.1", description="Interface the server listens on")
+    port: int = Field(default=8000, description="Port the server listens on")
+    max_body_bytes: int = Field(default=1024 * 1024, description="Largest request body or WebSocket message accepted")
+    keep_alive_seconds: float = Field(
+        default=75.0, description="Seconds an idle keep-alive connection is held open"
+    )
 
 
 class AppConfig(BaseModel):
@@ -29,6 +113,9 @@ class AppConfig(BaseModel):
     debug: bool = Field(default=False, description="Debug mode flag")
     llm: LLMConfig = Field(default_factory=LLMConfig)
     exam_helper: ExamHelperConfig = Field(default_factory=ExamHelperConfig)
+    storage: StorageConfig = Field(default_factory=StorageConfig)
+    sessions: SessionConfig = Field(default_factory=SessionConfig)
+    server: ServerConfig = Field(default_factory=ServerConfig)
 
 
 class AppConfigLoader:
@@ -50,6 +137,44 @@ class AppConfigLoader:
                 ),
                 exam_helper=ExamHelperConfig(
                     max_response_words=int(os.getenv("MAX_RESPONSE_WORDS", "200")),
+                    resume_window_messages=int(os.getenv("RESUME_WINDOW_MESSAGES", "20")),
+                    summary_window_messages=int(os.getenv("SUMMARY_WINDOW_MESSAGES", "12")),
+                    summary_batch_messages=int(os.getenv("SUMMARY_BATCH_MESSAGES", "8")),
+                ),
+                storage=StorageConfig(
+                    backend=os.getenv("CONVERSATION_STORE_BACKEND", "json").lower(),
+                    storage_dir=os.getenv("CONVERSATION_STORAGE_DIR") or None,
+                    journal_compact_threshold=int(os.getenv("JOURNAL_COMPACT_THRESHOLD", "64")),
+                    shard_layout=os.getenv("CONVERSATION_SHARD_LAYOUT", "flat").lower(),
+                    search_index=os.getenv("CONVERSATION_SEARCH_INDEX", "false").lower() == "true",
+                    blob_threshold=int(os.getenv("CONVERSATION_BLOB_THRESHOLD", "0")),
+                    serializer=os.getenv("CONVERSATION_SERIALIZER", "json").lower(),
+                    compression=os.getenv("CONVERSATION_COMPRESSION", "none").lower(),
+                    cache_entries=int(os.getenv("CONVERSATION_CACHE_ENTRIES", "256")),
+                    cache_bytes=int(os.getenv("CONVERSATION_CACHE_BYTES", str(64 * 1024 * 1024))),
+                    fsync=os.getenv("CONVERSATION_FSYNC", "false").lower() == "true",
+                    io_workers=int(os.getenv("CONVERSATION_IO_WORKERS", "8")),
+                    checkpointer=os.getenv("CONVERSATION_CHECKPOINTER", "sqlite").lower(),
+                    checkpoint_history=int(os.getenv("CONVERSATION_CHECKPOINT_HISTORY", "1")),
+                    write_behind=os.getenv("CONVERSATION_WRITE_BEHIND", "false").lower() == "true",
+                    flush_interval=float(os.getenv("CONVERSATION_FLUSH_INTERVAL", "1.0")),
+                    max_pending_saves=int(os.getenv("CONVERSATION_MAX_PENDING_SAVES", "64")),
+                    archive_after_days=int(os.getenv("CONVERSATION_ARCHIVE_AFTER_DAYS", "0")),
+                    purge_after_days=int(os.getenv("CONVERSATION_PURGE_AFTER_DAYS", "0")),
+                    retention_batch_size=int(os.getenv("RETENTION_BATCH_SIZE", "100")),
+                    retention_sweep_interval=float(os.getenv("RETENTION_SWEEP_INTERVAL", "3600")),
+                ),
+                sessions=SessionConfig(
+                    ttl_seconds=float(os.getenv("SESSION_TTL_SECONDS", "1800")),
+                    max_sessions=int(os.getenv("MAX_SESSIONS", "1000")),
+                    max_resident_mb=int(os.getenv("SESSION_MAX_RESIDENT_MB", "0")),
+                    sweep_interval=float(os.getenv("SESSION_SWEEP_INTERVAL", "60")),
+                ),
+                server=ServerConfig(
+                    host=os.getenv("SERVER_HOST", "127.0.0.1"),
+                    port=int(os.getenv("SERVER_PORT", "8000")),
+                    max_body_bytes=int(os.getenv("SERVER_MAX_BODY_BYTES", str(1024 * 1024))),
+                    keep_alive_seconds=float(os.getenv("SERVER_KEEP_ALIVE_SECONDS", "75")),
                 ),
             )
         return cls._instance
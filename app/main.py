@@ -8,6 +8,7 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from app.agents.agent_factory import create_multi_agent_workflow
+from app.utils.retention import start_retention_sweeper
 from app.workflows.multi_agentic_workflow import MultiAgentWorkflow
 
 logger = structlog.get_logger(__name__)
@@ -43,7 +44,16 @@ def run(query: str, conversation_id: str | None = None) -> str:
 def run_interactive_session(conversation_id: str | None = None) -> None:
     """Run an interactive session with continuous conversation."""
     workflow = create_app(conversation_id)
+    retention = start_retention_sweeper()
+    try:
+        _chat_loop(workflow)
+    finally:
+        if retention is not None:
+            retention.stop()
 
+
+def _chat_loop(workflow: MultiAgentWorkflow) -> None:
+    """Greet the user, then answer their messages until they leave."""
     print("\n" + "=" * 50)
     print("Welcome to Exam Helper System")
     print("Type 'quit' or 'exit' to end the session")
@@ -63,8 +73,10 @@ def run_interactive_session(conversation_id: str | None = None) -> None:
                 print("\nMentor: All the best :)) You will do well!! Dont worry : )) Goodbye!\n")
                 break
 
-            response = workflow.chat(user_input)
-            print(f"\nMentor: {response}\n")
+            print("\nMentor: ", end="", flush=True)
+            for chunk in workflow.chat_stream(user_input):
+                print(chunk, end="", flush=True)
+            print("\n")
 
         except KeyboardInterrupt:
             print("\n\nMentor: All the best :)) You will do well!! Dont worry : )) Goodbye!\n")
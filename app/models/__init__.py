@@ -5,7 +5,8 @@ Models module for the Exam helper System.
 from .models import ChatRequest, ChatResponse, ExamHelperMessage
 from .response_models import (
     OrchestratorResponse,
-    ExamHelperResponse
+    ExamHelperResponse,
+    SessionSummaryResponse,
 )
 
 __all__ = [
@@ -13,5 +14,6 @@ __all__ = [
     "ChatRequest",
     "ChatResponse",
     "OrchestratorResponse",
-    "ExamHelperResponse"
+    "ExamHelperResponse",
+    "SessionSummaryResponse",
 ]
@@ -21,3 +21,8 @@ class OrchestratorResponse(BaseModel):
     context_summary: str = Field(description="Summary of conversation context")
     response: Optional[str] = Field(default=None, description="The final response")
 
+
+class SessionSummaryResponse(BaseModel):
+    """Response format for the summarizer agent."""
+
+    summary: str = Field(description="Summary of the conversation so far")
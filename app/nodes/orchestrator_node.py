@@ -2,24 +2,43 @@
 Orchestrator Node for the Therapy Workflow.
 """
 
-from typing import Any, Dict
+from typing import Any, Dict, List
 import structlog
 
 from app.agents.base_agent import BaseAgent
 from app.agents.state import ExamHelperState
-from app.utils.intent_detector import detect_intent
-from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from app.utils.intent_detector import adetect_intent, detect_intent
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage, SystemMessage, ToolMessage
 from langgraph.prebuilt import create_react_agent
+from langgraph.prebuilt.chat_agent_executor import AgentState
 from app.tools.exam_helper_tools import get_agent_tools
+from app.utils.token_stream import chunk_text, emit_token, streaming_enabled
 
 logger = structlog.get_logger(__name__)
 
 
+class OrchestratorAgentState(AgentState):
+    """State of the orchestrator's ReAct agent.
+
+    Holds the conversation's recent messages, the turn's system prompt and
+    the session summary, which the agent tools receive as injected state.
+    """
+
+    system_prompt: str
+    session_summary: str
+
+
+def _system_prompt(state: OrchestratorAgentState) -> List[BaseMessage]:
+    return [SystemMessage(content=state["system_prompt"]), *state["messages"]]
+
+
 class OrchestratorNode:
     """Node for processing conversations through the orchestrator agent."""
 
     def __init__(self, orchestrator_agent: BaseAgent) -> None:
         self.orchestrator_agent = orchestrator_agent
+        self._agent: Any = None
+        self._agent_model: Any = None
         
     @staticmethod
     def _extract_text(content) -> str:
@@ -36,49 +55,147 @@ class OrchestratorNode:
             return "\n".join(parts)
         return str(content)
 
+    @staticmethod
+    def _forward_chunk(payload: Any, delegated: bool) -> bool:
+        """Stream a ``messages`` chunk of the orchestrator agent if it is part of the response.
+
+        Once the orchestrator delegates to an agent tool, the tool's agent
+        streams the response itself and the orchestrator's closing message
+        is not part of the response, so only tokens generated before any
+        tool runs are streamed.
+
+        Returns:
+            Whether the orchestrator has delegated to a tool
+        """
+        chunk, metadata = payload
+        if metadata.get("langgraph_node") != "agent":
+            return True
+        if not delegated and isinstance(chunk, AIMessageChunk) and not chunk.tool_call_chunks:
+            emit_token(chunk_text(chunk.content))
+        return delegated
+
+    def _stream_agent(self, agent: Any, agent_input: Dict[str, Any]) -> Dict[str, Any]:
+        """Run the orchestrator agent, streaming its own answer, and return its final state."""
+        result: Dict[str, Any] = {}
+        delegated = False
+        for mode, payload in agent.stream(agent_input, stream_mode=["messages", "values"]):
+            if mode == "values":
+                result = payload
+            else:
+                delegated = self._forward_chunk(payload, delegated)
+        return result
+
+    async def _astream_agent(self, agent: Any, agent_input: Dict[str, Any]) -> Dict[str, Any]:
+        """Asynchronous ``_stream_agent``."""
+        result: Dict[str, Any] = {}
+        delegated = False
+        async for mode, payload in agent.astream(agent_input, stream_mode=["messages", "values"]):
+            if mode == "values":
+                result = payload
+            else:
+                delegated = self._forward_chunk(payload, delegated)
+        return result
+
+    @staticmethod
+    def _latest_user_message(state: ExamHelperState) -> str:
+        for msg in reversed(state.get("messages", [])):
+            if isinstance(msg, HumanMessage):
+                return msg.content
+        return ""
+
+    def _get_agent(self) -> Any:
+        """Get the ReAct agent that answers a turn or delegates it to an agent tool.
+
+        The agent is compiled once per model and reused by every turn; the
+        turn's system prompt travels in the agent's input state.
+        """
+        model = self.orchestrator_agent.model
+        if self._agent is None or self._agent_model is not model:
+            self._agent = create_react_agent(
+                model,
+                get_agent_tools(),
+                prompt=_system_prompt,
+                state_schema=OrchestratorAgentState,
+            )
+            self._agent_model = model
+        return self._agent
+
+    def _agent_input(self, state: ExamHelperState) -> Dict[str, Any]:
+        """Build the agent's input from the recent messages in state and the summary of older ones."""
+        return {
+            "messages": state.get("messages", []),
+            "system_prompt": self.orchestrator_agent.get_prompt(state),
+            "session_summary": state.get("session_summary", ""),
+        }
+
+    def _turn_update(self, result: Dict[str, Any], current_intent: str) -> Dict[str, Any]:
+        """Build the state update from the orchestrator agent's final state."""
+        orchestrator_response = ""
+        ai_message=""
+
+        for msg in reversed(result.get("messages", [])):
+            if isinstance(msg, ToolMessage) and msg.content:
+                orchestrator_response = msg.content
+                break
+            if isinstance(msg, AIMessage) and msg.content and not getattr(msg, "tool_calls", None):
+                ai_message = self._extract_text(msg.content)
+
+        if orchestrator_response == "":
+            orchestrator_response = ai_message
+
+        return {
+            "messages": result.get("messages", []),
+            "user_intent": current_intent,
+            "orchestrator_result": orchestrator_response,
+        }
+
     def process(self, state: ExamHelperState) -> Dict[str, Any]:
         """Process the current state through the orchestrator."""
         try:
-
-            user_msg = ""
-            for msg in reversed(state.get("messages", [])):
-                if isinstance(msg, HumanMessage):
-                    user_msg = msg.content
-                    break
-
+            user_msg = self._latest_user_message(state)
             current_intent = state.get("user_intent", "unknown")
 
             if current_intent == "unknown" and user_msg:
                 current_intent = detect_intent(user_msg)
 
-            tools = get_agent_tools()
-            prompt = self.orchestrator_agent.get_prompt(state)
+            agent = self._get_agent()
+            agent_input = self._agent_input(state)
+            if streaming_enabled():
+                result = self._stream_agent(agent, agent_input)
+            else:
+                result = agent.invoke(agent_input)
 
-            agent = create_react_agent(
-                self.orchestrator_agent.model,
-                tools,
-                prompt=prompt,
-            )
+            return self._turn_update(result, current_intent)
 
-            result = agent.invoke({"messages": state.get("messages", [])})
-            orchestrator_response = ""
-            ai_message=""
+        except Exception as e:
+            error_msg = f"Orchestrator node failed: {str(e)}"
+            logger.error("Orchestrator node failed", error=str(e))
+            return {
+                "orchestrator_result": None,
+                "error": [error_msg],
+            }
 
-            for msg in reversed(result.get("messages", [])):
-                if isinstance(msg, ToolMessage) and msg.content:
-                    orchestrator_response = msg.content
-                    break
-                if isinstance(msg, AIMessage) and msg.content and not getattr(msg, "tool_calls", None):
-                    ai_message = self._extract_text(msg.content)
+    async def aprocess(self, state: ExamHelperState) -> Dict[str, Any]:
+        """Process the current state through the orchestrator without blocking the event loop.
 
-            if orchestrator_response == "":
-                orchestrator_response = ai_message
+        Runs when the workflow is invoked asynchronously, so that many
+        conversations can wait on the model concurrently on one event loop.
+        """
+        try:
+            user_msg = self._latest_user_message(state)
+            current_intent = state.get("user_intent", "unknown")
 
-            return {
-                "messages": result.get("messages", []),
-                "user_intent": current_intent,
-                "orchestrator_result": orchestrator_response,
-            }
+            if current_intent == "unknown" and user_msg:
+                current_intent = await adetect_intent(user_msg)
+
+            agent = self._get_agent()
+            agent_input = self._agent_input(state)
+            if streaming_enabled():
+                result = await self._astream_agent(agent, agent_input)
+            else:
+                result = await agent.ainvoke(agent_input)
+
+            return self._turn_update(result, current_intent)
 
         except Exception as e:
             error_msg = f"Orchestrator node failed: {str(e)}"
@@ -0,0 +1,682 @@
+"""
+HTTP/WebSocket server for the Exam Helper System.
+
+Serves every conversation from one process on a single asyncio event
+loop using only the standard library. Turns run through the session
+manager's asynchronous API, so a conversation waiting on the model costs
+a suspended task rather than a thread.
+
+Endpoints:
+    GET  /health               Liveness
+    GET  /ready                200 once warmed up, 503 until then
+    POST /warmup               Warm up now and report readiness
+    POST /chat                 ``ChatRequest`` in, ``ChatResponse`` out
+    POST /chat/stream          ``ChatRequest`` in, newline-delimited JSON events out
+    GET  /conversations        One page of conversations (page_size, cursor, intent, min_messages,
+                               updated_after, updated_before); archived conversations are not listed
+    GET  /conversations/{id}   Resume a conversation: its history (optionally only the newest ``limit``)
+    GET  /ws                   WebSocket: ``ChatRequest`` messages in, JSON events out
+
+Streamed turns send ``{"type": "delta", "conversation_id", "text"}`` events
+as the response is generated, then ``{"type": "response", ...}`` with the
+fields of the ``ChatResponse``. A WebSocket can carry turns of several
+conversations at once; events are tagged with their conversation ID.
+
+Run with ``python -m app.server [--host HOST] [--port PORT]``.
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import struct
+import uuid
+from contextlib import aclosing, suppress
+from http import HTTPStatus
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+import structlog
+from pydantic import BaseModel, ValidationError
+
+from app.config.app_config import AppConfigLoader
+from app.models.models import ChatRequest, ChatResponse, ExamHelperMessage
+from app.utils.checkpoint_store import get_checkpointer
+from app.utils.conversation_ids import generate_conversation_id, is_valid_conversation_id
+from app.utils.conversation_store import get_conversation_store, get_io_executor
+from app.utils.retention import RetentionManager, start_retention_sweeper
+from app.workflows.session_manager import SessionManager, create_session_manager
+
+logger = structlog.get_logger(__name__)
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+_OP_CONTINUATION = 0x0
+_OP_TEXT = 0x1
+_OP_BINARY = 0x2
+_OP_CLOSE = 0x8
+_OP_PING = 0x9
+_OP_PONG = 0xA
+
+
+class HTTPError(Exception):
+    """An error answered with an HTTP status and a JSON ``{"error": ...}`` body."""
+
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class _StreamAborted(Exception):
+    """A streamed response ended early with an error event; the connection must close."""
+
+
+class _WebSocketClosed(Exception):
+    """The WebSocket must be closed with ``code``."""
+
+    def __init__(self, code: int) -> None:
+        super().__init__(code)
+        self.code = code
+
+
+class _Request:
+    """A parsed HTTP request."""
+
+    __slots__ = ("method", "path", "query", "headers", "body")
+
+    def __init__(self, method: str, path: str, query: Dict[str, str], headers: Dict[str, str], body: bytes) -> None:
+        self.method = method
+        self.path = path
+        self.query = query
+        self.headers = headers
+        self.body = body
+
+    @property
+    def keep_alive(self) -> bool:
+        return self.headers.get("connection", "").lower() != "close"
+
+    @property
+    def is_websocket(self) -> bool:
+        return self.headers.get("upgrade", "").lower() == "websocket"
+
+
+async def _read_request(reader: asyncio.StreamReader, max_body_bytes: int) -> Optional[_Request]:
+    """Read one request from a connection.
+
+    Returns:
+        The request, or None if the client closed the connection between requests
+
+    Raises:
+        HTTPError: If the request is malformed or too large
+    """
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError as e:
+        if not e.partial.strip():
+            return None
+        raise HTTPError(400, "Incomplete request")
+    except asyncio.LimitOverrunError:
+        raise HTTPError(431, "Request header too large")
+
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, _ = lines[0].split(" ", 2)
+    except ValueError:
+        raise HTTPError(400, "Malformed request line")
+
+    headers: Dict[str, str] = {}
+    for line in lines[1:]:
+        if not line:
+            continue
+        name, sep, value = line.partition(":")
+        if not sep:
+            raise HTTPError(400, "Malformed header")
+        headers[name.strip().lower()] = value.strip()
+
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        raise HTTPError(411, "Chunked request bodies are not supported")
+    try:
+        length = int(headers.get("content-length", "0"))
+    except ValueError:
+        raise HTTPError(400, "Invalid Content-Length")
+    if length < 0:
+        raise HTTPError(400, "Invalid Content-Length")
+    if length > max_body_bytes:
+        raise HTTPError(413, "Request body too large")
+    body = await reader.readexactly(length) if length else b""
+
+    url = urlsplit(target)
+    return _Request(method.upper(), unquote(url.path), dict(parse_qsl(url.query)), headers, body)
+
+
+def _head(status: int, headers: Dict[str, str]) -> bytes:
+    lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}"]
+    lines.extend(f"{name}: {value}" for name, value in headers.items())
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+def _dump(payload: Any) -> bytes:
+    if isinstance(payload, BaseModel):
+        payload = payload.model_dump(mode="json")
+    return json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+
+
+async def _send_json(writer: asyncio.StreamWriter, status: int, payload: Any, keep_alive: bool = True) -> None:
+    body = _dump(payload)
+    writer.write(
+        _head(
+            status,
+            {
+                "Content-Type": "application/json",
+                "Content-Length": str(len(body)),
+                "Connection": "keep-alive" if keep_alive else "close",
+            },
+        )
+        + body
+    )
+    await writer.drain()
+
+
+def _int_param(query: Dict[str, str], name: str, default: Optional[int] = None) -> Optional[int]:
+    value = query.get(name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise HTTPError(400, f"{name} must be an integer")
+
+
+def _encode_frame(opcode: int, payload: bytes) -> bytes:
+    """Encode an unmasked, unfragmented WebSocket frame, as servers send them."""
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, length)
+    elif length < 1 << 16:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+    return header + payload
+
+
+def _unmask(payload: bytes, mask: bytes) -> bytes:
+    if not payload:
+        return payload
+    key = (mask * (len(payload) // 4 + 1))[: len(payload)]
+    return (int.from_bytes(payload, "big") ^ int.from_bytes(key, "big")).to_bytes(len(payload), "big")
+
+
+class _WebSocket:
+    """Server side of a WebSocket connection.
+
+    Sends are serialized by a lock so that concurrent turns on one socket
+    never interleave their frames.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, max_message_bytes: int) -> None:
+        self.reader = reader
+        self.writer = writer
+        self.max_message_bytes = max_message_bytes
+        self.closed = False
+        self._send_lock = asyncio.Lock()
+
+    async def _send_frame(self, opcode: int, payload: bytes) -> None:
+        async with self._send_lock:
+            if self.closed and opcode != _OP_CLOSE:
+                raise ConnectionError("WebSocket closed")
+            self.writer.write(_encode_frame(opcode, payload))
+            await self.writer.drain()
+
+    async def send_json(self, payload: Any) -> None:
+        await self._send_frame(_OP_TEXT, _dump(payload))
+
+    async def close(self, code: int = 1000) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        with suppress(ConnectionError, RuntimeError):
+            await self._send_frame(_OP_CLOSE, struct.pack("!H", code))
+
+    async def _read_frame(self) -> Tuple[bool, int, bytes]:
+        first, second = await self.reader.readexactly(2)
+        length = second & 0x7F
+        if length == 126:
+            (length,) = struct.unpack("!H", await self.reader.readexactly(2))
+        elif length == 127:
+            (length,) = struct.unpack("!Q", await self.reader.readexactly(8))
+        if length > self.max_message_bytes:
+            raise _WebSocketClosed(1009)
+        mask = await self.reader.readexactly(4) if second & 0x80 else b""
+        payload = await self.reader.readexactly(length)
+        return bool(first & 0x80), first & 0x0F, _unmask(payload, mask) if mask else payload
+
+    async def receive(self) -> Optional[str]:
+        """Receive the next text message, answering control frames meanwhile.
+
+        Returns:
+            The message, or None once the connection is closed
+        """
+        fragments: List[bytes] = []
+        size = 0
+        while True:
+            try:
+                fin, opcode, payload = await self._read_frame()
+            except (asyncio.IncompleteReadError, ConnectionError):
+                self.closed = True
+                return None
+            except _WebSocketClosed as e:
+                await self.close(e.code)
+                return None
+
+            if opcode == _OP_PING:
+                await self._send_frame(_OP_PONG, payload)
+                continue
+            if opcode == _OP_PONG:
+                continue
+            if opcode == _OP_CLOSE:
+                await self.close(struct.unpack("!H", payload[:2])[0] if len(payload) >= 2 else 1000)
+                return None
+            if opcode not in (_OP_TEXT, _OP_BINARY, _OP_CONTINUATION):
+                await self.close(1002)
+                return None
+
+            size += len(payload)
+            if size > self.max_message_bytes:
+                await self.close(1009)
+                return None
+            fragments.append(payload)
+            if fin:
+                return b"".join(fragments).decode("utf-8", errors="replace")
+
+
+class ExamHelperServer:
+    """Asyncio HTTP/WebSocket front end for the exam helper workflow.
+
+    Each connection is a task on one event loop, and turns go through the
+    session manager's asynchronous API, so thousands of conversations can
+    be in flight at once. Warm-up, which opens storage and compiles the
+    shared workflow graph, starts when the server does; ``/ready`` reports
+    503 until it has finished.
+    """
+
+    def __init__(
+        self,
+        sessions: Optional[SessionManager] = None,
+        host: Optional[str] = None,
+        port: Optional[int] = None,
+    ) -> None:
+        config = AppConfigLoader.app_config().server
+        self.sessions = sessions
+        self.host = host or config.host
+        self.port = config.port if port is None else port
+        self.max_body_bytes = config.max_body_bytes
+        self.keep_alive_seconds = config.keep_alive_seconds
+        self.ready = False
+        self.warm_up_error: Optional[str] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._warm_up_lock: Optional[asyncio.Lock] = None
+        self._retention: Optional[RetentionManager] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._routes: Dict[Tuple[str, str], Callable[[_Request], Awaitable[Tuple[int, Any]]]] = {
+            ("GET", "/health"): self._health,
+            ("GET", "/ready"): self._readiness,
+            ("POST", "/warmup"): self._warm_up_endpoint,
+            ("POST", "/chat"): self._chat,
+            ("GET", "/conversations"): self._list_conversations,
+        }
+
+    def _warm_up_sync(self) -> None:
+        from app.agents.agent_factory import get_workflow_graph
+
+        get_conversation_store()
+        if self._retention is None:
+            self._retention = start_retention_sweeper()
+        get_checkpointer()
+        get_workflow_graph()
+        if self.sessions is None:
+            self.sessions = create_session_manager()
+
+    async def warm_up(self) -> bool:
+        """Open storage, compile the workflow graph and create the session manager.
+
+        Safe to call repeatedly; a failed warm-up is retried on the next call.
+
+        Returns:
+            Whether the server is ready
+        """
+        if self._warm_up_lock is None:
+            self._warm_up_lock = asyncio.Lock()
+        async with self._warm_up_lock:
+            if self.ready:
+                return True
+            try:
+                await asyncio.get_running_loop().run_in_executor(get_io_executor(), self._warm_up_sync)
+                self.ready = True
+                self.warm_up_error = None
+                logger.info("Server warmed up")
+            except Exception as e:
+                self.warm_up_error = str(e)
+                logger.error("Server warm-up failed", error=str(e))
+        return self.ready
+
+    async def start(self) -> None:
+        """Start listening and begin warming up in the background."""
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._spawn(self.warm_up())
+        logger.info("Server listening", host=self.host, port=self.port)
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        """Stop accepting connections, the session sweeper and the retention sweeper."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self.sessions is not None:
+            self.sessions.stop()
+        if self._retention is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self._retention.stop)
+            self._retention = None
+
+    def _spawn(self, coro: Awaitable[Any]) -> asyncio.Task:
+        # Keep a reference so the task is not garbage collected mid-flight
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(
+                        _read_request(reader, self.max_body_bytes), self.keep_alive_seconds
+                    )
+                except HTTPError as e:
+                    await _send_json(writer, e.status, {"error": e.message}, keep_alive=False)
+                    break
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError):
+                    break
+                if request is None:
+                    break
+
+                if request.is_websocket:
+                    await self._serve_websocket(request, reader, writer)
+                    break
+
+                keep_alive = request.keep_alive
+                try:
+                    await self._dispatch(request, writer, keep_alive)
+                except _StreamAborted:
+                    break
+                except HTTPError as e:
+                    await _send_json(writer, e.status, {"error": e.message}, keep_alive)
+                except Exception as e:
+                    logger.error("Request failed", path=request.path, error=str(e))
+                    await _send_json(writer, 500, {"error": "Internal server error"}, keep_alive=False)
+                    break
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            with suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def _dispatch(self, request: _Request, writer: asyncio.StreamWriter, keep_alive: bool) -> None:
+        if request.path == "/chat/stream":
+            if request.method != "POST":
+                raise HTTPError(405, "Method not allowed")
+            await self._chat_stream(request, writer, keep_alive)
+            return
+
+        handler = self._routes.get((request.method, request.path))
+        if handler is None and request.path.startswith("/conversations/"):
+            if request.method != "GET":
+                raise HTTPError(405, "Method not allowed")
+            handler = self._resume_conversation
+        if handler is None:
+            if any(path == request.path for _, path in self._routes):
+                raise HTTPError(405, "Method not allowed")
+            raise HTTPError(404, "Not found")
+
+        status, payload = await handler(request)
+        await _send_json(writer, status, payload, keep_alive)
+
+    async def _health(self, request: _Request) -> Tuple[int, Any]:
+        return 200, {"status": "ok"}
+
+    async def _readiness(self, request: _Request) -> Tuple[int, Any]:
+        if self.ready:
+            return 200, {"status": "ready"}
+        return 503, {"status": "warming_up", "error": self.warm_up_error}
+
+    async def _warm_up_endpoint(self, request: _Request) -> Tuple[int, Any]:
+        await self.warm_up()
+        return await self._readiness(request)
+
+    async def _require_ready(self) -> SessionManager:
+        if not self.ready and not await self.warm_up():
+            raise HTTPError(503, f"Server is not ready: {self.warm_up_error}")
+        return self.sessions
+
+    @staticmethod
+    def _parse_chat_request(body: bytes) -> ChatRequest:
+        """Parse a chat request; an empty ``conversation_id`` starts a new conversation."""
+        try:
+            chat = ChatRequest.model_validate_json(body)
+        except ValidationError as e:
+            raise HTTPError(400, f"Invalid chat request: {e.errors(include_url=False)}")
+        if chat.conversation_id and not is_valid_conversation_id(chat.conversation_id):
+            raise HTTPError(400, "Invalid conversation_id")
+        return chat
+
+    @staticmethod
+    def _chat_response(conversation_id: str, result: Dict[str, Any], text: Optional[str] = None) -> ChatResponse:
+        state = result.get("state") or {}
+        return ChatResponse(
+            conversation_id=conversation_id,
+            message=ExamHelperMessage(
+                message_id=uuid.uuid4().hex,
+                text=(result.get("response") if text is None else text) or "",
+                role="exam helper",
+            ),
+            user_intent=state.get("user_intent"),
+            success=result.get("success", False),
+            error=result.get("error"),
+        )
+
+    async def _chat(self, request: _Request) -> Tuple[int, Any]:
+        chat = self._parse_chat_request(request.body)
+        sessions = await self._require_ready()
+        conversation_id = chat.conversation_id or generate_conversation_id()
+        result = await sessions.aprocess_query(conversation_id, chat.message.text)
+        return 200, self._chat_response(conversation_id, result)
+
+    async def _stream_turn(self, chat: ChatRequest, send: Callable[[Dict[str, Any]], Awaitable[None]]) -> None:
+        """Run a turn, sending a delta event per chunk and then the response event."""
+        sessions = await self._require_ready()
+        conversation_id = chat.conversation_id or generate_conversation_id()
+        parts: List[str] = []
+        async with aclosing(sessions.astream_query(conversation_id, chat.message.text)) as events:
+            async for kind, value in events:
+                if kind == "token":
+                    parts.append(value)
+                    await send({"type": "delta", "conversation_id": conversation_id, "text": value})
+                    continue
+                # The streamed text is the response; it is None if nothing was streamed
+                response = self._chat_response(conversation_id, value, "".join(parts) if parts else None)
+                await send({"type": "response", **response.model_dump(mode="json")})
+
+    async def _chat_stream(self, request: _Request, writer: asyncio.StreamWriter, keep_alive: bool) -> None:
+        chat = self._parse_chat_request(request.body)
+        await self._require_ready()
+        chat = chat.model_copy(update={"conversation_id": chat.conversation_id or generate_conversation_id()})
+        writer.write(
+            _head(
+                200,
+                {
+                    "Content-Type": "application/x-ndjson",
+                    "Transfer-Encoding": "chunked",
+                    "Cache-Control": "no-cache",
+                    "Connection": "keep-alive" if keep_alive else "close",
+                },
+            )
+        )
+
+        async def send(event: Dict[str, Any]) -> None:
+            line = _dump(event) + b"\n"
+            writer.write(b"%x\r\n%s\r\n" % (len(line), line))
+            await writer.drain()
+
+        try:
+            await self._stream_turn(chat, send)
+        except (ConnectionError, asyncio.CancelledError):
+            raise
+        except Exception as e:
+            # The status line is already sent, so the error goes in the body
+            if isinstance(e, HTTPError):
+                message = e.message
+            else:
+                logger.error("Streamed turn failed", path=request.path, error=str(e))
+                message = "Internal server error"
+            await send({"type": "error", "conversation_id": chat.conversation_id, "error": message})
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+            raise _StreamAborted() from e
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def _list_conversations(self, request: _Request) -> Tuple[int, Any]:
+        filters: Dict[str, Any] = {}
+        for name in ("intent", "updated_after", "updated_before"):
+            if name in request.query:
+                filters[name] = request.query[name]
+        if "min_messages" in request.query:
+            filters["min_messages"] = _int_param(request.query, "min_messages")
+        page = await get_conversation_store().alist_conversations_page(
+            page_size=_int_param(request.query, "page_size", 50),
+            cursor=request.query.get("cursor") or None,
+            **filters,
+        )
+        return 200, page
+
+    async def _resume_conversation(self, request: _Request) -> Tuple[int, Any]:
+        conversation_id = request.path[len("/conversations/"):]
+        if not is_valid_conversation_id(conversation_id):
+            raise HTTPError(404, "Not found")
+        limit = _int_param(request.query, "limit")
+
+        store = get_conversation_store()
+        if limit is not None:
+            record = await store.aload_tail(conversation_id, max(limit, 0))
+        else:
+            record = await store.aload_conversation(conversation_id)
+        if record is None:
+            raise HTTPError(404, f"Conversation {conversation_id} not found")
+
+        # Rehydrate the session now so the next turn does not pay for it
+        sessions = await self._require_ready()
+        async with sessions.asession(conversation_id):
+            pass
+
+        messages = record.get("messages", [])
+        first_index = record.get("message_count", len(messages)) - len(messages)
+        history = [
+            ExamHelperMessage(
+                message_id=f"{conversation_id}:{first_index + i}",
+                text=str(message.get("content", "")),
+                role="user" if message.get("role") == "user" else "exam helper",
+            ).model_dump(mode="json", exclude={"timestamp"})
+            for i, message in enumerate(messages)
+        ]
+        return 200, {
+            "conversation_id": conversation_id,
+            "metadata": record.get("metadata", {}),
+            "messages": history,
+        }
+
+    async def _serve_websocket(
+        self, request: _Request, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        key = request.headers.get("sec-websocket-key")
+        if request.path != "/ws" or request.method != "GET" or not key:
+            await _send_json(writer, 400, {"error": "Invalid WebSocket upgrade"}, keep_alive=False)
+            return
+
+        accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode("ascii")).digest()).decode("ascii")
+        writer.write(
+            _head(
+                101,
+                {"Upgrade": "websocket", "Connection": "Upgrade", "Sec-WebSocket-Accept": accept},
+            )
+        )
+        await writer.drain()
+
+        socket = _WebSocket(reader, writer, self.max_body_bytes)
+        turns: Set[asyncio.Task] = set()
+        while True:
+            message = await socket.receive()
+            if message is None:
+                break
+            try:
+                chat = self._parse_chat_request(message.encode("utf-8"))
+            except HTTPError as e:
+                await socket.send_json({"type": "error", "error": e.message})
+                continue
+            # Turns run concurrently so one socket can carry several conversations
+            turn = self._spawn(self._websocket_turn(socket, chat))
+            turns.add(turn)
+            turn.add_done_callback(turns.discard)
+
+        # Turns already started finish and are saved even though nobody is listening
+        if turns:
+            await asyncio.gather(*turns, return_exceptions=True)
+        await socket.close()
+
+    async def _websocket_turn(self, socket: _WebSocket, chat: ChatRequest) -> None:
+        try:
+            await self._stream_turn(chat, socket.send_json)
+        except HTTPError as e:
+            with suppress(ConnectionError, RuntimeError):
+                await socket.send_json({"type": "error", "conversation_id": chat.conversation_id, "error": e.message})
+        except (ConnectionError, RuntimeError):
+            pass
+
+
+async def serve(host: Optional[str] = None, port: Optional[int] = None) -> None:
+    """Run the server until cancelled."""
+    server = ExamHelperServer(host=host, port=port)
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Serve the exam helper over HTTP and WebSocket")
+    parser.add_argument("--host", default=None, help="Defaults to SERVER_HOST")
+    parser.add_argument("--port", type=int, default=None, help="Defaults to SERVER_PORT")
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -5,17 +5,23 @@ These tools wrap the actual therapy agent instances so the orchestrator
 delegates to them rather than duplicating agent logic inline.
 """
 
-import asyncio
+from typing import Annotated
+
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.tools import StructuredTool
+from langgraph.prebuilt import InjectedState
 from pydantic import BaseModel, Field
 
+from app.utils.background_loop import run_coroutine_sync
+
 
 class ExamHelperInput(BaseModel):
     """Input schema for agent tools."""
 
     message: str = Field(description="The user's message to respond to")
     context: str = Field(description="Conversation context/summary", default="")
+    # Filled in from the orchestrator's state, not by the model
+    session_summary: Annotated[str, InjectedState("session_summary")] = ""
 
 
 _agent_cache = {}
@@ -29,22 +35,23 @@ def _get_agent(agent_class):
     return _agent_cache[name]
 
 
-def _build_state_from_context(context: str) -> dict:
-    """Build a minimal state dict from a context string for agent prompt formatting."""
+def _build_state_from_context(context: str, session_summary: str = "") -> dict:
+    """Build a minimal state dict from a context string and the session summary for agent prompt formatting."""
     messages = []
     if context:
         messages.append(HumanMessage(content=context))
-    return {"messages": messages}
+    return {"messages": messages, "session_summary": session_summary}
 
 
 def _create_agent_tool_fn(agent_class):
     """Create a tool function that delegates to an actual agent instance."""
 
-    def agent_tool_fn(message: str, context: str = "") -> str:
+    def agent_tool_fn(message: str, context: str = "", session_summary: str = "") -> str:
         agent = _get_agent(agent_class)
-        state = _build_state_from_context(context)
+        state = _build_state_from_context(context, session_summary)
 
-        result = asyncio.run(
+        # Agents share one long-lived loop so their async clients survive across calls
+        result = run_coroutine_sync(
              agent.process_query(message, state)
         )
 
@@ -52,6 +59,20 @@ def _create_agent_tool_fn(agent_class):
 
     return agent_tool_fn
 
+
+def _create_agent_tool_coroutine(agent_class):
+    """Create the asynchronous tool function, used when the orchestrator runs on an event loop."""
+
+    async def agent_tool_coroutine(message: str, context: str = "", session_summary: str = "") -> str:
+        agent = _get_agent(agent_class)
+        state = _build_state_from_context(context, session_summary)
+
+        result = await agent.process_query(message, state)
+
+        return result.get(agent.get_result_key(), "")
+
+    return agent_tool_coroutine
+
 def _build_tools():
     """Build all agent tools. Imports are deferred to avoid circular imports."""
     from app.agents.explainer_agent.explainer_agent import ExplainerAgent
@@ -60,6 +81,7 @@ def _build_tools():
 
     explainer = StructuredTool.from_function(
         func=_create_agent_tool_fn(ExplainerAgent),
+        coroutine=_create_agent_tool_coroutine(ExplainerAgent),
         name="explainer",
         description="Use when user wants a certain concept to be explained.",
         args_schema=ExamHelperInput,
@@ -67,6 +89,7 @@ def _build_tools():
 
     learner = StructuredTool.from_function(
         func=_create_agent_tool_fn(LearnerAgent),
+        coroutine=_create_agent_tool_coroutine(LearnerAgent),
         name="learner",
         description="Use when user asks for material to study a certain topic",
         args_schema=ExamHelperInput,
@@ -3,10 +3,46 @@ Utils module for Exam helper system
 """
 
 from .intent_detector import detect_intent
-from .conversation_store import ConversationStore, get_conversation_store
+from .conversation_ids import generate_conversation_id, is_valid_conversation_id
+from .conversation_store import (
+    BaseConversationStore,
+    ConversationConflictError,
+    ConversationStore,
+    create_conversation_store,
+    get_conversation_store,
+)
+from .journal_conversation_store import JournalConversationStore
+from .background_loop import BackgroundLoop, get_background_loop, run_coroutine_sync
+from .blob_store import BlobStore
+from .checkpoint_store import SQLiteCheckpointSaver, create_checkpointer, get_checkpointer
+from .conversation_search import ConversationSearchIndex
+from .sqlite_conversation_store import SQLiteConversationStore
+from .write_behind_store import ConversationWriteError, WriteBehindConversationStore
+from .retention import ConversationArchive, RetentionManager, TieredConversationStore, start_retention_sweeper
 
 __all__ = [
     "detect_intent",
+    "generate_conversation_id",
+    "is_valid_conversation_id",
+    "BaseConversationStore",
+    "ConversationConflictError",
     "ConversationStore",
+    "JournalConversationStore",
+    "ConversationSearchIndex",
+    "BlobStore",
+    "BackgroundLoop",
+    "get_background_loop",
+    "run_coroutine_sync",
+    "SQLiteConversationStore",
+    "WriteBehindConversationStore",
+    "ConversationWriteError",
+    "TieredConversationStore",
+    "ConversationArchive",
+    "RetentionManager",
+    "start_retention_sweeper",
+    "SQLiteCheckpointSaver",
+    "create_checkpointer",
+    "get_checkpointer",
+    "create_conversation_store",
     "get_conversation_store",
 ]
\ No newline at end of file
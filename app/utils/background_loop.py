@@ -0,0 +1,137 @@
+"""
+Long-lived background event loop for synchronous callers.
+
+``asyncio.run`` creates and tears down an event loop on every call, and
+with it the async HTTP clients and connection pools of the models that
+ran on that loop. Synchronous entry points instead submit their
+coroutines to one event loop that runs for the life of the process on a
+daemon thread, so clients created on it are reused across turns.
+"""
+
+import asyncio
+import atexit
+import contextvars
+import threading
+from concurrent.futures import Future
+from typing import Any, Coroutine, Optional, TypeVar
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+T = TypeVar("T")
+
+
+class BackgroundLoop:
+    """An event loop on a daemon thread that runs coroutines submitted from other threads.
+
+    The loop starts on first use. Coroutines run in a copy of the
+    submitting thread's context, so context variables such as the token
+    sink of a streamed turn follow them onto the loop.
+    """
+
+    def __init__(self, name: str = "background-loop") -> None:
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=self._run, args=(loop,), name=self.name, daemon=True)
+                thread.start()
+                self._loop, self._thread = loop, thread
+                logger.debug("Background event loop started", name=self.name)
+            return self._loop
+
+    @staticmethod
+    def _run(loop: asyncio.AbstractEventLoop) -> None:
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_forever()
+            pending = asyncio.all_tasks(loop)
+            for task in pending:
+                task.cancel()
+            if pending:
+                loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            loop.run_until_complete(loop.shutdown_asyncgens())
+        finally:
+            loop.close()
+
+    def in_loop_thread(self) -> bool:
+        """Check whether the caller is running on the loop's own thread."""
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def submit(self, coro: Coroutine[Any, Any, T]) -> "Future[T]":
+        """Schedule a coroutine on the loop.
+
+        Returns:
+            A future that completes with the coroutine's result
+        """
+        loop = self._ensure_started()
+        context = contextvars.copy_context()
+        future: "Future[T]" = Future()
+
+        def start() -> None:
+            task = loop.create_task(coro, context=context)
+
+            def done(finished: asyncio.Task) -> None:
+                if finished.cancelled():
+                    future.cancel()
+                elif finished.exception() is not None:
+                    future.set_exception(finished.exception())
+                else:
+                    future.set_result(finished.result())
+
+            task.add_done_callback(done)
+
+        try:
+            loop.call_soon_threadsafe(start)
+        except RuntimeError:
+            coro.close()
+            raise
+        return future
+
+    def run(self, coro: Coroutine[Any, Any, T], timeout: Optional[float] = None) -> T:
+        """Run a coroutine on the loop and block until it finishes.
+
+        Raises:
+            RuntimeError: If called from the loop's own thread, which would deadlock
+        """
+        if self.in_loop_thread():
+            coro.close()
+            raise RuntimeError("Cannot block on the background event loop from its own thread")
+        return self.submit(coro).result(timeout)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Cancel what is still running and stop the loop; it starts again on the next submit."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop, self._thread = None, None
+        if loop is None:
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not threading.current_thread():
+            thread.join(timeout)
+
+
+_background_loop: Optional[BackgroundLoop] = None
+_background_loop_lock = threading.Lock()
+
+
+def get_background_loop() -> BackgroundLoop:
+    """Get the process-wide background event loop."""
+    global _background_loop
+    if _background_loop is None:
+        with _background_loop_lock:
+            if _background_loop is None:
+                _background_loop = BackgroundLoop("exam-helper-loop")
+                atexit.register(_background_loop.stop)
+    return _background_loop
+
+
+def run_coroutine_sync(coro: Coroutine[Any, Any, T], timeout: Optional[float] = None) -> T:
+    """Run a coroutine on the background event loop from synchronous code and return its result."""
+    return get_background_loop().run(coro, timeout)
@@ -0,0 +1,196 @@
+"""
+Content-addressed storage for large message bodies.
+
+Bodies are stored once per distinct content, zlib-compressed, under their
+SHA-256 digest. Conversation records keep only the digest. Each blob's
+reference count lives in a small SQLite database, and a blob is deleted
+when the last conversation referencing it releases it.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import zlib
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator
+
+import structlog
+
+from app.utils.sqlite_wal import enable_wal
+
+logger = structlog.get_logger(__name__)
+
+BLOB_DIRNAME = ".blobs"
+REFS_FILENAME = "refs.sqlite3"
+
+# Bytes the write-ahead log is truncated to after a checkpoint
+WAL_SIZE_LIMIT = 1024 * 1024
+
+# Key under which a stored message holds the digest of its body
+BLOB_REF_KEY = "content_blob"
+
+REFS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blob_refs (
+    digest TEXT PRIMARY KEY,
+    refcount INTEGER NOT NULL,
+    size INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def blob_digest(body: str) -> str:
+    """Get the content address of a message body."""
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+class BlobStore:
+    """Reference-counted store of compressed message bodies.
+
+    ``acquire`` and ``release`` run in ``BEGIN IMMEDIATE`` transactions on
+    the reference database, and blob files are written and deleted inside
+    them, so a body being released by one writer can never be deleted from
+    under another writer that is acquiring it.
+    """
+
+    def __init__(self, root: Path, compression_level: int = 6, busy_timeout: float = 30.0) -> None:
+        self.root = root
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.compression_level = compression_level
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._connection().executescript(REFS_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get the connection for the current thread, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.root / REFS_FILENAME, timeout=self.busy_timeout, isolation_level=None)
+            enable_wal(conn, self.busy_timeout)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA journal_size_limit={WAL_SIZE_LIMIT}")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run a write transaction on the current thread's connection."""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest[2:]
+
+    def get(self, digest: str) -> str:
+        """Read a message body.
+
+        Raises:
+            KeyError: If no blob is stored under ``digest``
+        """
+        try:
+            with open(self._path(digest), "rb") as f:
+                return zlib.decompress(f.read()).decode("utf-8")
+        except FileNotFoundError:
+            raise KeyError(digest) from None
+
+    def _write(self, digest: str, body: str) -> None:
+        """Write a blob file atomically."""
+        path = self._path(digest)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(temp_path, "wb") as f:
+            f.write(zlib.compress(body.encode("utf-8"), self.compression_level))
+        os.replace(temp_path, path)
+
+    def acquire(self, counts: Counter, bodies: Dict[str, str]) -> None:
+        """Add references to blobs, storing the bodies of blobs not stored yet.
+
+        Args:
+            counts: Number of references to add per digest
+            bodies: Body of every digest in ``counts`` that may not be stored yet
+
+        Raises:
+            KeyError: If a digest is neither stored nor in ``bodies``
+        """
+        if not counts:
+            return
+        with self._transaction() as conn:
+            for digest, count in counts.items():
+                row = conn.execute("SELECT size FROM blob_refs WHERE digest = ?", (digest,)).fetchone()
+                if row is None or not self._path(digest).exists():
+                    self._write(digest, bodies[digest])
+                size = row[0] if row is not None else len(bodies[digest].encode("utf-8"))
+                conn.execute(
+                    "INSERT INTO blob_refs (digest, refcount, size) VALUES (?, ?, ?) "
+                    "ON CONFLICT (digest) DO UPDATE SET refcount = refcount + excluded.refcount",
+                    (digest, count, size),
+                )
+
+    def release(self, counts: Counter) -> int:
+        """Drop references to blobs, deleting blobs left unreferenced.
+
+        Args:
+            counts: Number of references to drop per digest
+
+        Returns:
+            Number of blobs deleted
+        """
+        if not counts:
+            return 0
+        deleted = 0
+        with self._transaction() as conn:
+            for digest, count in counts.items():
+                conn.execute("UPDATE blob_refs SET refcount = refcount - ? WHERE digest = ?", (count, digest))
+                row = conn.execute("SELECT refcount FROM blob_refs WHERE digest = ?", (digest,)).fetchone()
+                if row is not None and row[0] <= 0:
+                    conn.execute("DELETE FROM blob_refs WHERE digest = ?", (digest,))
+                    self._path(digest).unlink(missing_ok=True)
+                    deleted += 1
+        return deleted
+
+    def collect(self) -> int:
+        """Delete blob files that no reference count accounts for.
+
+        Such files are only left behind by writers that crashed between
+        writing a blob and committing its reference.
+
+        Returns:
+            Number of files deleted
+        """
+        deleted = 0
+        with self._transaction() as conn:
+            live = {row[0] for row in conn.execute("SELECT digest FROM blob_refs")}
+            for shard in self.root.iterdir():
+                if not shard.is_dir():
+                    continue
+                for path in shard.iterdir():
+                    if shard.name + path.name not in live:
+                        path.unlink(missing_ok=True)
+                        deleted += 1
+        if deleted:
+            logger.info("Unreferenced blobs collected", count=deleted)
+        return deleted
+
+    def stats(self) -> Dict[str, int]:
+        """Get the number of blobs, references to them and uncompressed bytes stored."""
+        row = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(refcount), 0), COALESCE(SUM(size), 0) FROM blob_refs"
+        ).fetchone()
+        return {"blobs": row[0], "references": row[1], "bytes": row[2]}
+
+    def clear(self) -> None:
+        """Delete every blob and reference count."""
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM blob_refs")
+            for shard in self.root.iterdir():
+                if shard.is_dir():
+                    for path in shard.iterdir():
+                        path.unlink(missing_ok=True)
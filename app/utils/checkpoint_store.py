@@ -0,0 +1,566 @@
+"""
+SQLite-backed LangGraph checkpoint storage.
+
+Persists graph checkpoints so a conversation's workflow state survives
+restarts and resuming a session is a checkpoint lookup. Channel values are
+stored per channel version, so a checkpoint only writes the channels that
+changed since its parent. Both savers can keep only the newest checkpoints
+of each thread, so checkpoint storage grows with the number of threads
+rather than the number of turns.
+"""
+
+import asyncio
+import random
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Sequence
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+    writes_sort_key,
+)
+from langgraph.checkpoint.memory import InMemorySaver
+
+from app.config.app_config import AppConfigLoader
+from app.utils.conversation_store import STORAGE_DIR
+from app.utils.sqlite_wal import enable_wal
+
+CHECKPOINT_DIRNAME = ".checkpoints"
+CHECKPOINT_DB_FILENAME = "checkpoints.sqlite3"
+
+# Bytes the write-ahead log is truncated to after a checkpoint
+WAL_SIZE_LIMIT = 1024 * 1024
+
+# Checkpoints alist fetches per executor call
+LIST_PAGE_SIZE = 64
+
+CHECKPOINT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT NOT NULL,
+    checkpoint BLOB NOT NULL,
+    metadata_type TEXT NOT NULL,
+    metadata BLOB NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS checkpoint_blobs (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    channel TEXT NOT NULL,
+    version TEXT NOT NULL,
+    type TEXT NOT NULL,
+    blob BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS checkpoint_writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT NOT NULL,
+    value BLOB,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+) WITHOUT ROWID;
+"""
+
+
+class SQLiteCheckpointSaver(BaseCheckpointSaver[str]):
+    """LangGraph checkpoint saver persisting to a local SQLite database.
+
+    Follows the layout of ``InMemorySaver``: checkpoints without their
+    channel values, one row per (channel, version) blob and the pending
+    writes of each checkpoint. Each thread gets its own connection and
+    writes run in ``BEGIN IMMEDIATE`` transactions, so several processes
+    can share the database. With ``keep_checkpoints`` set, saving a
+    checkpoint deletes all but the newest ``keep_checkpoints`` of its
+    thread in the same transaction. The async methods run the sync ones on
+    the saver's own executor of ``io_workers`` threads, so checkpoint I/O
+    does not queue behind conversation store calls.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[Path] = None,
+        busy_timeout: float = 30.0,
+        fsync: bool = False,
+        keep_checkpoints: int = 0,
+        io_workers: Optional[int] = None,
+    ) -> None:
+        super().__init__()
+        self.db_path = db_path or STORAGE_DIR / CHECKPOINT_DIRNAME / CHECKPOINT_DB_FILENAME
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.busy_timeout = busy_timeout
+        self.fsync = fsync
+        self.keep_checkpoints = keep_checkpoints
+        self._executor = ThreadPoolExecutor(
+            max_workers=io_workers or AppConfigLoader.app_config().storage.io_workers,
+            thread_name_prefix="checkpoint-io",
+        )
+        self._local = threading.local()
+        self._connection().executescript(CHECKPOINT_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get the connection for the current thread, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout, isolation_level=None)
+            enable_wal(conn, self.busy_timeout)
+            conn.execute("PRAGMA synchronous=FULL" if self.fsync else "PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA journal_size_limit={WAL_SIZE_LIMIT}")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run a write transaction on the current thread's connection."""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _load_tuple(
+        self,
+        conn: sqlite3.Connection,
+        thread_id: str,
+        checkpoint_ns: str,
+        row: tuple,
+        metadata: Optional[CheckpointMetadata] = None,
+    ) -> CheckpointTuple:
+        """Build a checkpoint tuple from a checkpoints row of (id, parent id, type, checkpoint, metadata type, metadata)."""
+        checkpoint_id, parent_checkpoint_id, type_, payload, metadata_type, metadata_payload = row
+        checkpoint = self.serde.loads_typed((type_, payload))
+
+        channel_values: Dict[str, Any] = {}
+        for channel, version in checkpoint["channel_versions"].items():
+            blob = conn.execute(
+                "SELECT type, blob FROM checkpoint_blobs "
+                "WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                (thread_id, checkpoint_ns, channel, str(version)),
+            ).fetchone()
+            if blob is not None and blob[0] != "empty":
+                channel_values[channel] = self.serde.loads_typed((blob[0], blob[1]))
+
+        writes = conn.execute(
+            "SELECT task_id, idx, channel, type, value, task_path FROM checkpoint_writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+        writes.sort(key=lambda w: writes_sort_key(w[5], w[0], w[1]))
+
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint={**checkpoint, "channel_values": channel_values},
+            metadata=metadata if metadata is not None else self.serde.loads_typed((metadata_type, metadata_payload)),
+            pending_writes=[(w[0], w[2], self.serde.loads_typed((w[3], w[4]))) for w in writes],
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_checkpoint_id,
+                    }
+                }
+                if parent_checkpoint_id
+                else None
+            ),
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """Get the checkpoint named by ``config``, or the thread's latest if it names none."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        conn = self._connection()
+        columns = "checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata"
+        if checkpoint_id := get_checkpoint_id(config):
+            row = conn.execute(
+                f"SELECT {columns} FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                (thread_id, checkpoint_ns, checkpoint_id),
+            ).fetchone()
+        else:
+            row = conn.execute(
+                f"SELECT {columns} FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                "ORDER BY checkpoint_id DESC LIMIT 1",
+                (thread_id, checkpoint_ns),
+            ).fetchone()
+        if row is None:
+            return None
+        return self._load_tuple(conn, thread_id, checkpoint_ns, row)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        """List checkpoints, newest first.
+
+        Args:
+            config: Restrict to a thread, and optionally a namespace and checkpoint
+            filter: Metadata key/value pairs the checkpoints must match
+            before: Only list checkpoints older than this one
+            limit: Maximum number of checkpoints to list
+        """
+        clauses, params = [], []
+        if config is not None:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before is not None and (before_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_id)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        order = "ORDER BY checkpoint_id DESC"
+        if limit is not None and not filter:
+            # Without a filter every row is returned, so SQL can stop early
+            order += " LIMIT ?"
+            params.append(max(limit, 0))
+
+        conn = self._connection()
+        rows = conn.execute(
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, "
+            f"metadata_type, metadata FROM checkpoints {where} {order}",
+            params,
+        )
+        for row in rows:
+            if limit is not None and limit <= 0:
+                break
+            metadata = self.serde.loads_typed((row[6], row[7]))
+            if filter and not all(metadata.get(key) == value for key, value in filter.items()):
+                continue
+            if limit is not None:
+                limit -= 1
+            yield self._load_tuple(conn, row[0], row[1], row[2:], metadata)
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Save a checkpoint and the values of the channels that changed in it.
+
+        Returns:
+            Config naming the saved checkpoint
+        """
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        stored = checkpoint.copy()
+        values = stored.pop("channel_values")
+        type_, payload = self.serde.dumps_typed(stored)
+        metadata_type, metadata_payload = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO checkpoint_blobs (thread_id, checkpoint_ns, channel, version, type, blob) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    (thread_id, checkpoint_ns, channel, str(version))
+                    + (self.serde.dumps_typed(values[channel]) if channel in values else ("empty", None))
+                    for channel, version in new_versions.items()
+                ),
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, "
+                "type, checkpoint, metadata_type, metadata) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id,
+                    checkpoint_ns,
+                    checkpoint["id"],
+                    config["configurable"].get("checkpoint_id"),
+                    type_,
+                    payload,
+                    metadata_type,
+                    metadata_payload,
+                ),
+            )
+            if self.keep_checkpoints > 0:
+                self._prune(conn, thread_id, checkpoint_ns, self.keep_checkpoints)
+
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Save the writes a task made on top of a checkpoint.
+
+        Regular writes already saved for a task are kept; special writes
+        such as errors and interrupts replace earlier ones.
+        """
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        replace = all(channel in WRITES_IDX_MAP for channel, _ in writes)
+
+        with self._transaction() as conn:
+            conn.executemany(
+                f"INSERT OR {'REPLACE' if replace else 'IGNORE'} INTO checkpoint_writes "
+                "(thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, type, value, task_path) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (thread_id, checkpoint_ns, checkpoint_id, task_id, WRITES_IDX_MAP.get(channel, idx), channel)
+                    + self.serde.dumps_typed(value)
+                    + (task_path,)
+                    for idx, (channel, value) in enumerate(writes)
+                ),
+            )
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Delete every checkpoint, blob and write of a thread."""
+        with self._transaction() as conn:
+            for table in ("checkpoints", "checkpoint_blobs", "checkpoint_writes"):
+                conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+
+    def _prune(self, conn: sqlite3.Connection, thread_id: str, checkpoint_ns: str, keep: int) -> int:
+        """Delete all but the newest ``keep`` checkpoints of a thread namespace.
+
+        Writes of deleted checkpoints and blobs no kept checkpoint refers to
+        go with them. Must run inside a transaction on ``conn``.
+
+        Returns:
+            Number of checkpoints deleted
+        """
+        rows = conn.execute(
+            "SELECT checkpoint_id, type, checkpoint FROM checkpoints "
+            "WHERE thread_id = ? AND checkpoint_ns = ? ORDER BY checkpoint_id DESC",
+            (thread_id, checkpoint_ns),
+        ).fetchall()
+        stale = [(thread_id, checkpoint_ns, row[0]) for row in rows[keep:]]
+        if not stale:
+            return 0
+
+        live = set()
+        for _, type_, payload in rows[:keep]:
+            versions = self.serde.loads_typed((type_, payload))["channel_versions"]
+            live.update((channel, str(version)) for channel, version in versions.items())
+        conn.executemany(
+            "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+            stale,
+        )
+        conn.execute(
+            "DELETE FROM checkpoint_writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id NOT IN "
+            "(SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?)",
+            (thread_id, checkpoint_ns, thread_id, checkpoint_ns),
+        )
+        blobs = conn.execute(
+            "SELECT channel, version FROM checkpoint_blobs WHERE thread_id = ? AND checkpoint_ns = ?",
+            (thread_id, checkpoint_ns),
+        ).fetchall()
+        conn.executemany(
+            "DELETE FROM checkpoint_blobs WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+            ((thread_id, checkpoint_ns, channel, version) for channel, version in blobs if (channel, version) not in live),
+        )
+        return len(stale)
+
+    def prune(self, thread_ids: Sequence[str], *, strategy: str = "keep_latest") -> None:
+        """Prune the checkpoints of threads.
+
+        Args:
+            thread_ids: Threads to prune
+            strategy: 'keep_latest' keeps the newest checkpoint of each
+                namespace, 'delete' deletes the threads
+        """
+        if strategy not in ("keep_latest", "delete"):
+            raise ValueError(f"Unknown prune strategy: {strategy}")
+        for thread_id in thread_ids:
+            if strategy == "delete":
+                self.delete_thread(thread_id)
+                continue
+            with self._transaction() as conn:
+                namespaces = conn.execute(
+                    "SELECT DISTINCT checkpoint_ns FROM checkpoints WHERE thread_id = ?", (thread_id,)
+                ).fetchall()
+                for (checkpoint_ns,) in namespaces:
+                    self._prune(conn, thread_id, checkpoint_ns, 1)
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        """Get a channel version that sorts after ``current``, as ``InMemorySaver`` does."""
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    async def _run_io(self, func: Any, *args: Any, **kwargs: Any) -> Any:
+        """Run a blocking method on the saver's executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: func(*args, **kwargs))
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await self._run_io(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        # Fetched a page at a time, since the sync iterator is tied to the
+        # connection of the executor thread it started on
+        while limit is None or limit > 0:
+            page_size = LIST_PAGE_SIZE if limit is None else min(limit, LIST_PAGE_SIZE)
+            page = await self._run_io(lambda: list(self.list(config, filter=filter, before=before, limit=page_size)))
+            for checkpoint_tuple in page:
+                yield checkpoint_tuple
+            if len(page) < page_size:
+                break
+            before = page[-1].config
+            if limit is not None:
+                limit -= len(page)
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await self._run_io(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await self._run_io(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await self._run_io(self.delete_thread, thread_id)
+
+    async def aprune(self, thread_ids: Sequence[str], *, strategy: str = "keep_latest") -> None:
+        await self._run_io(self.prune, thread_ids, strategy=strategy)
+
+
+class BoundedMemorySaver(InMemorySaver):
+    """``InMemorySaver`` that keeps only the newest checkpoints of each thread.
+
+    Saving a checkpoint drops all but the newest ``keep_checkpoints`` of its
+    thread namespace, with their writes and the channel values only they
+    referred to.
+    """
+
+    def __init__(self, keep_checkpoints: int = 1) -> None:
+        super().__init__()
+        self.keep_checkpoints = keep_checkpoints
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        next_config = super().put(config, checkpoint, metadata, new_versions)
+        if self.keep_checkpoints > 0:
+            self._prune(next_config["configurable"]["thread_id"], next_config["configurable"]["checkpoint_ns"])
+        return next_config
+
+    def _prune(self, thread_id: str, checkpoint_ns: str) -> None:
+        """Drop all but the newest ``keep_checkpoints`` checkpoints of a thread namespace."""
+        checkpoints = self.storage[thread_id][checkpoint_ns]
+        if len(checkpoints) <= self.keep_checkpoints:
+            return
+        ordered = sorted(checkpoints)
+        live = set()
+        for checkpoint_id in ordered[-self.keep_checkpoints:]:
+            live.update(self.serde.loads_typed(checkpoints[checkpoint_id][0])["channel_versions"].items())
+        for checkpoint_id in ordered[:-self.keep_checkpoints]:
+            versions = self.serde.loads_typed(checkpoints.pop(checkpoint_id)[0])["channel_versions"]
+            self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+            for channel, version in versions.items():
+                if (channel, version) not in live:
+                    self.blobs.pop((thread_id, checkpoint_ns, channel, version), None)
+
+
+_checkpointer: Optional[BaseCheckpointSaver] = None
+_checkpointer_lock = threading.Lock()
+
+
+def create_checkpointer(backend: Optional[str] = None, storage_dir: Optional[Path] = None) -> BaseCheckpointSaver:
+    """Create a checkpoint saver for the configured backend.
+
+    Args:
+        backend: 'sqlite' or 'memory', defaults to the configured checkpointer
+        storage_dir: Storage location, defaults to the configured directory
+
+    Returns:
+        A new checkpoint saver
+    """
+    config = AppConfigLoader.app_config().storage
+    backend = backend or config.checkpointer
+    if storage_dir is None and config.storage_dir:
+        storage_dir = Path(config.storage_dir)
+
+    if backend == "sqlite":
+        return SQLiteCheckpointSaver(
+            (storage_dir or STORAGE_DIR) / CHECKPOINT_DIRNAME / CHECKPOINT_DB_FILENAME,
+            fsync=config.fsync,
+            keep_checkpoints=config.checkpoint_history,
+        )
+    if backend == "memory":
+        if config.checkpoint_history > 0:
+            return BoundedMemorySaver(config.checkpoint_history)
+        return InMemorySaver()
+    raise ValueError(f"Unknown checkpointer backend: {backend}")
+
+
+def get_checkpointer() -> BaseCheckpointSaver:
+    """Get the global checkpoint saver instance."""
+    global _checkpointer
+    with _checkpointer_lock:
+        if _checkpointer is None:
+            _checkpointer = create_checkpointer()
+        return _checkpointer
@@ -0,0 +1,112 @@
+"""
+In-process cache for loaded conversations.
+
+Keeps recently used conversation records in memory so repeated reads of the
+same conversation, within a turn or across turns, do not re-read and
+re-parse its file.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+def copy_conversation(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy a conversation record deeply enough that callers can extend it.
+
+    The messages list and metadata dict are copied; the message dicts
+    themselves are shared and must not be mutated.
+    """
+    copied = dict(data)
+    copied["messages"] = list(data.get("messages", []))
+    copied["metadata"] = dict(data.get("metadata") or {})
+    return copied
+
+
+class ConversationCache:
+    """Bounded LRU cache of conversation records.
+
+    Each entry is stored with a signature of the file it was read from
+    (for example its mtime and size) and is only returned while the caller
+    presents the same signature, so a file changed by another writer is
+    re-read. Entries are evicted least recently used first once either
+    ``max_entries`` or ``max_bytes`` is exceeded.
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 64 * 1024 * 1024) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._bytes = 0
+        self._entries: "OrderedDict[str, Tuple[Hashable, Dict[str, Any], int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, conversation_id: str, signature: Hashable) -> Optional[Dict[str, Any]]:
+        """Get a copy of a cached conversation if its signature still matches.
+
+        Args:
+            conversation_id: Unique identifier for the conversation
+            signature: Current signature of the conversation's storage
+
+        Returns:
+            Conversation data or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(conversation_id)
+            if entry is None or entry[0] != signature:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(conversation_id)
+            self.hits += 1
+            return copy_conversation(entry[1])
+
+    def put(self, conversation_id: str, signature: Hashable, data: Dict[str, Any], size: int) -> None:
+        """Cache a conversation record.
+
+        Args:
+            conversation_id: Unique identifier for the conversation
+            signature: Signature of the storage the record matches
+            data: Conversation record; a copy is stored
+            size: Approximate size of the record in bytes
+        """
+        if size > self.max_bytes or self.max_entries <= 0:
+            self.invalidate(conversation_id)
+            return
+
+        with self._lock:
+            previous = self._entries.pop(conversation_id, None)
+            if previous is not None:
+                self._bytes -= previous[2]
+            self._entries[conversation_id] = (signature, copy_conversation(data), size)
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def invalidate(self, conversation_id: str) -> None:
+        """Drop a conversation from the cache."""
+        with self._lock:
+            entry = self._entries.pop(conversation_id, None)
+            if entry is not None:
+                self._bytes -= entry[2]
+
+    def clear(self) -> None:
+        """Drop every cached conversation."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Get cache occupancy and hit/miss counters."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,82 @@
+"""
+Conversation identifiers and storage partitions.
+
+Conversation IDs embed their UTC creation time with millisecond precision
+followed by a random suffix, so they sort lexicographically in creation
+order and name the date partition a conversation is stored in.
+"""
+
+import hashlib
+import os
+import re
+from datetime import datetime, timezone
+from pathlib import PurePosixPath
+from typing import Optional
+
+CONVERSATION_ID_PREFIX = "exam_helper_session_"
+
+_TIMESTAMP_FORMAT = "%Y%m%d%H%M%S"
+_ID_PATTERN = re.compile(r"_(\d{14})(\d{3})_[0-9a-f]{8}$")
+_SAFE_ID_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_-]{0,127}$")
+
+
+def generate_conversation_id(now: Optional[datetime] = None) -> str:
+    """Generate a new time-ordered conversation ID.
+
+    Args:
+        now: Creation time, defaults to the current time
+
+    Returns:
+        An ID such as ``exam_helper_session_20260117093012345_9f2c4a1b``
+    """
+    now = (now or datetime.now(timezone.utc)).astimezone(timezone.utc)
+    millis = now.microsecond // 1000
+    return f"{CONVERSATION_ID_PREFIX}{now.strftime(_TIMESTAMP_FORMAT)}{millis:03d}_{os.urandom(4).hex()}"
+
+
+def is_valid_conversation_id(conversation_id: str) -> bool:
+    """Check that a conversation ID is safe to name files and directories after.
+
+    IDs received from clients must pass this before they reach a store.
+    """
+    return bool(_SAFE_ID_PATTERN.match(conversation_id))
+
+
+def conversation_created_at(conversation_id: str) -> Optional[datetime]:
+    """Get the UTC creation time embedded in a conversation ID.
+
+    Returns:
+        The creation time, or None for IDs that do not embed one
+    """
+    match = _ID_PATTERN.search(conversation_id)
+    if not match:
+        return None
+    created = datetime.strptime(match.group(1), _TIMESTAMP_FORMAT).replace(tzinfo=timezone.utc)
+    return created.replace(microsecond=int(match.group(2)) * 1000)
+
+
+def shard_for(conversation_id: str, layout: str) -> PurePosixPath:
+    """Get the directory, relative to the storage root, a conversation is stored in.
+
+    Args:
+        conversation_id: Unique identifier for the conversation
+        layout: 'flat' for the storage root, 'hash' for a two-hex-digit hash
+            prefix directory, or 'date' for YYYY/MM/DD partitions by creation
+            date (IDs without an embedded time fall back to a hash prefix
+            under 'undated')
+
+    Returns:
+        Relative directory path
+    """
+    if layout == "flat":
+        return PurePosixPath()
+
+    digest = hashlib.sha1(conversation_id.encode("utf-8")).hexdigest()[:2]
+    if layout == "hash":
+        return PurePosixPath(digest)
+    if layout == "date":
+        created = conversation_created_at(conversation_id)
+        if created is None:
+            return PurePosixPath("undated", digest)
+        return PurePosixPath(f"{created.year:04d}", f"{created.month:02d}", f"{created.day:02d}")
+    raise ValueError(f"Unknown shard layout: {layout}")
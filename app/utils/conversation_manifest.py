@@ -0,0 +1,167 @@
+"""
+Summary index for file-based conversation stores.
+
+Keeps an id -> (created_at, updated_at, message_count, intent) header for
+every stored conversation so listings do not have to parse conversation
+files. The manifest lives in its own subdirectory so that writing it does
+not change the modification time of the conversation directories, which is
+what tells a store that files were added or removed behind its back.
+Files changed in place, such as journals appended to, are found by
+comparing each entry's recorded mtime with its file's.
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Set, Tuple
+
+import structlog
+
+from app.utils.file_lock import FileLock
+
+logger = structlog.get_logger(__name__)
+
+MANIFEST_DIRNAME = ".index"
+MANIFEST_FILENAME = "manifest.json"
+MANIFEST_LOCK_FILENAME = "manifest.lock"
+
+
+def summarize_conversation(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the manifest header for a conversation record."""
+    metadata = data.get("metadata") or {}
+    return {
+        "conversation_id": data.get("conversation_id"),
+        "created_at": data.get("created_at"),
+        "updated_at": data.get("updated_at"),
+        "message_count": data.get("message_count", len(data.get("messages", []))),
+        "intent": metadata.get("user_intent"),
+        "version": data.get("version", 0),
+    }
+
+
+class ConversationManifest:
+    """Persistent id -> summary index for the files of a conversation store.
+
+    Each entry also records the file it was built from, as a path relative
+    to the storage root, and that file's mtime, and ``dir_mtimes`` records
+    the mtime of every directory as of its last scan, so a store can rebuild
+    stale entries incrementally by listing only directories and re-reading
+    only files that changed. Updates are kept in memory and persisted every
+    ``flush_every`` changes; a lost tail of updates is recovered by the
+    incremental rebuild.
+
+    Several processes may share a manifest. Each flush merges the entries
+    this process changed into the manifest on disk under a file lock, and
+    picks up the entries the others changed.
+    """
+
+    def __init__(self, storage_dir: Path, flush_every: int = 32) -> None:
+        self.path = storage_dir / MANIFEST_DIRNAME / MANIFEST_FILENAME
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_every = flush_every
+        self.dir_mtimes: Dict[str, int] = {}
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._dirty = 0
+        # Conversations updated or removed here since the last flush, and
+        # whether every entry was dropped, which the flush applies on disk
+        self._changed: Set[str] = set()
+        self._removed: Set[str] = set()
+        self._cleared = False
+        self._lock = threading.RLock()
+        self._file_lock = FileLock(self.path.with_name(MANIFEST_LOCK_FILENAME))
+        self._entries, self.dir_mtimes = self._load()
+
+    def _load(self) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, int]]:
+        """Read the persisted entries and directory mtimes, empty if missing or corrupt."""
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            return data.get("entries", {}), data.get("dir_mtimes", {})
+        except FileNotFoundError:
+            pass
+        except (json.JSONDecodeError, IOError) as e:
+            logger.warning("Discarding unreadable conversation manifest", error=str(e))
+        return {}, {}
+
+    def flush(self) -> None:
+        """Merge unsaved changes into the persisted manifest.
+
+        Entries this process changed or removed since the last flush win
+        over the persisted ones; the others are taken from disk. Only
+        directory mtimes that this process recorded, and that the persisted
+        manifest does not contradict, are kept; any other directory is
+        rescanned by the next refresh.
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+            with self._file_lock:
+                entries, dir_mtimes = ({}, {}) if self._cleared else self._load()
+                for conversation_id in self._removed:
+                    entries.pop(conversation_id, None)
+                for conversation_id in self._changed:
+                    entries[conversation_id] = self._entries[conversation_id]
+                dir_mtimes = {
+                    key: mtime_ns for key, mtime_ns in self.dir_mtimes.items() if dir_mtimes.get(key, mtime_ns) == mtime_ns
+                }
+
+                tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+                with open(tmp_path, "w") as f:
+                    json.dump({"dir_mtimes": dir_mtimes, "entries": entries}, f, separators=(",", ":"))
+                os.replace(tmp_path, self.path)
+
+            self._entries, self.dir_mtimes = entries, dir_mtimes
+            self._changed.clear()
+            self._removed.clear()
+            self._cleared = False
+            self._dirty = 0
+
+    def mark_dirty(self) -> None:
+        """Note an unsaved change, persisting once ``flush_every`` have accumulated."""
+        with self._lock:
+            self._dirty += 1
+            if self._dirty >= self.flush_every:
+                self.flush()
+
+    def get(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """Get the manifest entry for a conversation."""
+        return self._entries.get(conversation_id)
+
+    def update(self, summary: Dict[str, Any], file_name: str, mtime_ns: int) -> None:
+        """Record the summary of a conversation and the file it was read from."""
+        with self._lock:
+            self._entries[summary["conversation_id"]] = {**summary, "file": file_name, "mtime_ns": mtime_ns}
+            self._changed.add(summary["conversation_id"])
+            self._removed.discard(summary["conversation_id"])
+            self.mark_dirty()
+
+    def remove(self, conversation_id: str, file_name: Optional[str] = None) -> None:
+        """Forget a conversation.
+
+        Args:
+            conversation_id: Unique identifier for the conversation
+            file_name: Only forget it if its entry was built from this file
+        """
+        with self._lock:
+            entry = self._entries.get(conversation_id)
+            if entry is None or (file_name is not None and entry["file"] != file_name):
+                return
+            del self._entries[conversation_id]
+            self._removed.add(conversation_id)
+            self._changed.discard(conversation_id)
+            self.mark_dirty()
+
+    def clear(self) -> None:
+        """Forget every conversation."""
+        with self._lock:
+            self._entries.clear()
+            self._changed.clear()
+            self._removed.clear()
+            self._cleared = True
+            self.mark_dirty()
+
+    def files(self) -> Dict[str, Dict[str, Any]]:
+        """Get the entries keyed by the file they were built from."""
+        with self._lock:
+            return {entry["file"]: entry for entry in self._entries.values()}
@@ -0,0 +1,327 @@
+"""
+Bulk migration of conversations between storage backends.
+
+Streams conversation IDs from the source store in cursor-ordered batches
+and copies each batch in a worker process with ``import_conversation``, so
+timestamps and versions are kept and memory use does not grow with the
+size of the store. Progress is checkpointed after every batch, and a
+verification pass compares counts and per-conversation checksums. The
+archive tier is not migrated.
+
+Usage:
+    python -m app.utils.conversation_migration --source-backend json --target-backend sqlite \\
+        [--source-dir DIR] [--target-dir DIR] [--workers 4] [--batch-size 200] [--checkpoint FILE]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import structlog
+
+from app.utils.blob_store import BLOB_REF_KEY
+from app.utils.conversation_store import BaseConversationStore, atomic_write, create_conversation_store
+
+logger = structlog.get_logger(__name__)
+
+# (backend, storage directory) of a store, picklable for worker processes
+StoreSpec = Tuple[str, Optional[str]]
+
+_worker_stores: Dict[StoreSpec, BaseConversationStore] = {}
+
+
+def _open_store(spec: StoreSpec) -> BaseConversationStore:
+    """Get this process's store for a spec, opening it on first use."""
+    store = _worker_stores.get(spec)
+    if store is None:
+        backend, storage_dir = spec
+        store = create_conversation_store(
+            backend,
+            Path(storage_dir) if storage_dir else None,
+            write_behind=False,
+            tiered=False,
+        )
+        _worker_stores[spec] = store
+    return store
+
+
+def portable_record(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Strip backend-specific fields from a loaded conversation record."""
+    return {
+        "conversation_id": data["conversation_id"],
+        "created_at": data.get("created_at"),
+        "updated_at": data.get("updated_at"),
+        "version": data.get("version", 0),
+        "messages": [
+            {k: v for k, v in message.items() if k != BLOB_REF_KEY}
+            for message in data.get("messages", [])
+        ],
+        "metadata": data.get("metadata") or {},
+    }
+
+
+def conversation_checksum(data: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Get the SHA-256 of a conversation's portable record, or None if it does not exist."""
+    if data is None:
+        return None
+    payload = json.dumps(portable_record(data), sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _combine(total: str, checksum: str) -> str:
+    """Fold a conversation checksum into an order-independent aggregate."""
+    return f"{int(total, 16) ^ int(checksum, 16):064x}"
+
+
+def migrate_batch(source: StoreSpec, target: StoreSpec, conversation_ids: List[str]) -> Dict[str, Any]:
+    """Copy a batch of conversations from one store to another.
+
+    Runs in a worker process. Each conversation is read back from the
+    target and compared with the source record.
+
+    Returns:
+        Dict with the number of conversations ``migrated``, their combined
+        ``checksum`` and the IDs that ``failed``
+    """
+    source_store = _open_store(source)
+    target_store = _open_store(target)
+    result: Dict[str, Any] = {"migrated": 0, "checksum": "0" * 64, "failed": []}
+
+    for conversation_id in conversation_ids:
+        try:
+            data = source_store.load_conversation(conversation_id)
+            if data is None:
+                continue
+            record = portable_record(data)
+            target_store.import_conversation(record)
+            checksum = conversation_checksum(record)
+            if conversation_checksum(target_store.load_conversation(conversation_id)) != checksum:
+                raise ValueError("Checksum mismatch after import")
+        except Exception as e:
+            logger.error("Failed to migrate conversation", conversation_id=conversation_id, error=str(e))
+            result["failed"].append(conversation_id)
+            continue
+        result["migrated"] += 1
+        result["checksum"] = _combine(result["checksum"], checksum)
+
+    return result
+
+
+def verify_batch(source: StoreSpec, target: StoreSpec, conversation_ids: List[str]) -> Dict[str, Any]:
+    """Compare a batch of conversations between two stores.
+
+    Returns:
+        Dict with the number of conversations ``checked``, their combined
+        source ``checksum`` and the IDs that are ``missing`` from the target
+        or ``mismatched``
+    """
+    source_store = _open_store(source)
+    target_store = _open_store(target)
+    result: Dict[str, Any] = {"checked": 0, "checksum": "0" * 64, "missing": [], "mismatched": []}
+
+    for conversation_id in conversation_ids:
+        checksum = conversation_checksum(source_store.load_conversation(conversation_id))
+        if checksum is None:
+            continue
+        target_checksum = conversation_checksum(target_store.load_conversation(conversation_id))
+        result["checked"] += 1
+        result["checksum"] = _combine(result["checksum"], checksum)
+        if target_checksum is None:
+            result["missing"].append(conversation_id)
+        elif target_checksum != checksum:
+            result["mismatched"].append(conversation_id)
+
+    return result
+
+
+class ConversationMigration:
+    """Resumable, parallel copy of every conversation in one store to another.
+
+    Batches are dispatched to ``workers`` processes with at most two
+    batches per worker in flight. The checkpoint records the cursor of the
+    last batch before which every batch has completed, so a restarted
+    migration re-copies at most the batches that were in flight.
+    """
+
+    def __init__(
+        self,
+        source: StoreSpec,
+        target: StoreSpec,
+        workers: int = 4,
+        batch_size: int = 200,
+        checkpoint_path: Optional[Path] = None,
+    ) -> None:
+        self.source = source
+        self.target = target
+        self.workers = workers
+        self.batch_size = batch_size
+        self.checkpoint_path = checkpoint_path
+
+    def _load_checkpoint(self) -> Dict[str, Any]:
+        """Load the checkpoint of an interrupted run of this migration, or start afresh."""
+        fresh = {
+            "source": list(self.source),
+            "target": list(self.target),
+            "cursor": None,
+            "migrated": 0,
+            "checksum": "0" * 64,
+            "failed": [],
+            "done": False,
+        }
+        if self.checkpoint_path is None or not self.checkpoint_path.exists():
+            return fresh
+        with open(self.checkpoint_path, "r") as f:
+            checkpoint = json.load(f)
+        if checkpoint.get("source") != fresh["source"] or checkpoint.get("target") != fresh["target"]:
+            raise ValueError(f"Checkpoint {self.checkpoint_path} belongs to a different migration")
+        logger.info("Resuming migration", cursor=checkpoint["cursor"], migrated=checkpoint["migrated"])
+        return checkpoint
+
+    def _save_checkpoint(self, checkpoint: Dict[str, Any]) -> None:
+        if self.checkpoint_path is not None:
+            atomic_write(self.checkpoint_path, json.dumps(checkpoint).encode("utf-8"))
+
+    def _batches(self, cursor: Optional[str]) -> Iterator[Tuple[List[str], str]]:
+        """Stream conversation IDs after ``cursor`` in batches, with the cursor ending each batch."""
+        batch: List[str] = []
+        for summary in _open_store(self.source).iter_conversations(cursor=cursor):
+            batch.append(summary["conversation_id"])
+            if len(batch) == self.batch_size:
+                yield batch, summary["cursor"]
+                batch = []
+        if batch:
+            yield batch, summary["cursor"]
+
+    def _executor(self) -> Executor:
+        if self.workers > 0:
+            return ProcessPoolExecutor(max_workers=self.workers)
+        return ThreadPoolExecutor(max_workers=1)
+
+    def _run_batches(self, func: Any, cursor: Optional[str], on_done: Any) -> None:
+        """Run ``func`` over every batch after ``cursor``, calling ``on_done`` in batch order."""
+        max_in_flight = max(self.workers, 1) * 2
+        in_flight: List[Tuple[Future, str]] = []
+        batches = self._batches(cursor)
+
+        with self._executor() as executor:
+            exhausted = False
+            while in_flight or not exhausted:
+                while not exhausted and len(in_flight) < max_in_flight:
+                    try:
+                        batch, batch_cursor = next(batches)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    in_flight.append((executor.submit(func, self.source, self.target, batch), batch_cursor))
+
+                if in_flight:
+                    wait([future for future, _ in in_flight], return_when=FIRST_COMPLETED)
+                while in_flight and in_flight[0][0].done():
+                    future, batch_cursor = in_flight.pop(0)
+                    on_done(future.result(), batch_cursor)
+
+    def migrate(self) -> Dict[str, Any]:
+        """Copy every conversation not covered by the checkpoint.
+
+        Returns:
+            The final checkpoint: the number of conversations ``migrated``,
+            their combined ``checksum`` and the IDs that ``failed``
+        """
+        checkpoint = self._load_checkpoint()
+        if checkpoint["done"]:
+            return checkpoint
+
+        def on_done(result: Dict[str, Any], batch_cursor: str) -> None:
+            checkpoint["cursor"] = batch_cursor
+            checkpoint["migrated"] += result["migrated"]
+            checkpoint["checksum"] = _combine(checkpoint["checksum"], result["checksum"])
+            checkpoint["failed"].extend(result["failed"])
+            self._save_checkpoint(checkpoint)
+            logger.info("Migration progress", migrated=checkpoint["migrated"], failed=len(checkpoint["failed"]))
+
+        self._run_batches(migrate_batch, checkpoint["cursor"], on_done)
+        checkpoint["done"] = True
+        self._save_checkpoint(checkpoint)
+        return checkpoint
+
+    def verify(self) -> Dict[str, Any]:
+        """Compare every conversation in the source store with its copy in the target.
+
+        Conversations changed in the source after they were copied show up
+        as mismatched; run ``catch_up`` to copy them again.
+
+        Returns:
+            Dict with the number of conversations ``checked``, their combined
+            source ``checksum`` and the ``missing`` and ``mismatched`` IDs
+        """
+        report: Dict[str, Any] = {"checked": 0, "checksum": "0" * 64, "missing": [], "mismatched": []}
+
+        def on_done(result: Dict[str, Any], batch_cursor: str) -> None:
+            report["checked"] += result["checked"]
+            report["checksum"] = _combine(report["checksum"], result["checksum"])
+            report["missing"].extend(result["missing"])
+            report["mismatched"].extend(result["mismatched"])
+
+        self._run_batches(verify_batch, None, on_done)
+        return report
+
+    def catch_up(self, conversation_ids: List[str]) -> Dict[str, Any]:
+        """Copy specific conversations again, for example those ``verify`` reported."""
+        result: Dict[str, Any] = {"migrated": 0, "checksum": "0" * 64, "failed": []}
+        for start in range(0, len(conversation_ids), self.batch_size):
+            batch = migrate_batch(self.source, self.target, conversation_ids[start:start + self.batch_size])
+            result["migrated"] += batch["migrated"]
+            result["checksum"] = _combine(result["checksum"], batch["checksum"])
+            result["failed"].extend(batch["failed"])
+        return result
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Migrate conversations between storage backends")
+    parser.add_argument("--source-backend", required=True, choices=["json", "journal", "sqlite"])
+    parser.add_argument("--source-dir", default=None, help="Defaults to the configured storage directory")
+    parser.add_argument("--target-backend", required=True, choices=["json", "journal", "sqlite"])
+    parser.add_argument("--target-dir", default=None, help="Defaults to the configured storage directory")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="0 runs in this process")
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--checkpoint", type=Path, default=None, help="Progress file to resume from")
+    parser.add_argument("--no-verify", action="store_true", help="Skip the verification pass")
+    args = parser.parse_args(argv)
+
+    source = (args.source_backend, str(Path(args.source_dir).resolve()) if args.source_dir else None)
+    target = (args.target_backend, str(Path(args.target_dir).resolve()) if args.target_dir else None)
+    if source == target:
+        parser.error("Source and target are the same store")
+
+    migration = ConversationMigration(
+        source,
+        target,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        checkpoint_path=args.checkpoint,
+    )
+    result = migration.migrate()
+    print(f"Migrated {result['migrated']} conversations, {len(result['failed'])} failed, checksum {result['checksum']}")
+    if args.no_verify:
+        return 1 if result["failed"] else 0
+
+    report = migration.verify()
+    stale = report["missing"] + report["mismatched"]
+    if stale:
+        print(f"Copying {len(stale)} conversations changed during the migration again")
+        migration.catch_up(stale)
+        report = migration.verify()
+
+    print(
+        f"Verified {report['checked']} conversations, checksum {report['checksum']}: "
+        f"{len(report['missing'])} missing, {len(report['mismatched'])} mismatched"
+    )
+    return 1 if report["missing"] or report["mismatched"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
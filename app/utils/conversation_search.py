@@ -0,0 +1,272 @@
+"""
+Full-text search over stored conversations.
+
+Message text is indexed in an SQLite FTS5 table: in the conversations
+database for the SQLite backend, and in a sidecar database next to the
+manifest for the file backends. Each conversation owns a contiguous range
+of index rowids, ``doc_id << 20`` plus the message's position, so adding
+the messages of a save and dropping a conversation are rowid range
+operations rather than scans.
+"""
+
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.utils.sqlite_wal import enable_wal
+
+SEARCH_DB_FILENAME = "search.sqlite3"
+
+# Bytes the write-ahead log is truncated to after a checkpoint
+WAL_SIZE_LIMIT = 1024 * 1024
+
+SEQ_BITS = 20
+MAX_INDEXED_MESSAGES = 1 << SEQ_BITS
+
+SEARCH_SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_documents (
+    doc_id INTEGER PRIMARY KEY,
+    conversation_id TEXT NOT NULL UNIQUE,
+    message_count INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS search_messages USING fts5(
+    content,
+    role UNINDEXED,
+    tokenize = 'porter unicode61'
+);
+
+CREATE TABLE IF NOT EXISTS search_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+SEARCH_QUERY = f"""
+WITH hits AS (
+    SELECT rowid >> {SEQ_BITS} AS doc_id,
+           rowid & {MAX_INDEXED_MESSAGES - 1} AS message_index,
+           role,
+           bm25(search_messages) AS rank,
+           snippet(search_messages, 0, '[', ']', '...', 12) AS snippet
+    FROM search_messages
+    WHERE search_messages MATCH ?
+), ranked AS (
+    SELECT *,
+           ROW_NUMBER() OVER (PARTITION BY doc_id ORDER BY rank) AS position,
+           COUNT(*) OVER (PARTITION BY doc_id) AS matches
+    FROM hits
+)
+SELECT d.conversation_id, r.message_index, r.role, -r.rank AS score, r.snippet, r.matches
+FROM ranked r JOIN search_documents d ON d.doc_id = r.doc_id
+WHERE r.position = 1
+ORDER BY r.rank
+LIMIT ?
+"""
+
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+
+def query_terms(text: str) -> List[str]:
+    """Split free text into lowercase search terms."""
+    return _TERM.findall(text.lower())
+
+
+def fts_query(text: str) -> Optional[str]:
+    """Turn free text into an FTS5 query matching any of its words.
+
+    Returns:
+        The query, or None if the text has no searchable words
+    """
+    terms = [f'"{term}"' for term in query_terms(text)]
+    return " OR ".join(terms) if terms else None
+
+
+def index_messages(
+    conn: sqlite3.Connection,
+    conversation_id: str,
+    messages: List[Dict[str, Any]],
+    start_index: int = 0,
+) -> None:
+    """Bring a conversation's index rows in line with a save.
+
+    Indexed messages before ``start_index`` are kept and everything from
+    ``start_index`` on is re-indexed, since a save may rewrite messages as
+    well as add them. Must run inside a transaction on ``conn``.
+
+    Args:
+        conn: Connection to a database holding ``SEARCH_SCHEMA``
+        conversation_id: Unique identifier for the conversation
+        messages: Message dictionaries from ``start_index`` to the end of the conversation
+        start_index: Index in the conversation of the first message in ``messages``
+
+    Raises:
+        ValueError: If fewer than ``start_index`` messages are indexed
+    """
+    row = conn.execute(
+        "SELECT doc_id, message_count FROM search_documents WHERE conversation_id = ?",
+        (conversation_id,),
+    ).fetchone()
+    if row is None:
+        doc_id = conn.execute(
+            "INSERT INTO search_documents (conversation_id) VALUES (?)",
+            (conversation_id,),
+        ).lastrowid
+        indexed = 0
+    else:
+        doc_id, indexed = row[0], row[1]
+
+    total = min(start_index + len(messages), MAX_INDEXED_MESSAGES)
+    if indexed < start_index:
+        raise ValueError(f"Search index holds {indexed} messages of {conversation_id}, save starts at {start_index}")
+    if start_index < indexed:
+        conn.execute(
+            "DELETE FROM search_messages WHERE rowid >= ? AND rowid < ?",
+            ((doc_id << SEQ_BITS) + start_index, (doc_id + 1) << SEQ_BITS),
+        )
+        indexed = start_index
+
+    conn.executemany(
+        "INSERT INTO search_messages (rowid, content, role) VALUES (?, ?, ?)",
+        (
+            ((doc_id << SEQ_BITS) + seq, str(message.get("content", "")), message.get("role", ""))
+            for seq, message in enumerate(messages[indexed - start_index:total - start_index], start=indexed)
+        ),
+    )
+    conn.execute("UPDATE search_documents SET message_count = ? WHERE doc_id = ?", (total, doc_id))
+
+
+def indexed_count(conn: sqlite3.Connection, conversation_id: str) -> int:
+    """Get the number of messages of a conversation in the index."""
+    row = conn.execute(
+        "SELECT message_count FROM search_documents WHERE conversation_id = ?",
+        (conversation_id,),
+    ).fetchone()
+    return row[0] if row else 0
+
+
+def remove_conversation(conn: sqlite3.Connection, conversation_id: str) -> None:
+    """Drop a conversation from the index. Must run inside a transaction on ``conn``."""
+    row = conn.execute("SELECT doc_id FROM search_documents WHERE conversation_id = ?", (conversation_id,)).fetchone()
+    if row is None:
+        return
+    conn.execute(
+        "DELETE FROM search_messages WHERE rowid >= ? AND rowid < ?",
+        (row[0] << SEQ_BITS, (row[0] + 1) << SEQ_BITS),
+    )
+    conn.execute("DELETE FROM search_documents WHERE doc_id = ?", (row[0],))
+
+
+def clear_index(conn: sqlite3.Connection) -> None:
+    """Drop every conversation from the index. Must run inside a transaction on ``conn``."""
+    conn.execute("DELETE FROM search_messages")
+    conn.execute("DELETE FROM search_documents")
+
+
+def search_index(conn: sqlite3.Connection, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+    """Rank conversations by their best-matching message.
+
+    Args:
+        conn: Connection to a database holding ``SEARCH_SCHEMA``
+        query: Free text; conversations matching any of its words are returned
+        limit: Maximum number of conversations to return
+
+    Returns:
+        Results, best first, with the conversation ID, the index, role and a
+        highlighted snippet of its best-matching message, a relevance
+        ``score`` and the number of matching messages
+    """
+    match = fts_query(query)
+    if match is None:
+        return []
+    rows = conn.execute(SEARCH_QUERY, (match, limit)).fetchall()
+    return [
+        {
+            "conversation_id": row[0],
+            "message_index": row[1],
+            "role": row[2],
+            "score": row[3],
+            "snippet": row[4],
+            "matches": row[5],
+        }
+        for row in rows
+    ]
+
+
+class ConversationSearchIndex:
+    """Sidecar search index database for the file-based stores.
+
+    The index is marked incomplete when it is created over an existing
+    store or when an update fails, and is rebuilt by its store before the
+    next search.
+    """
+
+    def __init__(self, db_path: Path, busy_timeout: float = 30.0) -> None:
+        self.db_path = db_path
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._connection().executescript(SEARCH_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get the connection for the current thread, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout, isolation_level=None)
+            enable_wal(conn, self.busy_timeout)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA journal_size_limit={WAL_SIZE_LIMIT}")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run a write transaction on the current thread's connection."""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    @property
+    def complete(self) -> bool:
+        """Whether every stored conversation is known to be indexed."""
+        row = self._connection().execute("SELECT value FROM search_meta WHERE key = 'complete'").fetchone()
+        return row is not None and row[0] == "1"
+
+    def mark_complete(self, complete: bool = True) -> None:
+        """Record whether the index covers every stored conversation."""
+        self._connection().execute(
+            "INSERT INTO search_meta (key, value) VALUES ('complete', ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+            ("1" if complete else "0",),
+        )
+
+    def indexed_count(self, conversation_id: str) -> int:
+        """Get the number of messages of a conversation in the index."""
+        return indexed_count(self._connection(), conversation_id)
+
+    def update(self, conversation_id: str, messages: List[Dict[str, Any]], start_index: int = 0) -> None:
+        """Index the messages of a save; see ``index_messages``."""
+        with self._transaction() as conn:
+            index_messages(conn, conversation_id, messages, start_index)
+
+    def remove(self, conversation_id: str) -> None:
+        """Drop a conversation from the index."""
+        with self._transaction() as conn:
+            remove_conversation(conn, conversation_id)
+
+    def clear(self) -> None:
+        """Drop every conversation from the index."""
+        with self._transaction() as conn:
+            clear_index(conn)
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Rank conversations by their best-matching message; see ``search_index``."""
+        return search_index(self._connection(), query, limit)
@@ -0,0 +1,206 @@
+"""
+On-disk formats for stored conversations.
+
+Serializers turn a conversation record into bytes and back. The format of a
+stored file is detected from its first bytes, so a store can switch formats
+while files written in an older format keep loading.
+"""
+
+import json
+import lzma
+import struct
+import zlib
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List
+
+BINARY_MAGIC = b"EHC1"
+
+CODEC_NONE = 0
+CODEC_ZLIB = 1
+CODEC_LZMA = 2
+# The message has no text body: its content, if any, is in its fields
+CODEC_FIELDS = 0xFF
+
+_CODECS = {"none": CODEC_NONE, "zlib": CODEC_ZLIB, "lzma": CODEC_LZMA}
+_LENGTH = struct.Struct(">I")
+
+
+class ConversationSerializer(ABC):
+    """Converts conversation records to and from bytes."""
+
+    name: str
+    suffix: str
+
+    @abstractmethod
+    def dumps(self, data: Dict[str, Any]) -> bytes:
+        """Encode a conversation record."""
+        pass
+
+    @abstractmethod
+    def loads(self, payload: bytes) -> Dict[str, Any]:
+        """Decode a conversation record."""
+        pass
+
+
+class JsonSerializer(ConversationSerializer):
+    """Indented JSON, the format the store originally wrote."""
+
+    name = "json-pretty"
+    suffix = ".json"
+
+    def dumps(self, data: Dict[str, Any]) -> bytes:
+        return json.dumps(data, indent=2, default=str).encode("utf-8")
+
+    def loads(self, payload: bytes) -> Dict[str, Any]:
+        return json.loads(payload)
+
+
+class CompactJsonSerializer(JsonSerializer):
+    """JSON without indentation or whitespace between tokens."""
+
+    name = "json"
+
+    def dumps(self, data: Dict[str, Any]) -> bytes:
+        return json.dumps(data, separators=(",", ":"), default=str).encode("utf-8")
+
+
+class BinarySerializer(ConversationSerializer):
+    """Length-prefixed binary format with optionally compressed message bodies.
+
+    Layout, with every length a big-endian u32::
+
+        magic "EHC1"
+        header length, header JSON (everything except the messages)
+        per message: codec u8, fields length, fields JSON, body length, body
+
+    A message's fields are everything but its ``content``, which is stored
+    as the body: UTF-8 text, compressed with zlib or lzma when it is at
+    least ``min_compress_size`` bytes and compression actually shrinks it.
+    Content that is not a string, such as a list of content blocks, stays
+    in the fields with codec ``CODEC_FIELDS`` and an empty body, as does a
+    message without content.
+    """
+
+    name = "binary"
+    suffix = ".ehc"
+
+    def __init__(self, compression: str = "none", min_compress_size: int = 512) -> None:
+        if compression not in _CODECS:
+            raise ValueError(f"Unknown compression: {compression}")
+        self.compression = compression
+        self.min_compress_size = min_compress_size
+
+    def _encode_body(self, body: bytes) -> tuple:
+        codec = _CODECS[self.compression]
+        if codec == CODEC_NONE or len(body) < self.min_compress_size:
+            return CODEC_NONE, body
+        compressed = zlib.compress(body) if codec == CODEC_ZLIB else lzma.compress(body)
+        if len(compressed) >= len(body):
+            return CODEC_NONE, body
+        return codec, compressed
+
+    @staticmethod
+    def _decode_body(codec: int, body: bytes) -> str:
+        if codec == CODEC_ZLIB:
+            body = zlib.decompress(body)
+        elif codec == CODEC_LZMA:
+            body = lzma.decompress(body)
+        return body.decode("utf-8")
+
+    def dumps(self, data: Dict[str, Any]) -> bytes:
+        messages = data.get("messages", [])
+        header = {k: v for k, v in data.items() if k != "messages"}
+        header["message_count"] = len(messages)
+
+        parts: List[bytes] = [BINARY_MAGIC]
+        header_bytes = json.dumps(header, separators=(",", ":"), default=str).encode("utf-8")
+        parts += [_LENGTH.pack(len(header_bytes)), header_bytes]
+
+        for message in messages:
+            content = message.get("content")
+            if isinstance(content, str):
+                fields = {k: v for k, v in message.items() if k != "content"}
+                codec, body = self._encode_body(content.encode("utf-8"))
+            else:
+                fields, codec, body = message, CODEC_FIELDS, b""
+            fields_bytes = json.dumps(fields, separators=(",", ":"), default=str).encode("utf-8")
+            parts += [
+                bytes((codec,)),
+                _LENGTH.pack(len(fields_bytes)),
+                fields_bytes,
+                _LENGTH.pack(len(body)),
+                body,
+            ]
+
+        return b"".join(parts)
+
+    def loads(self, payload: bytes) -> Dict[str, Any]:
+        if not payload.startswith(BINARY_MAGIC):
+            raise ValueError("Not a binary conversation record")
+
+        view = memoryview(payload)
+        offset = len(BINARY_MAGIC)
+
+        def read_chunk() -> bytes:
+            nonlocal offset
+            (length,) = _LENGTH.unpack_from(view, offset)
+            offset += _LENGTH.size
+            if offset + length > len(view):
+                raise ValueError("Truncated binary conversation record")
+            chunk = bytes(view[offset:offset + length])
+            offset += length
+            return chunk
+
+        try:
+            data = json.loads(read_chunk())
+            messages = []
+            for _ in range(data.pop("message_count", 0)):
+                codec = view[offset]
+                offset += 1
+                message = json.loads(read_chunk())
+                body = read_chunk()
+                if codec != CODEC_FIELDS:
+                    message["content"] = self._decode_body(codec, body)
+                messages.append(message)
+        except (struct.error, IndexError, zlib.error, lzma.LZMAError, UnicodeDecodeError) as e:
+            raise ValueError(f"Corrupt binary conversation record: {e}") from e
+
+        data["messages"] = messages
+        return data
+
+
+SERIALIZERS = {
+    JsonSerializer.name: JsonSerializer,
+    CompactJsonSerializer.name: CompactJsonSerializer,
+    BinarySerializer.name: BinarySerializer,
+}
+
+KNOWN_SUFFIXES = (JsonSerializer.suffix, BinarySerializer.suffix)
+
+
+def get_serializer(name: str = "json", compression: str = "none") -> ConversationSerializer:
+    """Create a serializer by name.
+
+    Args:
+        name: One of 'json', 'json-pretty' or 'binary'
+        compression: Message body compression for the binary format: 'none', 'zlib' or 'lzma'
+
+    Returns:
+        The serializer
+    """
+    if name not in SERIALIZERS:
+        raise ValueError(f"Unknown conversation serializer: {name}")
+    if name == BinarySerializer.name:
+        return BinarySerializer(compression=compression)
+    return SERIALIZERS[name]()
+
+
+def loads_conversation(payload: bytes) -> Dict[str, Any]:
+    """Decode a stored conversation in whichever format it was written.
+
+    Raises:
+        ValueError: If the payload is not a conversation record in a known format
+    """
+    if payload.startswith(BINARY_MAGIC):
+        return BinarySerializer().loads(payload)
+    return JsonSerializer().loads(payload)
@@ -1,101 +1,349 @@
 """
-File-based conversation storage.
+Conversation storage.
 
-Stores conversation history in JSON files within the repo.
+Holds the file-based store, which keeps each conversation as a JSON file
+under the data directory, the interface the other backends implement, and
+the factory that creates the backend selected in settings. The other
+backends live in their own modules.
 """
 
-import json
+import asyncio
+import atexit
+import functools
+import hashlib
+import heapq
 import os
-from datetime import datetime
-from pathlib import Path
-from typing import Any, Dict, List, Optional
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from itertools import islice
+from pathlib import Path, PurePosixPath
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar, Union
 
 import structlog
 
+from app.config.app_config import AppConfigLoader
+from app.utils.blob_store import BLOB_DIRNAME, BLOB_REF_KEY, BlobStore, blob_digest
+from app.utils.conversation_cache import ConversationCache
+from app.utils.conversation_ids import conversation_created_at, shard_for
+from app.utils.conversation_manifest import MANIFEST_DIRNAME, ConversationManifest, summarize_conversation
+from app.utils.conversation_search import SEARCH_DB_FILENAME, ConversationSearchIndex, query_terms
+from app.utils.file_lock import FileLock
+from app.utils.conversation_serializers import (
+    KNOWN_SUFFIXES,
+    ConversationSerializer,
+    CompactJsonSerializer,
+    get_serializer,
+    loads_conversation,
+)
+
 logger = structlog.get_logger(__name__)
 
 STORAGE_DIR = Path(__file__).parent.parent.parent / "data" / "conversations"
 
+LOCK_DIRNAME = ".locks"
+LOCK_STRIPES = 1024
 
-class ConversationStore:
-    """File-based storage for conversation history."""
+T = TypeVar("T")
 
-    def __init__(self, storage_dir: Optional[Path] = None) -> None:
-        self.storage_dir = storage_dir or STORAGE_DIR
-        self._ensure_storage_dir()
+_io_executor: Optional[ThreadPoolExecutor] = None
+_io_executor_lock = threading.Lock()
 
-    def _ensure_storage_dir(self) -> None:
-        """Create storage directory if it doesn't exist."""
-        self.storage_dir.mkdir(parents=True, exist_ok=True)
-        
-        gitkeep = self.storage_dir / ".gitkeep"
-        if not gitkeep.exists():
-            gitkeep.touch()
 
-    def _get_conversation_path(self, conversation_id: str) -> Path:
-        """Get the file path for a conversation."""
-        safe_id = conversation_id.replace("/", "_").replace("\\", "_")
-        return self.storage_dir / f"{safe_id}.json"
+def get_io_executor() -> ThreadPoolExecutor:
+    """Get the executor that runs blocking store calls for the async store API.
+
+    It is shared by every store and sized by the configured ``io_workers``,
+    which bounds how many store calls run at once; further calls queue.
+    """
+    global _io_executor
+    with _io_executor_lock:
+        if _io_executor is None:
+            _io_executor = ThreadPoolExecutor(
+                max_workers=AppConfigLoader.app_config().storage.io_workers,
+                thread_name_prefix="conversation-io",
+            )
+        return _io_executor
+
+
+def _fsync_directory(dir_path: Path) -> None:
+    """Flush a directory entry to disk where the platform allows it."""
+    try:
+        fd = os.open(dir_path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write(file_path: Path, payload: bytes, fsync: bool = False) -> None:
+    """Write a file through a temporary file and rename it into place.
+
+    Args:
+        file_path: Destination file
+        payload: File contents
+        fsync: Flush the file and its directory entry to disk before returning
+    """
+    tmp_path = file_path.with_name(f"{file_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(payload)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp_path, file_path)
+    if fsync:
+        _fsync_directory(file_path.parent)
+
+
+class ConversationConflictError(Exception):
+    """Raised when a save expects a different version of a conversation than is stored."""
+
+    def __init__(self, conversation_id: str, expected_version: int, actual_version: int) -> None:
+        super().__init__(
+            f"Conversation {conversation_id} is at version {actual_version}, expected {expected_version}"
+        )
+        self.conversation_id = conversation_id
+        self.expected_version = expected_version
+        self.actual_version = actual_version
 
+
+def _check_version(conversation_id: str, expected_version: Optional[int], actual_version: int) -> None:
+    """Reject a save whose expected version is not the stored one."""
+    if expected_version is not None and expected_version != actual_version:
+        raise ConversationConflictError(conversation_id, expected_version, actual_version)
+
+
+def _stored_prefix(data: Optional[Dict[str, Any]], start_index: int) -> List[Dict[str, Any]]:
+    """Get the stored messages a save starting at ``start_index`` keeps.
+
+    Raises:
+        ValueError: If fewer than ``start_index`` messages are stored
+    """
+    stored = (data or {}).get("messages", [])
+    if len(stored) < start_index:
+        raise ValueError(f"Cannot save from message {start_index}: only {len(stored)} stored")
+    return stored[:start_index]
+
+
+def _summary_matches(summary: Dict[str, Any], filters: Dict[str, Any]) -> bool:
+    """Check a conversation summary against ``iter_conversations`` filters."""
+    updated_at = summary.get("updated_at") or ""
+    if filters.get("updated_after") and updated_at < filters["updated_after"]:
+        return False
+    if filters.get("updated_before") and updated_at >= filters["updated_before"]:
+        return False
+    if filters.get("intent") and summary.get("intent") != filters["intent"]:
+        return False
+    return summary.get("message_count", 0) >= (filters.get("min_messages") or 0)
+
+
+class BaseConversationStore(ABC):
+    """Interface shared by all conversation storage backends."""
+
+    @abstractmethod
     def save_conversation(
         self,
         conversation_id: str,
         messages: List[Dict[str, Any]],
         metadata: Optional[Dict[str, Any]] = None,
-    ) -> None:
-        """Save conversation to file.
+        start_index: int = 0,
+        expected_version: Optional[int] = None,
+    ) -> Optional[int]:
+        """Save a conversation, replacing its messages from ``start_index`` on and its metadata.
+
+        Every save increments the conversation's ``version``. With
+        ``expected_version`` the save is rejected with
+        ``ConversationConflictError`` unless that is the stored version (0
+        for a conversation that does not exist yet).
+
+        Returns:
+            The new version, or None if the save was queued rather than written
+        """
+        pass
+
+    @abstractmethod
+    def load_conversation(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """Load a conversation, or None if it does not exist."""
+        pass
+
+    @abstractmethod
+    def delete_conversation(self, conversation_id: str, expected_version: Optional[int] = None) -> bool:
+        """Delete a conversation, returning whether it existed.
+
+        With ``expected_version`` the delete is rejected with
+        ``ConversationConflictError`` unless that is the stored version, so
+        a conversation saved again since it was read is kept.
+        """
+        pass
+
+    @abstractmethod
+    def list_conversations(self) -> List[Dict[str, Any]]:
+        """List all conversations with basic info, most recently updated first."""
+        pass
+
+    @abstractmethod
+    def clear_all(self) -> int:
+        """Delete all conversations, returning how many were deleted."""
+        pass
+
+    def import_conversation(self, data: Dict[str, Any]) -> None:
+        """Write a conversation record as given, replacing any stored copy.
+
+        Backends override this to keep the record's ``created_at``,
+        ``updated_at`` and ``version``; the default implementation saves its
+        messages and metadata, so those are reset.
 
         Args:
-            conversation_id: Unique identifier for the conversation
-            messages: List of message dictionaries
-            metadata: Optional metadata (mood, intent, etc.)
+            data: Conversation record as returned by ``load_conversation``
         """
-        file_path = self._get_conversation_path(conversation_id)
+        self.save_conversation(data["conversation_id"], data.get("messages", []), data.get("metadata"))
 
-        data = {
-            "conversation_id": conversation_id,
-            "updated_at": datetime.now().isoformat(),
-            "messages": messages,
-            "metadata": metadata or {},
+    def _iter_summaries(self, cursor: Optional[str], filters: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Iterate over conversation summaries in listing order, starting after ``cursor``.
+
+        Backends override this to stream from their storage and may apply
+        ``filters`` themselves; ``iter_conversations`` applies them again.
+        The default implementation sorts ``list_conversations``.
+        """
+        summaries = sorted(self.list_conversations(), key=lambda x: x["conversation_id"], reverse=True)
+        for summary in summaries:
+            if cursor is None or summary["conversation_id"] < cursor:
+                yield {**summary, "cursor": summary["conversation_id"]}
+
+    def iter_conversations(
+        self,
+        cursor: Optional[str] = None,
+        updated_after: Optional[Union[str, datetime]] = None,
+        updated_before: Optional[Union[str, datetime]] = None,
+        intent: Optional[str] = None,
+        min_messages: int = 0,
+    ) -> Iterator[Dict[str, Any]]:
+        """Iterate over conversation summaries, most recently created first.
+
+        Conversations are ordered by ID, which embeds the creation time.
+        Results are produced as the store is scanned, so the first ones
+        arrive before the whole store has been read and memory use does not
+        grow with its size. Each summary carries a ``cursor`` token; passing
+        it back resumes the iteration right after that conversation.
+
+        Args:
+            cursor: Continuation token from a previously returned summary
+            updated_after: Only conversations updated at or after this time
+            updated_before: Only conversations updated before this time
+            intent: Only conversations whose detected intent matches
+            min_messages: Only conversations with at least this many messages
+
+        Returns:
+            Iterator of conversation summaries
+        """
+        filters = {
+            "updated_after": updated_after.isoformat() if isinstance(updated_after, datetime) else updated_after,
+            "updated_before": updated_before.isoformat() if isinstance(updated_before, datetime) else updated_before,
+            "intent": intent,
+            "min_messages": min_messages,
         }
+        for summary in self._iter_summaries(cursor, filters):
+            if _summary_matches(summary, filters):
+                yield summary
 
-        if file_path.exists():
-            try:
-                with open(file_path, "r") as f:
-                    existing = json.load(f)
-                    data["created_at"] = existing.get("created_at", data["updated_at"])
-            except (json.JSONDecodeError, KeyError):
-                data["created_at"] = data["updated_at"]
-        else:
-            data["created_at"] = data["updated_at"]
+    def list_conversations_page(
+        self,
+        page_size: int = 50,
+        cursor: Optional[str] = None,
+        **filters: Any,
+    ) -> Dict[str, Any]:
+        """Get one page of conversation summaries, most recently created first.
 
-        with open(file_path, "w") as f:
-            json.dump(data, f, indent=2, default=str)
+        Args:
+            page_size: Maximum number of summaries to return
+            cursor: ``next_cursor`` of the previous page, None for the first page
+            **filters: Filters accepted by ``iter_conversations``
 
-        logger.debug("Conversation saved", conversation_id=conversation_id, message_count=len(messages))
+        Returns:
+            Dict with the page's ``conversations`` and the ``next_cursor`` to
+            request the following page with, None on the last page
+        """
+        conversations = list(islice(self.iter_conversations(cursor=cursor, **filters), page_size + 1))
+        has_more = len(conversations) > page_size
+        conversations = conversations[:page_size]
+        return {
+            "conversations": conversations,
+            "next_cursor": conversations[-1]["cursor"] if has_more else None,
+        }
 
-    def load_conversation(self, conversation_id: str) -> Optional[Dict[str, Any]]:
-        """Load conversation from file.
+    def load_tail(self, conversation_id: str, n: int) -> Optional[Dict[str, Any]]:
+        """Load a conversation with only its newest ``n`` messages.
+
+        Backends that can read messages from the end override this so its
+        cost depends on ``n`` rather than on the length of the conversation.
 
         Args:
             conversation_id: Unique identifier for the conversation
+            n: Maximum number of messages to return
 
         Returns:
-            Conversation data or None if not found
+            Conversation data whose ``messages`` are the last ``n`` and whose
+            ``message_count`` is the total number stored, or None if not found
         """
-        file_path = self._get_conversation_path(conversation_id)
-
-        if not file_path.exists():
+        data = self.load_conversation(conversation_id)
+        if data is None:
             return None
+        messages = data.get("messages", [])
+        data["message_count"] = len(messages)
+        data["messages"] = messages[-n:] if n > 0 else []
+        return data
 
-        try:
-            with open(file_path, "r") as f:
-                data = json.load(f)
-            logger.debug("Conversation loaded", conversation_id=conversation_id)
-            return data
-        except (json.JSONDecodeError, IOError) as e:
-            logger.error("Failed to load conversation", conversation_id=conversation_id, error=str(e))
-            return None
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Find the conversations whose messages best match a query.
+
+        Backends with a full-text index override this so its cost depends on
+        the number of matches. The default implementation loads every
+        conversation and ranks by how often the query's words occur.
+
+        Args:
+            query: Free text; conversations matching any of its words are returned
+            limit: Maximum number of conversations to return
+
+        Returns:
+            Results, best first, each with the ``conversation_id``, the
+            ``message_index``, ``role`` and a ``snippet`` of its best-matching
+            message, a relevance ``score`` and the number of ``matches``
+        """
+        terms = set(query_terms(query))
+        if not terms:
+            return []
+
+        results = []
+        for summary in self.iter_conversations():
+            data = self.load_conversation(summary["conversation_id"]) or {}
+            best = None
+            matches = 0
+            for index, message in enumerate(data.get("messages", [])):
+                content = str(message.get("content", ""))
+                score = sum(1 for word in query_terms(content) if word in terms)
+                if not score:
+                    continue
+                matches += 1
+                if best is None or score > best["score"]:
+                    best = {
+                        "conversation_id": summary["conversation_id"],
+                        "message_index": index,
+                        "role": message.get("role", ""),
+                        "score": float(score),
+                        "snippet": content[:200],
+                    }
+            if best is not None:
+                results.append({**best, "matches": matches})
+
+        results.sort(key=lambda x: x["score"], reverse=True)
+        return results[:limit]
 
     def get_messages(self, conversation_id: str) -> List[Dict[str, Any]]:
         """Get just the messages from a conversation.
@@ -111,6 +359,83 @@ class ConversationStore:
             return data.get("messages", [])
         return []
 
+    async def _run_io(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run a blocking store call on the I/O executor and await its result."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_io_executor(), functools.partial(func, *args, **kwargs))
+
+    async def asave_conversation(
+        self,
+        conversation_id: str,
+        messages: List[Dict[str, Any]],
+        metadata: Optional[Dict[str, Any]] = None,
+        start_index: int = 0,
+        expected_version: Optional[int] = None,
+    ) -> Optional[int]:
+        """Save a conversation without blocking the event loop; see ``save_conversation``.
+
+        ``messages`` and ``metadata`` must not be modified until the save completes.
+        """
+        return await self._run_io(
+            self.save_conversation,
+            conversation_id,
+            messages,
+            metadata,
+            start_index=start_index,
+            expected_version=expected_version,
+        )
+
+    async def aload_conversation(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """Load a conversation without blocking the event loop; see ``load_conversation``."""
+        return await self._run_io(self.load_conversation, conversation_id)
+
+    async def aload_tail(self, conversation_id: str, n: int) -> Optional[Dict[str, Any]]:
+        """Load the newest messages of a conversation without blocking the event loop; see ``load_tail``."""
+        return await self._run_io(self.load_tail, conversation_id, n)
+
+    async def aget_messages(self, conversation_id: str) -> List[Dict[str, Any]]:
+        """Get the messages of a conversation without blocking the event loop; see ``get_messages``."""
+        return await self._run_io(self.get_messages, conversation_id)
+
+    async def adelete_conversation(self, conversation_id: str, expected_version: Optional[int] = None) -> bool:
+        """Delete a conversation without blocking the event loop; see ``delete_conversation``."""
+        return await self._run_io(self.delete_conversation, conversation_id, expected_version)
+
+    async def alist_conversations(self) -> List[Dict[str, Any]]:
+        """List all conversations without blocking the event loop; see ``list_conversations``."""
+        return await self._run_io(self.list_conversations)
+
+    async def alist_conversations_page(
+        self,
+        page_size: int = 50,
+        cursor: Optional[str] = None,
+        **filters: Any,
+    ) -> Dict[str, Any]:
+        """Get one page of summaries without blocking the event loop; see ``list_conversations_page``."""
+        return await self._run_io(self.list_conversations_page, page_size=page_size, cursor=cursor, **filters)
+
+    async def asearch(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Search conversations without blocking the event loop; see ``search``."""
+        return await self._run_io(self.search, query, limit)
+
+    async def aadd_message(
+        self,
+        conversation_id: str,
+        role: str,
+        content: str,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Add a message to a conversation without blocking the event loop; see ``add_message``."""
+        await self._run_io(self.add_message, conversation_id, role, content, metadata)
+
+    async def aupdate_metadata(self, conversation_id: str, metadata: Dict[str, Any]) -> None:
+        """Update conversation metadata without blocking the event loop; see ``update_metadata``."""
+        await self._run_io(self.update_metadata, conversation_id, metadata)
+
+    async def aclear_all(self) -> int:
+        """Delete all conversations without blocking the event loop; see ``clear_all``."""
+        return await self._run_io(self.clear_all)
+
     def add_message(
         self,
         conversation_id: str,
@@ -126,7 +451,8 @@ class ConversationStore:
             content: Message content
             metadata: Optional message metadata
         """
-        messages = self.get_messages(conversation_id)
+        existing_data = self.load_conversation(conversation_id) or {}
+        messages = existing_data.get("messages", [])
 
         message = {
             "role": role,
@@ -138,10 +464,7 @@ class ConversationStore:
 
         messages.append(message)
 
-        existing_data = self.load_conversation(conversation_id)
-        conv_metadata = existing_data.get("metadata", {}) if existing_data else {}
-
-        self.save_conversation(conversation_id, messages, conv_metadata)
+        self.save_conversation(conversation_id, messages, existing_data.get("metadata", {}))
 
     def update_metadata(
         self,
@@ -166,46 +489,769 @@ class ConversationStore:
         else:
             self.save_conversation(conversation_id, [], metadata)
 
-    def delete_conversation(self, conversation_id: str) -> bool:
+
+class ConversationStore(BaseConversationStore):
+    """File-based storage for conversation history.
+
+    Files are written with the configured serializer. Files in any known
+    format are read, so changing the serializer does not orphan
+    conversations written earlier; they are rewritten in the new format on
+    their next save.
+
+    With a 'hash' or 'date' ``shard_layout`` files are spread over
+    subdirectories (see ``shard_for``). Files left in the storage root by
+    the flat layout are still found and move to their shard on next save.
+
+    With ``search_index`` message text is indexed in a sidecar database
+    next to the manifest as conversations are saved (see
+    ``ConversationSearchIndex``).
+
+    With a ``blob_threshold``, message bodies of at least that many bytes
+    are moved to a shared ``BlobStore`` and the record keeps their digest
+    under ``content_blob``. Loaded messages carry the digest alongside
+    their content.
+    """
+
+    def __init__(
+        self,
+        storage_dir: Optional[Path] = None,
+        cache_entries: int = 256,
+        cache_bytes: int = 64 * 1024 * 1024,
+        fsync: bool = False,
+        serializer: Optional[ConversationSerializer] = None,
+        shard_layout: str = "flat",
+        search_index: bool = False,
+        blob_threshold: int = 0,
+    ) -> None:
+        self.storage_dir = storage_dir or STORAGE_DIR
+        self.fsync = fsync
+        self.blob_threshold = blob_threshold
+        self.serializer = serializer or CompactJsonSerializer()
+        self.shard_layout = shard_layout
+        self._ensure_storage_dir()
+        self._manifest = ConversationManifest(self.storage_dir)
+        self._cache = ConversationCache(max_entries=cache_entries, max_bytes=cache_bytes)
+        atexit.register(self._manifest.flush)
+
+        self._search: Optional[ConversationSearchIndex] = None
+        search_path = self.storage_dir / MANIFEST_DIRNAME / SEARCH_DB_FILENAME
+        if search_index:
+            self._search = ConversationSearchIndex(search_path)
+            if not self._search.complete and next(self._iter_conversation_files(), None) is None:
+                self._search.mark_complete()
+        elif search_path.exists():
+            # Saves made while the index is off are not indexed, so it is rebuilt when turned back on
+            ConversationSearchIndex(search_path).mark_complete(False)
+
+        self._blobs: Optional[BlobStore] = None
+        if blob_threshold > 0 or (self.storage_dir / BLOB_DIRNAME).exists():
+            self._blobs = BlobStore(self.storage_dir / BLOB_DIRNAME)
+
+    def _locked(self, conversation_id: str) -> FileLock:
+        """Get the advisory lock serialising writers of a conversation across processes.
+
+        Conversations share a bounded set of ``LOCK_STRIPES`` lock files, so
+        lock files never need to be deleted.
+        """
+        stripe = int(hashlib.sha1(conversation_id.encode("utf-8")).hexdigest(), 16) % LOCK_STRIPES
+        return FileLock(self.storage_dir / LOCK_DIRNAME / f"{stripe:04d}.lock")
+
+    def _ensure_storage_dir(self) -> None:
+        """Create storage directory if it doesn't exist."""
+        self.storage_dir.mkdir(parents=True, exist_ok=True)
+        
+        gitkeep = self.storage_dir / ".gitkeep"
+        if not gitkeep.exists():
+            gitkeep.touch()
+
+    @property
+    def file_suffix(self) -> str:
+        """Suffix of the files this store writes."""
+        return self.serializer.suffix
+
+    def _read_suffixes(self) -> List[str]:
+        """Get the suffixes of files this store reads, the one it writes first."""
+        return [self.file_suffix] + [suffix for suffix in KNOWN_SUFFIXES if suffix != self.file_suffix]
+
+    @staticmethod
+    def _safe_id(conversation_id: str) -> str:
+        return conversation_id.replace("/", "_").replace("\\", "_")
+
+    def _get_conversation_path(self, conversation_id: str) -> Path:
+        """Get the file path for a conversation."""
+        shard_dir = self.storage_dir / shard_for(conversation_id, self.shard_layout)
+        return shard_dir / f"{self._safe_id(conversation_id)}{self.file_suffix}"
+
+    def _candidate_paths(self, conversation_id: str) -> List[Path]:
+        """Get every path a conversation may be stored at, the current one first.
+
+        Covers older formats and, for sharded layouts, the flat layout.
+        """
+        shard_dir = self.storage_dir / shard_for(conversation_id, self.shard_layout)
+        directories = [shard_dir] if shard_dir == self.storage_dir else [shard_dir, self.storage_dir]
+        safe_id = self._safe_id(conversation_id)
+        return [directory / f"{safe_id}{suffix}" for directory in directories for suffix in self._read_suffixes()]
+
+    def _find_conversation_path(self, conversation_id: str) -> Optional[Path]:
+        """Get the path of the stored file for a conversation, if there is one."""
+        for file_path in self._candidate_paths(conversation_id):
+            if file_path.exists():
+                return file_path
+        return None
+
+    def _remove_stale_files(self, conversation_id: str) -> None:
+        """Delete copies of a conversation in older formats or locations."""
+        for file_path in self._candidate_paths(conversation_id)[1:]:
+            if file_path.exists():
+                file_path.unlink()
+
+    def _conversation_files_in(
+        self,
+        directory: Path,
+        file_names: List[str],
+        include_shadowed: bool = False,
+    ) -> Iterator[Path]:
+        """Filter a directory listing down to conversation files.
+
+        Unless ``include_shadowed`` is set, a file in an older format is
+        skipped when the same conversation also has a file in the current one.
+        """
+        suffixes = self._read_suffixes()
+        names = set(file_names)
+        for file_name in sorted(file_names):
+            stem, dot, suffix = file_name.rpartition(".")
+            if not dot or f".{suffix}" not in suffixes:
+                continue
+            if not include_shadowed and f".{suffix}" != self.file_suffix and f"{stem}{self.file_suffix}" in names:
+                continue
+            yield directory / file_name
+
+    def _iter_conversation_files(self, include_shadowed: bool = False) -> Iterator[Path]:
+        """Iterate over the files holding stored conversations, in every shard."""
+        for dir_path, dir_names, file_names in os.walk(self.storage_dir):
+            dir_names[:] = sorted(name for name in dir_names if not name.startswith("."))
+            yield from self._conversation_files_in(Path(dir_path), file_names, include_shadowed)
+
+    @staticmethod
+    def _listing_key(file_path: Path) -> Tuple[bool, str, str]:
+        """Get the sort key of a conversation file: creation time from its ID, then the ID."""
+        created = conversation_created_at(file_path.stem)
+        return (created is not None, created.isoformat() if created else "", file_path.stem)
+
+    def iter_partition_files(
+        self,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+        newest_first: bool = True,
+    ) -> Iterator[Path]:
+        """Iterate over conversation files in creation order.
+
+        Files are ordered by the creation time embedded in their conversation
+        ID, then by ID. With the 'date' layout only the day partitions
+        overlapping the requested range are listed, one at a time, so the
+        first files are produced without scanning the whole store. Other
+        layouts list every file first. Conversations whose ID has no embedded
+        time count as the oldest: they come last when iterating newest first
+        and are excluded by ``created_after``.
+
+        Args:
+            created_after: Only conversations created at or after this UTC time
+            created_before: Only conversations created before this UTC time
+            newest_first: Yield the most recently created conversations first
+
+        Returns:
+            Iterator of conversation file paths
+        """
+        def in_range(file_path: Path) -> bool:
+            created = conversation_created_at(file_path.stem)
+            if created is None:
+                return created_after is None
+            if created_after and created < created_after:
+                return False
+            return not (created_before and created >= created_before)
+
+        def sorted_files(files: Iterator[Path]) -> List[Path]:
+            return sorted(filter(in_range, files), key=self._listing_key, reverse=newest_first)
+
+        if self.shard_layout != "date":
+            ordered: Iterator[Path] = iter(sorted_files(self._iter_conversation_files()))
+        else:
+            ordered = heapq.merge(
+                self._iter_date_partitions(created_after, created_before, newest_first, sorted_files),
+                sorted_files(self._iter_unpartitioned_files()),
+                key=self._listing_key,
+                reverse=newest_first,
+            )
+
+        # A conversation saved before the layout changed may still have a copy
+        # outside its shard; the shard copy sorts first and is the current one
+        previous_stem = None
+        for file_path in ordered:
+            if file_path.stem != previous_stem:
+                yield file_path
+            previous_stem = file_path.stem
+
+    def _iter_date_partitions(
+        self,
+        created_after: Optional[datetime],
+        created_before: Optional[datetime],
+        newest_first: bool,
+        sorted_files: Callable[[Iterator[Path]], List[Path]],
+    ) -> Iterator[Path]:
+        """Iterate over the files of the YYYY/MM/DD partitions overlapping a creation range."""
+        first_day = created_after.date() if created_after else None
+        last_day = created_before.date() if created_before else None
+
+        def subdirs(directory: Path) -> List[Path]:
+            children = [child for child in directory.iterdir() if child.is_dir() and child.name.isdigit()]
+            return sorted(children, key=lambda child: child.name, reverse=newest_first)
+
+        for year_dir in subdirs(self.storage_dir):
+            for month_dir in subdirs(year_dir):
+                for day_dir in subdirs(month_dir):
+                    try:
+                        day = date(int(year_dir.name), int(month_dir.name), int(day_dir.name))
+                    except ValueError:
+                        continue
+                    if (first_day and day < first_day) or (last_day and day > last_day):
+                        continue
+                    file_names = [entry.name for entry in os.scandir(day_dir) if entry.is_file()]
+                    yield from sorted_files(self._conversation_files_in(day_dir, file_names))
+
+    def _iter_unpartitioned_files(self) -> Iterator[Path]:
+        """Iterate over files outside the date partitions: the storage root and 'undated'."""
+        directories = [self.storage_dir]
+        undated_root = self.storage_dir / "undated"
+        if undated_root.is_dir():
+            directories += sorted(child for child in undated_root.iterdir() if child.is_dir())
+        for directory in directories:
+            file_names = [entry.name for entry in os.scandir(directory) if entry.is_file()]
+            yield from self._conversation_files_in(directory, file_names)
+
+    def _iter_summaries(self, cursor: Optional[str], filters: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Stream summaries in creation order, newest first.
+
+        Summaries come from the manifest when its entry matches the file on
+        disk; other files are read and their manifest entries refreshed. The
+        cursor is the file name stem of the last conversation returned.
+
+        A conversation cannot have been updated before it was created, so an
+        ``updated_before`` filter also skips every partition created after it.
+        """
+        cursor_key = None
+        created_before = None
+        if filters.get("updated_before"):
+            # Naive timestamps are local time, as written by save_conversation
+            created_before = datetime.fromisoformat(filters["updated_before"]).astimezone(timezone.utc)
+        if cursor is not None:
+            cursor_key = self._listing_key(Path(cursor))
+            cursor_created = conversation_created_at(cursor)
+            if cursor_created is not None:
+                cursor_before = cursor_created + timedelta(milliseconds=1)
+                created_before = min(created_before, cursor_before) if created_before else cursor_before
+
+        for file_path in self.iter_partition_files(created_before=created_before):
+            if cursor_key is not None and self._listing_key(file_path) >= cursor_key:
+                continue
+            summary = self._summary_for_file(file_path)
+            if summary is not None:
+                yield {**summary, "cursor": file_path.stem}
+
+    def _summary_for_file(self, file_path: Path) -> Optional[Dict[str, Any]]:
+        """Get the manifest summary of a conversation file, re-reading it if the entry is stale."""
+        try:
+            mtime_ns = file_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+        key = self._manifest_key(file_path)
+        entry = self._manifest.get(file_path.stem)
+        if entry is None or entry["file"] != key or entry["mtime_ns"] != mtime_ns:
+            try:
+                data = self._read_conversation_file(file_path)
+            except (ValueError, IOError):
+                return None
+            if not data or not data.get("conversation_id"):
+                return None
+            self._manifest.update(summarize_conversation(data), key, mtime_ns)
+            entry = self._manifest.get(data["conversation_id"])
+
+        return {k: v for k, v in entry.items() if k not in ("file", "mtime_ns")}
+
+    def _read_conversation_file(self, file_path: Path) -> Optional[Dict[str, Any]]:
+        """Read a stored conversation file, detecting its format from its header.
+
+        Raises:
+            ValueError, IOError: If the file cannot be read or decoded
+        """
+        with open(file_path, "rb") as f:
+            return loads_conversation(f.read())
+
+    def _load_conversation_file(self, file_path: Path) -> Optional[Dict[str, Any]]:
+        """Read a stored conversation file with the bodies of its messages resolved from the blob store."""
+        data = self._read_conversation_file(file_path)
+        if data is not None:
+            self._resolve_blobs(data.get("messages", []))
+        return data
+
+    def _resolve_blobs(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Fill in, in place, the content of messages stored as blob references."""
+        if self._blobs is None:
+            return messages
+        for message in messages:
+            digest = message.get(BLOB_REF_KEY)
+            if digest and not message.get("content"):
+                try:
+                    message["content"] = self._blobs.get(digest)
+                except KeyError:
+                    logger.error("Message body missing from blob store", digest=digest)
+        return messages
+
+    def _externalize(
+        self,
+        messages: List[Dict[str, Any]],
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], Dict[str, str]]:
+        """Replace message bodies of at least ``blob_threshold`` bytes with blob references.
+
+        Messages that are already references, with a digest but no content,
+        are kept as they are.
+
+        Returns:
+            Tuple of (messages to write, the messages with their content and
+            current digests, bodies by digest)
+        """
+        if self.blob_threshold <= 0:
+            return messages, messages, {}
+
+        stored: List[Dict[str, Any]] = []
+        resolved: List[Dict[str, Any]] = []
+        bodies: Dict[str, str] = {}
+        for message in messages:
+            content = message.get("content")
+            if message.get(BLOB_REF_KEY) and not content:
+                stored.append({k: v for k, v in message.items() if k != "content"})
+                resolved.append(message)
+            elif isinstance(content, str) and len(content.encode("utf-8")) >= self.blob_threshold:
+                digest = blob_digest(content)
+                bodies[digest] = content
+                stored.append({**{k: v for k, v in message.items() if k != "content"}, BLOB_REF_KEY: digest})
+                resolved.append(message if message.get(BLOB_REF_KEY) == digest else {**message, BLOB_REF_KEY: digest})
+            elif BLOB_REF_KEY in message:
+                stripped = {k: v for k, v in message.items() if k != BLOB_REF_KEY}
+                stored.append(stripped)
+                resolved.append(stripped)
+            else:
+                stored.append(message)
+                resolved.append(message)
+        return stored, resolved, bodies
+
+    @staticmethod
+    def _blob_refs(messages: List[Dict[str, Any]]) -> Counter:
+        """Count the blob references held by stored or loaded messages."""
+        return Counter(message[BLOB_REF_KEY] for message in messages if message.get(BLOB_REF_KEY))
+
+    def _swap_blob_refs(self, old: Counter, new: Counter, bodies: Dict[str, str]) -> Counter:
+        """Acquire the references a save adds, returning those it drops for release once it is written."""
+        if self._blobs is not None:
+            self._blobs.acquire(new - old, bodies)
+        return old - new
+
+    def _release_blobs(self, refs: Counter) -> None:
+        if self._blobs is not None and refs:
+            self._blobs.release(refs)
+
+    def blob_stats(self) -> Dict[str, int]:
+        """Get the number of blobs, references to them and bytes they hold."""
+        if self._blobs is None:
+            return {"blobs": 0, "references": 0, "bytes": 0}
+        return self._blobs.stats()
+
+    def _manifest_key(self, path: Path) -> str:
+        """Get the manifest key of a file or directory: its path relative to the storage root."""
+        return path.relative_to(self.storage_dir).as_posix()
+
+    @staticmethod
+    def _dir_mtime(directory: Path) -> Optional[int]:
+        try:
+            return directory.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _record_in_manifest(
+        self,
+        file_path: Path,
+        data: Dict[str, Any],
+        dir_mtime_ns: Optional[int],
+        cache: bool = True,
+    ) -> None:
+        """Update the manifest and cache entries of a conversation that was just written.
+
+        Args:
+            file_path: File the conversation was written to
+            data: Conversation record that was written
+            dir_mtime_ns: mtime of the file's directory observed before the write
+            cache: Cache ``data`` as the conversation's contents; pass False when
+                it does not hold every message
+        """
+        stat = file_path.stat()
+        key = self._manifest_key(file_path)
+        self._manifest.update(summarize_conversation(data), key, stat.st_mtime_ns)
+        if cache:
+            signature = (key, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            self._cache.put(data["conversation_id"], signature, data, stat.st_size)
+        else:
+            self._cache.invalidate(data["conversation_id"])
+        self._advance_manifest_mtime(file_path.parent, dir_mtime_ns)
+
+    def _advance_manifest_mtime(self, directory: Path, dir_mtime_ns: Optional[int]) -> None:
+        """Mark our own change to a directory as seen, unless the manifest was already stale."""
+        key = self._manifest_key(directory)
+        if dir_mtime_ns is not None and self._manifest.dir_mtimes.get(key) == dir_mtime_ns:
+            self._manifest.dir_mtimes[key] = self._dir_mtime(directory)
+
+    def _manifest_is_stale(self) -> bool:
+        """Check whether any directory changed since the manifest last scanned it."""
+        if not self._manifest.dir_mtimes:
+            return True
+        return any(
+            self._dir_mtime(self.storage_dir / key) != mtime_ns
+            for key, mtime_ns in list(self._manifest.dir_mtimes.items())
+        )
+
+    def _update_search_index(
+        self,
+        conversation_id: str,
+        messages: List[Dict[str, Any]],
+        start_index: int,
+        replace: bool = False,
+    ) -> None:
+        """Index the messages of a save, marking the index for a rebuild if that fails.
+
+        With ``replace`` the conversation's index rows are rebuilt from ``messages``.
+        """
+        if self._search is None:
+            return
+        try:
+            if replace:
+                self._search.remove(conversation_id)
+            self._search.update(conversation_id, messages, start_index)
+        except (ValueError, sqlite3.Error) as e:
+            logger.warning("Search index update failed", conversation_id=conversation_id, error=str(e))
+            try:
+                self._search.mark_complete(False)
+            except sqlite3.Error:
+                pass
+
+    def rebuild_search_index(self) -> int:
+        """Re-index every stored conversation from its file.
+
+        Returns:
+            Number of conversations indexed
+        """
+        if self._search is None:
+            return 0
+        self._search.clear()
+        count = 0
+        for file_path in list(self._iter_conversation_files()):
+            try:
+                data = self._load_conversation_file(file_path)
+            except (ValueError, IOError):
+                continue
+            if data and data.get("conversation_id"):
+                self._search.update(data["conversation_id"], data.get("messages", []))
+                count += 1
+        self._search.mark_complete()
+        logger.info("Search index rebuilt", count=count)
+        return count
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Find the conversations whose messages best match a query.
+
+        Served from the search index, which is rebuilt first if it is
+        incomplete. Results are ranked by BM25 relevance of each
+        conversation's best-matching message.
+
+        Args:
+            query: Free text; conversations matching any of its words are returned
+            limit: Maximum number of conversations to return
+
+        Returns:
+            Results, best first; see ``BaseConversationStore.search``
+        """
+        if self._search is None:
+            return super().search(query, limit)
+        if not self._search.complete:
+            self.rebuild_search_index()
+        return self._search.search(query, limit)
+
+    def cache_stats(self) -> Dict[str, int]:
+        """Get occupancy and hit/miss counters of the loaded-conversation cache."""
+        return self._cache.stats()
+
+    def refresh_manifest(self, force: bool = False) -> None:
+        """Bring the manifest up to date with the files on disk.
+
+        Only directories whose mtime changed are listed against the manifest,
+        and only files whose mtime differs from their entry are re-read.
+        Unless forced, nothing is scanned while every directory mtime matches
+        the one recorded in the manifest.
+
+        Args:
+            force: Re-check every directory even if none looks changed
+        """
+        if not force and not self._manifest_is_stale():
+            return
+
+        known_by_dir: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for key, entry in self._manifest.files().items():
+            dir_key = PurePosixPath(key).parent.as_posix()
+            known_by_dir.setdefault(dir_key, {})[key] = entry
+
+        dir_mtimes: Dict[str, int] = {}
+        for dir_path, dir_names, file_names in os.walk(self.storage_dir):
+            dir_names[:] = [name for name in dir_names if not name.startswith(".")]
+            directory = Path(dir_path)
+            dir_key = self._manifest_key(directory)
+            dir_mtimes[dir_key] = directory.stat().st_mtime_ns
+            if not force and self._manifest.dir_mtimes.get(dir_key) == dir_mtimes[dir_key]:
+                continue
+
+            known = known_by_dir.get(dir_key, {})
+            present = set()
+            for file_path in self._conversation_files_in(directory, file_names):
+                key = self._manifest_key(file_path)
+                present.add(key)
+                try:
+                    mtime_ns = file_path.stat().st_mtime_ns
+                except FileNotFoundError:
+                    continue
+
+                entry = known.get(key)
+                if entry is not None and entry["mtime_ns"] == mtime_ns:
+                    continue
+
+                try:
+                    data = self._read_conversation_file(file_path)
+                except (ValueError, IOError):
+                    continue
+                if data and data.get("conversation_id"):
+                    self._manifest.update(summarize_conversation(data), key, mtime_ns)
+
+            for key, entry in known.items():
+                if key not in present:
+                    self._manifest.remove(entry["conversation_id"], key)
+
+        for dir_key, known in known_by_dir.items():
+            if dir_key not in dir_mtimes:
+                for key, entry in known.items():
+                    self._manifest.remove(entry["conversation_id"], key)
+
+        self._manifest.dir_mtimes = dir_mtimes
+        self._manifest.mark_dirty()
+        self._manifest.flush()
+        logger.debug("Conversation manifest refreshed", directories=len(dir_mtimes))
+
+    def save_conversation(
+        self,
+        conversation_id: str,
+        messages: List[Dict[str, Any]],
+        metadata: Optional[Dict[str, Any]] = None,
+        start_index: int = 0,
+        expected_version: Optional[int] = None,
+    ) -> Optional[int]:
+        """Save conversation to file.
+
+        Holds the conversation's file lock from reading the stored version to
+        renaming the new file into place, so writers in other processes
+        cannot interleave.
+
+        Args:
+            conversation_id: Unique identifier for the conversation
+            messages: List of message dictionaries
+            metadata: Optional metadata (mood, intent, etc.)
+            start_index: Index in the stored history of the first message in ``messages``;
+                stored messages before it are kept
+            expected_version: Reject the save unless this is the stored version
+
+        Returns:
+            The new version of the conversation
+
+        Raises:
+            ConversationConflictError: If ``expected_version`` is not the stored version
+        """
+        with self._locked(conversation_id):
+            stored = self.load_conversation(conversation_id)
+            version = stored.get("version", 0) if stored else 0
+            _check_version(conversation_id, expected_version, version)
+
+            new_messages = list(messages)
+            if start_index:
+                messages = _stored_prefix(stored, start_index) + new_messages
+            stored_messages, messages, bodies = self._externalize(messages)
+
+            file_path = self._get_conversation_path(conversation_id)
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            dir_mtime_ns = self._dir_mtime(file_path.parent)
+
+            data = {
+                "conversation_id": conversation_id,
+                "updated_at": datetime.now().isoformat(),
+                "version": version + 1,
+                "messages": messages,
+                "metadata": metadata or {},
+            }
+            data["created_at"] = (stored or {}).get("created_at") or data["updated_at"]
+
+            released = self._swap_blob_refs(
+                self._blob_refs((stored or {}).get("messages", [])),
+                self._blob_refs(stored_messages),
+                bodies,
+            )
+            self._write_record(file_path, data, stored_messages)
+            self._remove_stale_files(conversation_id)
+            self._record_in_manifest(file_path, data, dir_mtime_ns)
+            self._release_blobs(released)
+            self._update_search_index(conversation_id, new_messages, start_index)
+
+        logger.debug("Conversation saved", conversation_id=conversation_id, message_count=len(messages))
+        return data["version"]
+
+    def _write_record(self, file_path: Path, data: Dict[str, Any], stored_messages: List[Dict[str, Any]]) -> None:
+        """Atomically write a conversation record with its messages in stored form."""
+        atomic_write(file_path, self.serializer.dumps({**data, "messages": stored_messages}), fsync=self.fsync)
+
+    def import_conversation(self, data: Dict[str, Any]) -> None:
+        """Write a conversation record as given, keeping its timestamps and version.
+
+        Replaces any stored copy of the conversation.
+
+        Args:
+            data: Conversation record as returned by ``load_conversation``
+        """
+        conversation_id = data["conversation_id"]
+        with self._locked(conversation_id):
+            stored = self.load_conversation(conversation_id)
+            stored_messages, messages, bodies = self._externalize(list(data.get("messages", [])))
+            record = {
+                "conversation_id": conversation_id,
+                "created_at": data.get("created_at") or data.get("updated_at"),
+                "updated_at": data.get("updated_at"),
+                "version": data.get("version", 0),
+                "messages": messages,
+                "metadata": data.get("metadata") or {},
+            }
+
+            file_path = self._get_conversation_path(conversation_id)
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            dir_mtime_ns = self._dir_mtime(file_path.parent)
+            released = self._swap_blob_refs(
+                self._blob_refs((stored or {}).get("messages", [])),
+                self._blob_refs(stored_messages),
+                bodies,
+            )
+            self._write_record(file_path, record, stored_messages)
+            self._remove_stale_files(conversation_id)
+            self._record_in_manifest(file_path, record, dir_mtime_ns)
+            self._release_blobs(released)
+            self._update_search_index(conversation_id, messages, 0, replace=True)
+
+    def load_conversation(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """Load conversation from file.
+
+        Args:
+            conversation_id: Unique identifier for the conversation
+
+        Returns:
+            Conversation data or None if not found
+        """
+        file_path = self._find_conversation_path(conversation_id)
+
+        if file_path is None:
+            self._cache.invalidate(conversation_id)
+            return None
+
+        try:
+            stat = file_path.stat()
+            signature = (self._manifest_key(file_path), stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            data = self._cache.get(conversation_id, signature)
+            if data is not None:
+                return data
+
+            data = self._load_conversation_file(file_path)
+            if data is not None:
+                self._cache.put(conversation_id, signature, data, stat.st_size)
+            logger.debug("Conversation loaded", conversation_id=conversation_id)
+            return data
+        except (ValueError, IOError) as e:
+            logger.error("Failed to load conversation", conversation_id=conversation_id, error=str(e))
+            return None
+
+    def delete_conversation(self, conversation_id: str, expected_version: Optional[int] = None) -> bool:
         """Delete a conversation file.
 
+        The version check and the delete hold the conversation's file lock,
+        so a save cannot land between them.
+
         Args:
             conversation_id: Unique identifier for the conversation
+            expected_version: Reject the delete unless this is the stored version
 
         Returns:
             True if deleted, False if not found
+
+        Raises:
+            ConversationConflictError: If ``expected_version`` is not the stored version
         """
-        file_path = self._get_conversation_path(conversation_id)
+        deleted = False
+        with self._locked(conversation_id):
+            if expected_version is not None:
+                stored = self.load_conversation(conversation_id)
+                _check_version(conversation_id, expected_version, stored.get("version", 0) if stored else 0)
 
-        if file_path.exists():
-            file_path.unlink()
+            released: Counter = Counter()
+            current_path = self._find_conversation_path(conversation_id)
+            if self._blobs is not None and current_path is not None:
+                try:
+                    released = self._blob_refs((self._read_conversation_file(current_path) or {}).get("messages", []))
+                except (ValueError, IOError):
+                    pass
+
+            for file_path in self._candidate_paths(conversation_id):
+                if file_path.exists():
+                    dir_mtime_ns = self._dir_mtime(file_path.parent)
+                    file_path.unlink()
+                    self._advance_manifest_mtime(file_path.parent, dir_mtime_ns)
+                    deleted = True
+
+            self._manifest.remove(conversation_id)
+            self._cache.invalidate(conversation_id)
+            if self._search is not None:
+                self._search.remove(conversation_id)
+            self._release_blobs(released)
+
+        if deleted:
             logger.info("Conversation deleted", conversation_id=conversation_id)
-            return True
-        return False
+        return deleted
 
     def list_conversations(self) -> List[Dict[str, Any]]:
         """List all conversations with basic info.
 
+        Served from the manifest; only files changed since it was last
+        refreshed are read. Each entry is checked against its file's mtime,
+        since a file changed in place, such as a journal appended to by
+        another process, leaves its directory's mtime alone.
+
         Returns:
-            List of conversation summaries
+            List of conversation summaries, most recently updated first
         """
-        conversations = []
-
-        for file_path in self.storage_dir.glob("*.json"):
-            try:
-                with open(file_path, "r") as f:
-                    data = json.load(f)
-                    conversations.append({
-                        "conversation_id": data.get("conversation_id"),
-                        "created_at": data.get("created_at"),
-                        "updated_at": data.get("updated_at"),
-                        "message_count": len(data.get("messages", [])),
-                    })
-            except (json.JSONDecodeError, IOError):
-                continue
-
-        conversations.sort(key=lambda x: x.get("updated_at", ""), reverse=True)
-        return conversations
+        self.refresh_manifest()
+        summaries = []
+        for key in self._manifest.files():
+            summary = self._summary_for_file(self.storage_dir / key)
+            if summary is not None:
+                summaries.append(summary)
+        summaries.sort(key=lambda x: x.get("updated_at") or "", reverse=True)
+        return summaries
 
     def clear_all(self) -> int:
         """Delete all conversation files.
@@ -214,20 +1260,105 @@ class ConversationStore:
             Number of conversations deleted
         """
         count = 0
-        for file_path in self.storage_dir.glob("*.json"):
+        for file_path in list(self._iter_conversation_files(include_shadowed=True)):
             file_path.unlink()
             count += 1
 
+        self._manifest.clear()
+        self._cache.clear()
+        self._manifest.dir_mtimes = {}
+        self._manifest.flush()
+        if self._search is not None:
+            self._search.clear()
+            self._search.mark_complete()
+        if self._blobs is not None:
+            self._blobs.clear()
+
         logger.info("All conversations cleared", count=count)
         return count
 
 
-_store: Optional[ConversationStore] = None
+_store: Optional[BaseConversationStore] = None
+
+
+def create_conversation_store(
+    backend: Optional[str] = None,
+    storage_dir: Optional[Path] = None,
+    write_behind: Optional[bool] = None,
+    tiered: Optional[bool] = None,
+) -> BaseConversationStore:
+    """Create a conversation store for the configured backend.
+
+    Args:
+        backend: Backend name, defaults to the configured storage backend
+        storage_dir: Storage location, defaults to the configured directory
+        write_behind: Queue saves for a background writer, defaults to the configured mode
+        tiered: Add the archive tier, defaults to whether archiving is
+            configured; its sweeper is started separately, see
+            ``start_retention_sweeper``
+
+    Returns:
+        A new conversation store
+    """
+    config = AppConfigLoader.app_config().storage
+    backend = backend or config.backend
+    if storage_dir is None and config.storage_dir:
+        storage_dir = Path(config.storage_dir)
+    if write_behind is None:
+        write_behind = config.write_behind
+
+    file_options = {
+        "cache_entries": config.cache_entries,
+        "cache_bytes": config.cache_bytes,
+        "fsync": config.fsync,
+        "shard_layout": config.shard_layout,
+        "search_index": config.search_index,
+        "blob_threshold": config.blob_threshold,
+    }
+
+    store: BaseConversationStore
+    if backend == "json":
+        store = ConversationStore(
+            storage_dir,
+            serializer=get_serializer(config.serializer, config.compression),
+            **file_options,
+        )
+    elif backend == "journal":
+        from app.utils.journal_conversation_store import JournalConversationStore
+
+        store = JournalConversationStore(
+            storage_dir,
+            compact_threshold=config.journal_compact_threshold,
+            **file_options,
+        )
+    elif backend == "sqlite":
+        from app.utils.sqlite_conversation_store import SQLiteConversationStore
+
+        store = SQLiteConversationStore(storage_dir, fsync=config.fsync)
+    else:
+        raise ValueError(f"Unknown conversation store backend: {backend}")
+
+    if write_behind:
+        from app.utils.write_behind_store import WriteBehindConversationStore
+
+        store = WriteBehindConversationStore(
+            store,
+            flush_interval=config.flush_interval,
+            max_pending=config.max_pending_saves,
+        )
+
+    if tiered is None:
+        tiered = config.archive_after_days > 0
+    if tiered:
+        from app.utils.retention import ARCHIVE_DIRNAME, ConversationArchive, TieredConversationStore
+
+        store = TieredConversationStore(store, ConversationArchive((storage_dir or STORAGE_DIR) / ARCHIVE_DIRNAME))
+    return store
 
 
-def get_conversation_store() -> ConversationStore:
+def get_conversation_store() -> BaseConversationStore:
     """Get the global conversation store instance."""
     global _store
     if _store is None:
-        _store = ConversationStore()
+        _store = create_conversation_store()
     return _store
@@ -0,0 +1,75 @@
+"""
+Advisory file locks shared between processes.
+
+Uses ``fcntl.flock`` where available and ``msvcrt.locking`` on Windows. The
+locks are advisory: they only exclude other code that takes the same lock.
+"""
+
+import time
+from pathlib import Path
+from types import TracebackType
+from typing import IO, Optional, Type
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """Exclusive lock on a lock file, held for the duration of a ``with`` block.
+
+    Each ``with`` opens its own handle, so the lock excludes other threads of
+    the same process as well as other processes. Waiting for the lock raises
+    ``TimeoutError`` after ``timeout`` seconds.
+    """
+
+    def __init__(self, path: Path, timeout: float = 30.0) -> None:
+        self.path = path
+        self.timeout = timeout
+        self._file: Optional[IO[bytes]] = None
+
+    def __enter__(self) -> "FileLock":
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        lock_file = open(self.path, "a+b")
+        try:
+            self._acquire(lock_file)
+        except BaseException:
+            lock_file.close()
+            raise
+        self._file = lock_file
+        return self
+
+    def _acquire(self, lock_file: IO[bytes]) -> None:
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+                return
+            except OSError:
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"Timed out waiting for lock {self.path}")
+                time.sleep(0.01)
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        lock_file, self._file = self._file, None
+        if lock_file is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            lock_file.close()
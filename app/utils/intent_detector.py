@@ -47,3 +47,25 @@ def detect_intent(message: str) -> str:
         return "unknown"
     except Exception:
         return "unknown"
+
+
+async def adetect_intent(message: str) -> str:
+    """Detect user intent from their message without blocking the event loop.
+
+    Args:
+        message: The user's message text
+
+    Returns:
+        One of: 'explain', 'learn', or 'unknown'
+    """
+    try:
+        llm = get_llm(temperature=0)
+        response = await llm.ainvoke([
+            HumanMessage(content=INTENT_DETECTOR_PROMPT.format(message=message))
+        ])
+        intent = response.content.strip().lower()
+        if intent in ["explain", "learn"]:
+            return intent
+        return "unknown"
+    except Exception:
+        return "unknown"
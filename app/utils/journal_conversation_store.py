@@ -0,0 +1,511 @@
+"""
+Append-only journal storage for conversations.
+
+Keeps each conversation as a JSON Lines log, so a save appends the messages
+added since the previous save instead of rewriting the whole conversation.
+"""
+
+import json
+import os
+import queue
+import threading
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import structlog
+
+from app.utils.conversation_serializers import KNOWN_SUFFIXES
+from app.utils.conversation_store import ConversationStore, _check_version, _stored_prefix, atomic_write
+
+logger = structlog.get_logger(__name__)
+
+
+class JournalConversationStore(ConversationStore):
+    """Append-only journal storage for conversation history.
+
+    Each conversation is a JSON Lines log. A save appends a single record with
+    only the messages added since the previous save plus the current metadata,
+    so the cost of a turn does not grow with the length of the session. Logs
+    are compacted into one snapshot record by a background thread once they
+    reach ``compact_threshold`` records, and replayed on load.
+
+    Conversations written by ``ConversationStore`` are still readable and are
+    converted to a journal on their next save.
+    """
+
+    file_suffix = ".jsonl"
+    snapshot_chunk_size = 32
+
+    def __init__(
+        self,
+        storage_dir: Optional[Path] = None,
+        compact_threshold: int = 64,
+        cache_entries: int = 256,
+        cache_bytes: int = 64 * 1024 * 1024,
+        fsync: bool = False,
+        shard_layout: str = "flat",
+        search_index: bool = False,
+        blob_threshold: int = 0,
+    ) -> None:
+        super().__init__(
+            storage_dir,
+            cache_entries=cache_entries,
+            cache_bytes=cache_bytes,
+            fsync=fsync,
+            shard_layout=shard_layout,
+            search_index=search_index,
+            blob_threshold=blob_threshold,
+        )
+        self.compact_threshold = compact_threshold
+        # conversation_id -> (persisted message count, record count, created_at,
+        # version, (inode, size) of the journal the state was read from)
+        self._journals: Dict[str, Tuple[int, int, str, int, Tuple[int, int]]] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self._compaction_queue: "queue.Queue[str]" = queue.Queue()
+        self._compaction_pending: set = set()
+        self._compactor: Optional[threading.Thread] = None
+
+    def _read_suffixes(self) -> List[str]:
+        """Get the suffixes of journals and of files written by ``ConversationStore``."""
+        return [self.file_suffix] + list(KNOWN_SUFFIXES)
+
+    def _read_conversation_file(self, file_path: Path) -> Optional[Dict[str, Any]]:
+        """Read a journal by replaying it, or a legacy JSON file directly."""
+        if file_path.suffix != self.file_suffix:
+            return super()._read_conversation_file(file_path)
+        data, _, _ = self._replay(file_path)
+        return data
+
+    def _conversation_lock(self, conversation_id: str) -> threading.Lock:
+        """Get the lock serialising writes and compaction of one conversation."""
+        with self._locks_guard:
+            lock = self._locks.get(conversation_id)
+            if lock is None:
+                lock = self._locks[conversation_id] = threading.Lock()
+            return lock
+
+    @staticmethod
+    def _replay(file_path: Path) -> Tuple[Optional[Dict[str, Any]], int, int]:
+        """Replay a journal into a conversation record.
+
+        Returns:
+            Tuple of (conversation data or None, number of snapshot and append
+            records replayed, byte offset of the end of the last complete record)
+        """
+        data: Optional[Dict[str, Any]] = None
+        records = 0
+        good_offset = 0
+        chunked: List[Dict[str, Any]] = []
+
+        with open(file_path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+
+                good_offset += len(line)
+                if record.get("op") == "chunk":
+                    chunked.extend(record.get("messages", []))
+                    continue
+                records += 1
+
+                if record.get("op") == "snapshot" or data is None:
+                    data = {
+                        "conversation_id": record.get("conversation_id"),
+                        "created_at": record.get("created_at", record.get("updated_at")),
+                        "updated_at": record.get("updated_at"),
+                        "messages": chunked + list(record.get("messages", [])),
+                        "metadata": record.get("metadata", {}),
+                        "version": record.get("version", 0),
+                    }
+                    chunked = []
+                else:
+                    data["messages"].extend(record.get("messages", []))
+                    data["metadata"] = record.get("metadata", data["metadata"])
+                    data["updated_at"] = record.get("updated_at", data["updated_at"])
+                    data["version"] = record.get("version", data["version"])
+
+        return data, records, good_offset
+
+    def _journal_state(
+        self,
+        conversation_id: str,
+        file_path: Path,
+    ) -> Optional[Tuple[int, int, str, int, Tuple[int, int]]]:
+        """Get the persisted message count, record count, creation time and version of a journal.
+
+        The state is remembered along with the journal's inode and size and
+        the journal is replayed again only when another process changed it.
+        A replay truncates any record left incomplete by an interrupted write,
+        so it must run under the conversation's file lock.
+        """
+        try:
+            stat = file_path.stat()
+        except FileNotFoundError:
+            self._journals.pop(conversation_id, None)
+            return None
+
+        state = self._journals.get(conversation_id)
+        if state is not None and state[4] == (stat.st_ino, stat.st_size):
+            return state
+
+        data, records, good_offset = self._replay(file_path)
+        if good_offset < stat.st_size:
+            with open(file_path, "r+b") as f:
+                f.truncate(good_offset)
+            logger.warning("Truncated incomplete journal record", conversation_id=conversation_id)
+
+        if data is None:
+            return None
+
+        state = (len(data["messages"]), records, data["created_at"], data["version"], (stat.st_ino, good_offset))
+        self._journals[conversation_id] = state
+        return state
+
+    def _write_snapshot(
+        self,
+        file_path: Path,
+        conversation_id: str,
+        messages: List[Dict[str, Any]],
+        metadata: Dict[str, Any],
+        created_at: str,
+        updated_at: str,
+        version: int,
+    ) -> None:
+        """Atomically replace a journal with a snapshot.
+
+        The messages are split over ``snapshot_chunk_size``-message chunk
+        records followed by a snapshot record holding the last chunk and the
+        conversation's metadata, so ``load_tail`` can stop reading after the
+        chunks it needs.
+        """
+        split = max(len(messages) - self.snapshot_chunk_size, 0)
+        lines = [
+            json.dumps({"op": "chunk", "messages": messages[i:min(i + self.snapshot_chunk_size, split)]}, default=str)
+            for i in range(0, split, self.snapshot_chunk_size)
+        ]
+        lines.append(json.dumps({
+            "op": "snapshot",
+            "conversation_id": conversation_id,
+            "created_at": created_at,
+            "updated_at": updated_at,
+            "version": version,
+            "count": len(messages),
+            "messages": messages[split:],
+            "metadata": metadata,
+        }, default=str))
+        atomic_write(file_path, ("\n".join(lines) + "\n").encode("utf-8"), fsync=self.fsync)
+
+    def _write_record(self, file_path: Path, data: Dict[str, Any], stored_messages: List[Dict[str, Any]]) -> None:
+        """Write a conversation record as a journal snapshot."""
+        self._write_snapshot(
+            file_path,
+            data["conversation_id"],
+            stored_messages,
+            data["metadata"],
+            data["created_at"],
+            data["updated_at"],
+            data["version"],
+        )
+
+    def import_conversation(self, data: Dict[str, Any]) -> None:
+        """Write a conversation record as a journal snapshot, keeping its timestamps and version.
+
+        Args:
+            data: Conversation record as returned by ``load_conversation``
+        """
+        conversation_id = data["conversation_id"]
+        with self._conversation_lock(conversation_id):
+            super().import_conversation(data)
+            self._journals.pop(conversation_id, None)
+
+    def save_conversation(
+        self,
+        conversation_id: str,
+        messages: List[Dict[str, Any]],
+        metadata: Optional[Dict[str, Any]] = None,
+        start_index: int = 0,
+        expected_version: Optional[int] = None,
+    ) -> Optional[int]:
+        """Append the messages added since the last save to the conversation journal.
+
+        A save that starts before the end of the journal may rewrite stored
+        messages, so the journal is compacted into a snapshot of the new
+        history instead.
+
+        Args:
+            conversation_id: Unique identifier for the conversation
+            messages: Message dictionaries from ``start_index`` to the end of the conversation
+            metadata: Optional metadata (mood, intent, etc.)
+            start_index: Index in the stored history of the first message in ``messages``;
+                stored messages before it are kept
+            expected_version: Reject the save unless this is the stored version
+
+        Returns:
+            The new version of the conversation
+
+        Raises:
+            ConversationConflictError: If ``expected_version`` is not the stored version
+        """
+        now = datetime.now().isoformat()
+        metadata = metadata or {}
+        total = start_index + len(messages)
+        stored_messages, messages, bodies = self._externalize(list(messages))
+
+        with self._conversation_lock(conversation_id), self._locked(conversation_id):
+            file_path = self._get_conversation_path(conversation_id)
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            dir_mtime_ns = self._dir_mtime(file_path.parent)
+            state = self._journal_state(conversation_id, file_path)
+
+            existing = None
+            if state is None:
+                existing_path = self._find_conversation_path(conversation_id)
+                try:
+                    existing = self._read_conversation_file(existing_path) if existing_path else None
+                except (ValueError, IOError):
+                    pass
+            version = (state[3] if state else (existing or {}).get("version", 0)) + 1
+            _check_version(conversation_id, expected_version, version - 1)
+
+            if state is None or state[0] != start_index:
+                created_at = state[2] if state else (existing or {}).get("created_at", now)
+                if state is not None and (start_index or self._blobs is not None):
+                    existing = self._read_conversation_file(file_path)
+                if start_index:
+                    prefix = _stored_prefix(existing, start_index)
+                    messages = self._resolve_blobs([dict(message) for message in prefix]) + messages
+                    stored_messages = prefix + stored_messages
+                    start_index = 0
+                released = self._swap_blob_refs(
+                    self._blob_refs((existing or {}).get("messages", [])),
+                    self._blob_refs(stored_messages),
+                    bodies,
+                )
+                self._write_snapshot(file_path, conversation_id, stored_messages, metadata, created_at, now, version)
+                self._remove_stale_files(conversation_id)
+                self._release_blobs(released)
+                records = 1
+            else:
+                created_at = state[2]
+                appended = stored_messages
+                self._swap_blob_refs(Counter(), self._blob_refs(appended), bodies)
+                record = {
+                    "op": "append",
+                    "updated_at": now,
+                    "version": version,
+                    "count": total,
+                    "messages": appended,
+                    "metadata": metadata,
+                }
+                with open(file_path, "a") as f:
+                    f.write(json.dumps(record, default=str) + "\n")
+                    if self.fsync:
+                        f.flush()
+                        os.fsync(f.fileno())
+                records = state[1] + 1
+
+            stat = file_path.stat()
+            self._journals[conversation_id] = (total, records, created_at, version, (stat.st_ino, stat.st_size))
+            self._record_in_manifest(
+                file_path,
+                {
+                    "conversation_id": conversation_id,
+                    "created_at": created_at,
+                    "updated_at": now,
+                    "version": version,
+                    "messages": messages,
+                    "metadata": metadata,
+                    **({"message_count": total} if start_index else {}),
+                },
+                dir_mtime_ns,
+                cache=start_index == 0,
+            )
+            self._update_search_index(conversation_id, messages, start_index)
+
+        if records >= self.compact_threshold:
+            self._schedule_compaction(conversation_id)
+
+        logger.debug("Conversation journaled", conversation_id=conversation_id, message_count=total)
+        return version
+
+    @staticmethod
+    def _read_records_reversed(file_path: Path, block_size: int = 64 * 1024) -> Iterator[Dict[str, Any]]:
+        """Read journal records from the last to the first without reading the whole file.
+
+        An incomplete trailing record left by an interrupted write is skipped.
+        """
+        with open(file_path, "rb") as f:
+            position = f.seek(0, os.SEEK_END)
+            remainder = b""
+            while position > 0:
+                read_size = min(block_size, position)
+                position -= read_size
+                f.seek(position)
+                lines = (f.read(read_size) + remainder).split(b"\n")
+                remainder = lines.pop(0)
+                for line in reversed(lines):
+                    if line:
+                        try:
+                            yield json.loads(line)
+                        except json.JSONDecodeError:
+                            continue
+            if remainder:
+                try:
+                    yield json.loads(remainder)
+                except json.JSONDecodeError:
+                    pass
+
+    def load_tail(self, conversation_id: str, n: int) -> Optional[Dict[str, Any]]:
+        """Load a conversation with only its newest ``n`` messages.
+
+        Reads journal records backwards from the end of the file until they
+        hold ``n`` messages, so the cost depends on ``n`` rather than on the
+        length of the conversation. Falls back to a full load for legacy files and for
+        journals written before records carried a running message count.
+        """
+        file_path = self._find_conversation_path(conversation_id)
+        if file_path is None or file_path.suffix != self.file_suffix:
+            return super().load_tail(conversation_id, n)
+
+        entry = self._manifest.get(conversation_id)
+        state = self._journals.get(conversation_id)
+        created_at = state[2] if state else (entry or {}).get("created_at")
+
+        chunks: List[List[Dict[str, Any]]] = []
+        collected = 0
+        latest: Optional[Dict[str, Any]] = None
+        message_count = None
+        for record in self._read_records_reversed(file_path):
+            if latest is None:
+                latest = record
+                if record.get("op") == "snapshot":
+                    message_count = record.get("count", len(record.get("messages", [])))
+                    created_at = record.get("created_at", created_at)
+                else:
+                    message_count = record.get("count")
+                if message_count is None or created_at is None:
+                    return super().load_tail(conversation_id, n)
+
+            chunks.append(record.get("messages", []))
+            collected += len(chunks[-1])
+            if collected >= n:
+                break
+
+        if latest is None:
+            return None
+
+        messages = [message for chunk in reversed(chunks) for message in chunk]
+        return {
+            "conversation_id": conversation_id,
+            "created_at": created_at,
+            "updated_at": latest.get("updated_at"),
+            "messages": self._resolve_blobs(messages[-n:]) if n > 0 else [],
+            "message_count": message_count,
+            "version": latest.get("version", 0),
+            "metadata": latest.get("metadata", {}),
+        }
+
+    def compact(self, conversation_id: str) -> bool:
+        """Rewrite a conversation journal as a single snapshot record.
+
+        Args:
+            conversation_id: Unique identifier for the conversation
+
+        Returns:
+            True if the journal was compacted, False if there was nothing to do
+        """
+        with self._conversation_lock(conversation_id), self._locked(conversation_id):
+            file_path = self._get_conversation_path(conversation_id)
+            if not file_path.exists():
+                return False
+
+            data, records, _ = self._replay(file_path)
+            if data is None or records <= 1:
+                return False
+
+            dir_mtime_ns = self._dir_mtime(file_path.parent)
+            self._write_snapshot(
+                file_path,
+                conversation_id,
+                data["messages"],
+                data["metadata"],
+                data["created_at"],
+                data["updated_at"],
+                data["version"],
+            )
+            stat = file_path.stat()
+            self._journals[conversation_id] = (
+                len(data["messages"]),
+                1,
+                data["created_at"],
+                data["version"],
+                (stat.st_ino, stat.st_size),
+            )
+            self._record_in_manifest(file_path, data, dir_mtime_ns, cache=not self._blob_refs(data["messages"]))
+
+        logger.debug("Journal compacted", conversation_id=conversation_id, records=records)
+        return True
+
+    def _schedule_compaction(self, conversation_id: str) -> None:
+        """Queue a conversation for compaction by the background compactor."""
+        with self._locks_guard:
+            if conversation_id in self._compaction_pending:
+                return
+            self._compaction_pending.add(conversation_id)
+
+            if self._compactor is None or not self._compactor.is_alive():
+                self._compactor = threading.Thread(
+                    target=self._run_compactor,
+                    name="journal-compactor",
+                    daemon=True,
+                )
+                self._compactor.start()
+
+        self._compaction_queue.put(conversation_id)
+
+    def _run_compactor(self) -> None:
+        """Compact queued journals until the process exits."""
+        while True:
+            conversation_id = self._compaction_queue.get()
+            with self._locks_guard:
+                self._compaction_pending.discard(conversation_id)
+            try:
+                self.compact(conversation_id)
+            except (ValueError, IOError) as e:
+                logger.error("Journal compaction failed", conversation_id=conversation_id, error=str(e))
+
+    def delete_conversation(self, conversation_id: str, expected_version: Optional[int] = None) -> bool:
+        """Delete a conversation journal and any legacy JSON file.
+
+        Args:
+            conversation_id: Unique identifier for the conversation
+            expected_version: Reject the delete unless this is the stored version
+
+        Returns:
+            True if deleted, False if not found
+
+        Raises:
+            ConversationConflictError: If ``expected_version`` is not the stored version
+        """
+        with self._conversation_lock(conversation_id):
+            deleted = super().delete_conversation(conversation_id, expected_version)
+            self._journals.pop(conversation_id, None)
+
+        return deleted
+
+    def clear_all(self) -> int:
+        """Delete all conversation journals.
+
+        Returns:
+            Number of conversations deleted
+        """
+        count = super().clear_all()
+        self._journals.clear()
+        return count
@@ -0,0 +1,478 @@
+"""
+Tiered retention for stored conversations.
+
+Conversations idle for longer than a threshold are moved out of the hot
+store into compressed archive bundles, one per calendar month of last
+activity, and whole bundles are purged once they pass a hard TTL. Archived
+conversations remain loadable through ``TieredConversationStore``.
+
+The sweeper is not started by creating a store; long-running entry points
+start it with ``start_retention_sweeper``.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import zipfile
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import structlog
+
+from app.utils.conversation_manifest import summarize_conversation
+from app.utils.conversation_serializers import CompactJsonSerializer, loads_conversation
+from app.config.app_config import AppConfigLoader
+from app.utils.conversation_store import (
+    BaseConversationStore,
+    ConversationConflictError,
+    get_conversation_store,
+)
+from app.utils.file_lock import FileLock
+from app.utils.sqlite_wal import enable_wal
+
+logger = structlog.get_logger(__name__)
+
+ARCHIVE_DIRNAME = ".archive"
+CATALOG_FILENAME = "catalog.sqlite3"
+BUNDLE_LOCK_FILENAME = "bundles.lock"
+REVIVE_LOCK_FILENAME = "revive.lock"
+
+CATALOG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS archive_catalog (
+    conversation_id TEXT PRIMARY KEY,
+    bundle TEXT NOT NULL,
+    entry TEXT NOT NULL,
+    updated_at TEXT,
+    summary TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS archive_catalog_bundle ON archive_catalog (bundle);
+CREATE INDEX IF NOT EXISTS archive_catalog_updated ON archive_catalog (updated_at);
+"""
+
+
+def _period_of(timestamp: Optional[str]) -> str:
+    """Get the archive period, 'YYYY-MM', of an ISO timestamp."""
+    try:
+        return datetime.fromisoformat(timestamp or "").strftime("%Y-%m")
+    except ValueError:
+        return datetime.now().strftime("%Y-%m")
+
+
+def _period_end(period: str) -> datetime:
+    """Get the start of the month after an archive period."""
+    year, month = (int(part) for part in period.split("-"))
+    return datetime(year + month // 12, month % 12 + 1, 1)
+
+
+def _catalog_row(conversation_id: str, entry: Dict[str, Any]) -> Tuple[Any, ...]:
+    """Build the catalog row of an archived conversation from its bundle, entry and summary."""
+    summary = {k: v for k, v in entry.items() if k not in ("bundle", "entry")}
+    return (conversation_id, entry["bundle"], entry["entry"], summary.get("updated_at"), json.dumps(summary))
+
+
+class ConversationArchive:
+    """Cold storage for conversations in LZMA-compressed monthly zip bundles.
+
+    A catalog maps each archived conversation to its bundle and entry along
+    with its summary, so loading an archived conversation opens one bundle
+    and decompresses one entry. Removing a conversation only drops it from
+    the catalog; its bytes stay in the bundle until the bundle is purged.
+
+    The catalog is a SQLite database, so processes sharing the archive each
+    write only the rows they change. Bundles are read and written under a
+    file lock, since a zip being appended to has no valid central directory
+    until the append finishes.
+    """
+
+    def __init__(self, archive_dir: Path, busy_timeout: float = 30.0) -> None:
+        self.archive_dir = archive_dir
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        self.catalog_path = archive_dir / CATALOG_FILENAME
+        self.busy_timeout = busy_timeout
+        self._serializer = CompactJsonSerializer()
+        self._bundle_lock = FileLock(archive_dir / BUNDLE_LOCK_FILENAME, timeout=busy_timeout)
+        self._local = threading.local()
+        self._connection().executescript(CATALOG_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get the connection for the current thread, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.catalog_path, timeout=self.busy_timeout, isolation_level=None)
+            enable_wal(conn, self.busy_timeout)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run a write transaction on the current thread's connection."""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _bundle_path(self, period: str) -> Path:
+        return self.archive_dir / f"{period}.zip"
+
+    def __contains__(self, conversation_id: str) -> bool:
+        row = self._connection().execute(
+            "SELECT 1 FROM archive_catalog WHERE conversation_id = ?", (conversation_id,)
+        ).fetchone()
+        return row is not None
+
+    def add(self, conversations: List[Dict[str, Any]]) -> int:
+        """Archive conversation records into the bundles of their last-activity month.
+
+        Args:
+            conversations: Full conversation records
+
+        Returns:
+            Number of conversations archived
+        """
+        by_period: Dict[str, List[Dict[str, Any]]] = {}
+        for data in conversations:
+            by_period.setdefault(_period_of(data.get("updated_at")), []).append(data)
+
+        with self._bundle_lock:
+            rows = []
+            for period, records in by_period.items():
+                with zipfile.ZipFile(self._bundle_path(period), "a", compression=zipfile.ZIP_LZMA) as bundle:
+                    for data in records:
+                        conversation_id = data["conversation_id"]
+                        entry = f"{conversation_id.replace('/', '_')}/{time.time_ns()}.json"
+                        bundle.writestr(entry, self._serializer.dumps(data))
+                        rows.append(
+                            _catalog_row(conversation_id, {**summarize_conversation(data), "bundle": period, "entry": entry})
+                        )
+            with self._transaction() as conn:
+                conn.executemany("INSERT OR REPLACE INTO archive_catalog VALUES (?, ?, ?, ?, ?)", rows)
+
+        return len(rows)
+
+    def load(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """Load an archived conversation, or None if it is not archived."""
+        row = self._connection().execute(
+            "SELECT bundle, entry FROM archive_catalog WHERE conversation_id = ?", (conversation_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        try:
+            with self._bundle_lock, zipfile.ZipFile(self._bundle_path(row[0])) as bundle:
+                payload = bundle.read(row[1])
+        except (KeyError, IOError, zipfile.BadZipFile) as e:
+            logger.error("Failed to read archived conversation", conversation_id=conversation_id, error=str(e))
+            return None
+
+        logger.debug("Conversation loaded from archive", conversation_id=conversation_id)
+        return loads_conversation(payload)
+
+    def remove(self, conversation_id: str) -> bool:
+        """Drop a conversation from the catalog, returning whether it was archived."""
+        with self._transaction() as conn:
+            cursor = conn.execute("DELETE FROM archive_catalog WHERE conversation_id = ?", (conversation_id,))
+        return cursor.rowcount > 0
+
+    def summaries(self) -> List[Dict[str, Any]]:
+        """Get the summaries of every archived conversation, most recently updated first."""
+        rows = self._connection().execute("SELECT summary FROM archive_catalog ORDER BY updated_at DESC")
+        return [json.loads(summary) for (summary,) in rows]
+
+    def purge_before(self, cutoff: datetime) -> Dict[str, int]:
+        """Delete every bundle whose month ended before ``cutoff``.
+
+        Args:
+            cutoff: Naive local time; bundles entirely older than this are deleted
+
+        Returns:
+            Counts of purged bundles and conversations
+        """
+        purged = {"bundles": 0, "conversations": 0}
+        with self._bundle_lock:
+            for bundle_path in sorted(self.archive_dir.glob("*.zip")):
+                period = bundle_path.stem
+                try:
+                    expired = _period_end(period) <= cutoff
+                except ValueError:
+                    continue
+                if not expired:
+                    break
+
+                with self._transaction() as conn:
+                    cursor = conn.execute("DELETE FROM archive_catalog WHERE bundle = ?", (period,))
+                bundle_path.unlink()
+                purged["bundles"] += 1
+                purged["conversations"] += cursor.rowcount
+
+        return purged
+
+    def clear(self) -> int:
+        """Delete every bundle, returning how many conversations were archived."""
+        with self._bundle_lock:
+            with self._transaction() as conn:
+                count = conn.execute("DELETE FROM archive_catalog").rowcount
+            for bundle_path in self.archive_dir.glob("*.zip"):
+                bundle_path.unlink()
+        return count
+
+
+class TieredConversationStore(BaseConversationStore):
+    """Conversation store that falls back to an archive for conversations not in the hot store.
+
+    Saving an archived conversation revives it: the archived record is
+    imported into the hot store with its version, the save is applied on
+    top of it and the conversation is dropped from the archive, so its
+    version keeps counting up across the round trip. Listings and search
+    cover the hot store only; use ``archive.summaries()`` for archived
+    conversations.
+
+    The store owns the retention sweeper started on it with
+    ``start_retention``, and ``close()`` stops it.
+    """
+
+    def __init__(self, hot: BaseConversationStore, archive: ConversationArchive) -> None:
+        self.hot = hot
+        self.archive = archive
+        self.retention: Optional["RetentionManager"] = None
+        self._revive_lock = FileLock(archive.archive_dir / REVIVE_LOCK_FILENAME, timeout=archive.busy_timeout)
+
+    def save_conversation(
+        self,
+        conversation_id: str,
+        messages: List[Dict[str, Any]],
+        metadata: Optional[Dict[str, Any]] = None,
+        start_index: int = 0,
+        expected_version: Optional[int] = None,
+    ) -> Optional[int]:
+        """Save a conversation to the hot store, reviving it first if it is archived."""
+        if conversation_id in self.archive:
+            self._revive(conversation_id)
+        version = self.hot.save_conversation(
+            conversation_id,
+            messages,
+            metadata,
+            start_index=start_index,
+            expected_version=expected_version,
+        )
+        if conversation_id in self.archive:
+            self.archive.remove(conversation_id)
+        return version
+
+    def _revive(self, conversation_id: str) -> None:
+        """Import an archived conversation into the hot store unless it is already there.
+
+        Runs under a lock shared by every process using the archive, so two
+        writers reviving the same conversation cannot import it over each
+        other's first save.
+        """
+        with self._revive_lock:
+            if self.hot.load_tail(conversation_id, 0) is not None:
+                return
+            archived = self.archive.load(conversation_id)
+            if archived is not None:
+                self.hot.import_conversation(archived)
+
+    def import_conversation(self, data: Dict[str, Any]) -> None:
+        """Write a conversation record to the hot store, dropping any archived copy."""
+        self.hot.import_conversation(data)
+        self.archive.remove(data["conversation_id"])
+
+    def load_conversation(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """Load a conversation from the hot store, or from the archive if it was archived."""
+        data = self.hot.load_conversation(conversation_id)
+        if data is None:
+            data = self.archive.load(conversation_id)
+        return data
+
+    def load_tail(self, conversation_id: str, n: int) -> Optional[Dict[str, Any]]:
+        """Load the newest messages of a conversation from the hot store, or from the archive."""
+        data = self.hot.load_tail(conversation_id, n)
+        if data is None:
+            data = super().load_tail(conversation_id, n)
+        return data
+
+    def delete_conversation(self, conversation_id: str, expected_version: Optional[int] = None) -> bool:
+        """Delete a conversation from both tiers; ``expected_version`` is checked against the hot store."""
+        deleted = self.hot.delete_conversation(conversation_id, expected_version)
+        return self.archive.remove(conversation_id) or deleted
+
+    def list_conversations(self) -> List[Dict[str, Any]]:
+        """List the conversations in the hot store."""
+        return self.hot.list_conversations()
+
+    def iter_conversations(self, cursor: Optional[str] = None, **filters: Any) -> Iterator[Dict[str, Any]]:
+        """Iterate over the conversations in the hot store."""
+        return self.hot.iter_conversations(cursor=cursor, **filters)
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Search the conversations in the hot store."""
+        return self.hot.search(query, limit)
+
+    def clear_all(self) -> int:
+        """Delete all conversations from both tiers."""
+        return self.hot.clear_all() + self.archive.clear()
+
+    def start_retention(self, interval: float = 3600.0, **options: Any) -> "RetentionManager":
+        """Start sweeping this store every ``interval`` seconds, unless a sweeper is already running.
+
+        Args:
+            interval: Seconds between sweeps
+            **options: ``RetentionManager`` options
+
+        Returns:
+            The store's retention manager
+        """
+        if self.retention is None:
+            self.retention = RetentionManager(self, **options)
+        self.retention.start(interval)
+        return self.retention
+
+    def close(self) -> None:
+        """Stop the retention sweeper and close the hot store."""
+        if self.retention is not None:
+            self.retention.stop()
+            self.retention = None
+        close = getattr(self.hot, "close", None)
+        if close is not None:
+            close()
+
+
+class RetentionManager:
+    """Moves idle conversations to the archive and purges expired bundles.
+
+    A sweep walks the hot store for conversations not updated in
+    ``archive_after_days``, archiving and deleting them ``batch_size`` at a
+    time and pausing ``pause`` seconds between batches so it never holds up
+    requests for long. A conversation that is saved again while its batch
+    is being archived stays in the hot store: it is only deleted if its
+    version is still the one that was archived.
+    """
+
+    def __init__(
+        self,
+        store: TieredConversationStore,
+        archive_after_days: int = 30,
+        purge_after_days: Optional[int] = 365,
+        batch_size: int = 100,
+        pause: float = 0.05,
+    ) -> None:
+        self.store = store
+        self.archive_after_days = archive_after_days
+        self.purge_after_days = purge_after_days
+        self.batch_size = batch_size
+        self.pause = pause
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _archive_batch(self, summaries: List[Dict[str, Any]], cutoff: str) -> int:
+        """Archive one batch of idle conversations and delete them from the hot store.
+
+        Returns:
+            Number of conversations moved to the archive
+        """
+        records = []
+        for summary in summaries:
+            data = self.store.hot.load_conversation(summary["conversation_id"])
+            if data is not None and (data.get("updated_at") or "") < cutoff:
+                records.append(data)
+        if not records:
+            return 0
+
+        self.store.archive.add(records)
+        archived = 0
+        for data in records:
+            try:
+                self.store.hot.delete_conversation(data["conversation_id"], expected_version=data.get("version", 0))
+                archived += 1
+            except ConversationConflictError:
+                # Saved again since it was read: the hot copy is newer than the archived one
+                self.store.archive.remove(data["conversation_id"])
+        return archived
+
+    def sweep(self, max_batches: Optional[int] = None) -> Dict[str, int]:
+        """Run one retention pass.
+
+        Args:
+            max_batches: Stop after archiving this many batches; the next
+                sweep continues where this one stopped
+
+        Returns:
+            Counts of archived conversations, batches, and purged bundles
+            and conversations
+        """
+        stats = {"archived": 0, "batches": 0, "purged_bundles": 0, "purged_conversations": 0}
+        cutoff = (datetime.now() - timedelta(days=self.archive_after_days)).isoformat()
+
+        cursor = None
+        while max_batches is None or stats["batches"] < max_batches:
+            page = self.store.hot.list_conversations_page(
+                page_size=self.batch_size,
+                cursor=cursor,
+                updated_before=cutoff,
+            )
+            if page["conversations"]:
+                stats["archived"] += self._archive_batch(page["conversations"], cutoff)
+                stats["batches"] += 1
+            cursor = page["next_cursor"]
+            if cursor is None or self._stop.is_set():
+                break
+            time.sleep(self.pause)
+
+        if self.purge_after_days:
+            purged = self.store.archive.purge_before(datetime.now() - timedelta(days=self.purge_after_days))
+            stats["purged_bundles"] = purged["bundles"]
+            stats["purged_conversations"] = purged["conversations"]
+
+        logger.info("Retention sweep finished", **stats)
+        return stats
+
+    def start(self, interval: float = 3600.0) -> None:
+        """Run a sweep every ``interval`` seconds on a background thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,), name="retention-sweeper", daemon=True)
+        self._thread.start()
+
+    def _run(self, interval: float) -> None:
+        while not self._stop.is_set():
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error("Retention sweep failed", error=str(e))
+            self._stop.wait(interval)
+
+    def stop(self) -> None:
+        """Stop the background sweeper after its current batch."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def start_retention_sweeper(store: Optional[BaseConversationStore] = None) -> Optional[RetentionManager]:
+    """Start the configured retention sweeper on a conversation store.
+
+    Args:
+        store: Store to sweep, defaults to the global conversation store
+
+    Returns:
+        The running retention manager, or None if the store has no archive
+        tier or ``retention_sweep_interval`` is 0
+    """
+    config = AppConfigLoader.app_config().storage
+    store = store or get_conversation_store()
+    if not isinstance(store, TieredConversationStore) or config.retention_sweep_interval <= 0:
+        return None
+    return store.start_retention(
+        config.retention_sweep_interval,
+        archive_after_days=config.archive_after_days,
+        purge_after_days=config.purge_after_days or None,
+        batch_size=config.retention_batch_size,
+    )
@@ -0,0 +1,536 @@
+"""
+SQLite-backed conversation storage.
+
+Stores conversations and their messages in separate tables of a single
+SQLite database running in WAL mode, so listings, partial reads and
+concurrent writers do not depend on one file per conversation.
+"""
+
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import structlog
+
+from app.utils.conversation_search import (
+    SEARCH_SCHEMA,
+    SEQ_BITS,
+    clear_index,
+    index_messages,
+    remove_conversation,
+    search_index,
+)
+from app.utils.conversation_store import STORAGE_DIR, BaseConversationStore, _check_version
+from app.utils.sqlite_wal import enable_wal
+
+logger = structlog.get_logger(__name__)
+
+DB_FILENAME = "conversations.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversations (
+    conversation_id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    message_count INTEGER NOT NULL DEFAULT 0,
+    metadata TEXT NOT NULL DEFAULT '{}',
+    version INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS idx_conversations_updated_at ON conversations (updated_at);
+
+CREATE TABLE IF NOT EXISTS messages (
+    conversation_id TEXT NOT NULL REFERENCES conversations (conversation_id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    extra TEXT,
+    PRIMARY KEY (conversation_id, seq)
+) WITHOUT ROWID;
+"""
+
+
+def _message_to_row(conversation_id: str, seq: int, message: Dict[str, Any]) -> tuple:
+    """Split a message dict into its indexed columns and a JSON remainder.
+
+    Content that is not a string, such as a list of content blocks, stays in
+    the remainder, which overrides the empty ``content`` column on load.
+    """
+    content = message.get("content", "")
+    text_content = isinstance(content, str)
+    extra = {k: v for k, v in message.items() if k != "role" and (k != "content" or not text_content)}
+    return (
+        conversation_id,
+        seq,
+        message.get("role", ""),
+        content if text_content else "",
+        json.dumps(extra, default=str) if extra else None,
+    )
+
+
+def _row_to_message(row: sqlite3.Row) -> Dict[str, Any]:
+    """Rebuild a message dict from a messages row."""
+    message: Dict[str, Any] = {"role": row["role"], "content": row["content"]}
+    if row["extra"]:
+        message.update(json.loads(row["extra"]))
+    return message
+
+
+class SQLiteConversationStore(BaseConversationStore):
+    """SQLite storage for conversation history.
+
+    Each thread gets its own connection. Writes run in ``BEGIN IMMEDIATE``
+    transactions so concurrent writers, including other processes, queue on
+    the database lock instead of failing on upgrade. Message text is kept in
+    a full-text index in the same database, updated in the transaction that
+    writes the messages.
+    """
+
+    def __init__(
+        self,
+        storage_dir: Optional[Path] = None,
+        busy_timeout: float = 30.0,
+        fsync: bool = False,
+        batch_size: int = 256,
+    ) -> None:
+        self.storage_dir = storage_dir or STORAGE_DIR
+        self.storage_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.storage_dir / DB_FILENAME
+        self.busy_timeout = busy_timeout
+        self.fsync = fsync
+        self.batch_size = batch_size
+        self._local = threading.local()
+
+        self._connection().executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self) -> None:
+        """Add columns and tables introduced after a database was created."""
+        conn = self._connection()
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(conversations)")}
+        if "version" not in columns:
+            conn.execute("ALTER TABLE conversations ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+
+        with self._transaction() as conn:
+            if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'search_documents'").fetchone() is not None:
+                return
+            for statement in SEARCH_SCHEMA.split(";"):
+                if statement.strip():
+                    conn.execute(statement)
+            conn.execute(
+                "INSERT INTO search_documents (conversation_id, message_count) "
+                "SELECT conversation_id, message_count FROM conversations"
+            )
+            conn.execute(
+                f"""
+                INSERT INTO search_messages (rowid, content, role)
+                SELECT (d.doc_id << {SEQ_BITS}) + m.seq, m.content, m.role
+                FROM messages m JOIN search_documents d ON d.conversation_id = m.conversation_id
+                """
+            )
+        logger.info("Search index built", db_path=str(self.db_path))
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get the connection for the current thread, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            enable_wal(conn, self.busy_timeout)
+            conn.execute("PRAGMA synchronous=FULL" if self.fsync else "PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run a write transaction on the current thread's connection."""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def save_conversation(
+        self,
+        conversation_id: str,
+        messages: List[Dict[str, Any]],
+        metadata: Optional[Dict[str, Any]] = None,
+        start_index: int = 0,
+        expected_version: Optional[int] = None,
+    ) -> Optional[int]:
+        """Save a conversation.
+
+        Stored messages before ``start_index`` are kept and the history is
+        rewritten from ``start_index`` on, so messages that were edited or
+        dropped since the last save do not linger.
+
+        Args:
+            conversation_id: Unique identifier for the conversation
+            messages: Message dictionaries from ``start_index`` to the end of the conversation
+            metadata: Optional metadata (mood, intent, etc.)
+            start_index: Index in the stored history of the first message in ``messages``;
+                stored messages before it are kept
+            expected_version: Reject the save unless this is the stored version
+
+        Returns:
+            The new version of the conversation
+
+        Raises:
+            ValueError: If fewer than ``start_index`` messages are stored
+            ConversationConflictError: If ``expected_version`` is not the stored version
+        """
+        now = datetime.now().isoformat()
+        total = start_index + len(messages)
+
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT message_count, version FROM conversations WHERE conversation_id = ?",
+                (conversation_id,),
+            ).fetchone()
+            stored_count = row["message_count"] if row else 0
+            version = (row["version"] if row else 0) + 1
+            _check_version(conversation_id, expected_version, version - 1)
+
+            if stored_count < start_index:
+                raise ValueError(f"Cannot save from message {start_index}: only {stored_count} stored")
+            if start_index < stored_count:
+                conn.execute(
+                    "DELETE FROM messages WHERE conversation_id = ? AND seq >= ?",
+                    (conversation_id, start_index),
+                )
+                stored_count = start_index
+
+            conn.execute(
+                """
+                INSERT INTO conversations (conversation_id, created_at, updated_at, message_count, metadata, version)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (conversation_id) DO UPDATE SET
+                    updated_at = excluded.updated_at,
+                    message_count = excluded.message_count,
+                    metadata = excluded.metadata,
+                    version = excluded.version
+                """,
+                (conversation_id, now, now, total, json.dumps(metadata or {}, default=str), version),
+            )
+            conn.executemany(
+                "INSERT INTO messages (conversation_id, seq, role, content, extra) VALUES (?, ?, ?, ?, ?)",
+                (
+                    _message_to_row(conversation_id, seq, message)
+                    for seq, message in enumerate(messages[stored_count - start_index:], start=stored_count)
+                ),
+            )
+            index_messages(conn, conversation_id, messages, start_index)
+
+        logger.debug("Conversation saved", conversation_id=conversation_id, message_count=total)
+        return version
+
+    def import_conversation(self, data: Dict[str, Any]) -> None:
+        """Write a conversation record as given, keeping its timestamps and version.
+
+        Replaces any stored copy of the conversation in a single transaction.
+
+        Args:
+            data: Conversation record as returned by ``load_conversation``
+        """
+        conversation_id = data["conversation_id"]
+        messages = list(data.get("messages", []))
+
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM conversations WHERE conversation_id = ?", (conversation_id,))
+            remove_conversation(conn, conversation_id)
+            conn.execute(
+                """
+                INSERT INTO conversations (conversation_id, created_at, updated_at, message_count, metadata, version)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    conversation_id,
+                    data.get("created_at") or data.get("updated_at"),
+                    data.get("updated_at"),
+                    len(messages),
+                    json.dumps(data.get("metadata") or {}, default=str),
+                    data.get("version", 0),
+                ),
+            )
+            conn.executemany(
+                "INSERT INTO messages (conversation_id, seq, role, content, extra) VALUES (?, ?, ?, ?, ?)",
+                (_message_to_row(conversation_id, seq, message) for seq, message in enumerate(messages)),
+            )
+            index_messages(conn, conversation_id, messages)
+
+    def load_conversation(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """Load a conversation.
+
+        Args:
+            conversation_id: Unique identifier for the conversation
+
+        Returns:
+            Conversation data or None if not found
+        """
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT * FROM conversations WHERE conversation_id = ?",
+            (conversation_id,),
+        ).fetchone()
+        if row is None:
+            return None
+
+        return {
+            "conversation_id": row["conversation_id"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+            "version": row["version"],
+            "messages": self.get_messages(conversation_id),
+            "metadata": json.loads(row["metadata"]),
+        }
+
+    def load_tail(self, conversation_id: str, n: int) -> Optional[Dict[str, Any]]:
+        """Load a conversation with only its newest ``n`` messages.
+
+        Reads the last ``n`` rows of the messages primary key backwards.
+
+        Args:
+            conversation_id: Unique identifier for the conversation
+            n: Maximum number of messages to return
+
+        Returns:
+            Conversation data with the last ``n`` messages and the total
+            ``message_count``, or None if not found
+        """
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT * FROM conversations WHERE conversation_id = ?",
+            (conversation_id,),
+        ).fetchone()
+        if row is None:
+            return None
+
+        rows = conn.execute(
+            "SELECT role, content, extra FROM messages WHERE conversation_id = ? ORDER BY seq DESC LIMIT ?",
+            (conversation_id, max(n, 0)),
+        ).fetchall()
+        return {
+            "conversation_id": row["conversation_id"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+            "messages": [_row_to_message(message_row) for message_row in reversed(rows)],
+            "message_count": row["message_count"],
+            "version": row["version"],
+            "metadata": json.loads(row["metadata"]),
+        }
+
+    def get_messages(self, conversation_id: str) -> List[Dict[str, Any]]:
+        """Get just the messages from a conversation.
+
+        Args:
+            conversation_id: Unique identifier for the conversation
+
+        Returns:
+            List of messages or empty list if not found
+        """
+        rows = self._connection().execute(
+            "SELECT role, content, extra FROM messages WHERE conversation_id = ? ORDER BY seq",
+            (conversation_id,),
+        )
+        return [_row_to_message(row) for row in rows]
+
+    def add_message(
+        self,
+        conversation_id: str,
+        role: str,
+        content: str,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Add a single message to a conversation without rewriting it.
+
+        Args:
+            conversation_id: Unique identifier for the conversation
+            role: Message role ('user' or 'assistant')
+            content: Message content
+            metadata: Optional message metadata
+        """
+        now = datetime.now().isoformat()
+        message: Dict[str, Any] = {"role": role, "content": content, "timestamp": now}
+        if metadata:
+            message["metadata"] = metadata
+
+        with self._transaction() as conn:
+            conn.execute(
+                """
+                INSERT INTO conversations (conversation_id, created_at, updated_at, version)
+                VALUES (?, ?, ?, 1)
+                ON CONFLICT (conversation_id) DO UPDATE SET
+                    updated_at = excluded.updated_at,
+                    version = version + 1
+                """,
+                (conversation_id, now, now),
+            )
+            seq = conn.execute(
+                "SELECT message_count FROM conversations WHERE conversation_id = ?",
+                (conversation_id,),
+            ).fetchone()["message_count"]
+            conn.execute(
+                "INSERT INTO messages (conversation_id, seq, role, content, extra) VALUES (?, ?, ?, ?, ?)",
+                _message_to_row(conversation_id, seq, message),
+            )
+            conn.execute(
+                "UPDATE conversations SET message_count = ? WHERE conversation_id = ?",
+                (seq + 1, conversation_id),
+            )
+            index_messages(conn, conversation_id, [message], seq)
+
+    def update_metadata(
+        self,
+        conversation_id: str,
+        metadata: Dict[str, Any],
+    ) -> None:
+        """Update conversation metadata without touching its messages.
+
+        Args:
+            conversation_id: Unique identifier for the conversation
+            metadata: Metadata to update (merged with existing)
+        """
+        now = datetime.now().isoformat()
+
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT metadata FROM conversations WHERE conversation_id = ?",
+                (conversation_id,),
+            ).fetchone()
+            merged = json.loads(row["metadata"]) if row else {}
+            merged.update(metadata)
+            conn.execute(
+                """
+                INSERT INTO conversations (conversation_id, created_at, updated_at, metadata, version)
+                VALUES (?, ?, ?, ?, 1)
+                ON CONFLICT (conversation_id) DO UPDATE SET
+                    updated_at = excluded.updated_at,
+                    metadata = excluded.metadata,
+                    version = version + 1
+                """,
+                (conversation_id, now, now, json.dumps(merged, default=str)),
+            )
+
+    def delete_conversation(self, conversation_id: str, expected_version: Optional[int] = None) -> bool:
+        """Delete a conversation and its messages.
+
+        Args:
+            conversation_id: Unique identifier for the conversation
+            expected_version: Reject the delete unless this is the stored version
+
+        Returns:
+            True if deleted, False if not found
+
+        Raises:
+            ConversationConflictError: If ``expected_version`` is not the stored version
+        """
+        with self._transaction() as conn:
+            if expected_version is not None:
+                row = conn.execute(
+                    "SELECT version FROM conversations WHERE conversation_id = ?",
+                    (conversation_id,),
+                ).fetchone()
+                _check_version(conversation_id, expected_version, row["version"] if row else 0)
+            cursor = conn.execute("DELETE FROM conversations WHERE conversation_id = ?", (conversation_id,))
+            remove_conversation(conn, conversation_id)
+
+        if cursor.rowcount:
+            logger.info("Conversation deleted", conversation_id=conversation_id)
+            return True
+        return False
+
+    def list_conversations(self) -> List[Dict[str, Any]]:
+        """List all conversations with basic info.
+
+        Returns:
+            List of conversation summaries, most recently updated first
+        """
+        rows = self._connection().execute(
+            """
+            SELECT conversation_id, created_at, updated_at, message_count, version,
+                   json_extract(metadata, '$.user_intent') AS intent
+            FROM conversations
+            ORDER BY updated_at DESC
+            """
+        )
+        return [dict(row) for row in rows]
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Find the conversations whose messages best match a query.
+
+        Results are ranked by BM25 relevance of each conversation's
+        best-matching message, read from the full-text index.
+
+        Args:
+            query: Free text; conversations matching any of its words are returned
+            limit: Maximum number of conversations to return
+
+        Returns:
+            Results, best first; see ``BaseConversationStore.search``
+        """
+        return search_index(self._connection(), query, limit)
+
+    def _iter_summaries(self, cursor: Optional[str], filters: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Stream summaries newest conversation ID first, ``batch_size`` rows per query.
+
+        Uses keyset pagination on the primary key with the filters applied in
+        SQL, so each batch is an index range scan and no read transaction is
+        held open between batches. The cursor is the last conversation ID
+        returned.
+        """
+        conditions = []
+        params: List[Any] = []
+        if filters.get("updated_after"):
+            conditions.append("updated_at >= ?")
+            params.append(filters["updated_after"])
+        if filters.get("updated_before"):
+            conditions.append("updated_at < ?")
+            params.append(filters["updated_before"])
+        if filters.get("intent"):
+            conditions.append("json_extract(metadata, '$.user_intent') = ?")
+            params.append(filters["intent"])
+        if filters.get("min_messages"):
+            conditions.append("message_count >= ?")
+            params.append(filters["min_messages"])
+
+        while True:
+            where = conditions + (["conversation_id < ?"] if cursor is not None else [])
+            query = f"""
+                SELECT conversation_id, created_at, updated_at, message_count, version,
+                       json_extract(metadata, '$.user_intent') AS intent
+                FROM conversations
+                {"WHERE " + " AND ".join(where) if where else ""}
+                ORDER BY conversation_id DESC
+                LIMIT ?
+            """
+            batch_params = params + ([cursor] if cursor is not None else []) + [self.batch_size]
+            rows = self._connection().execute(query, batch_params).fetchall()
+
+            for row in rows:
+                yield {**dict(row), "cursor": row["conversation_id"]}
+            if len(rows) < self.batch_size:
+                return
+            cursor = rows[-1]["conversation_id"]
+
+    def clear_all(self) -> int:
+        """Delete all conversations.
+
+        Returns:
+            Number of conversations deleted
+        """
+        with self._transaction() as conn:
+            count = conn.execute("SELECT COUNT(*) FROM conversations").fetchone()[0]
+            conn.execute("DELETE FROM messages")
+            conn.execute("DELETE FROM conversations")
+            clear_index(conn)
+
+        logger.info("All conversations cleared", count=count)
+        return count
@@ -0,0 +1,29 @@
+"""
+Shared setup for the SQLite databases of the conversation stores.
+"""
+
+import sqlite3
+import time
+
+
+def enable_wal(conn: sqlite3.Connection, timeout: float) -> None:
+    """Switch a connection's database to WAL mode.
+
+    Changing the journal mode does not wait on SQLite's busy handler, so
+    when several processes open a new database at once some of them see it
+    locked. Those retry with backoff for up to ``timeout`` seconds.
+
+    Raises:
+        sqlite3.OperationalError: If the database stays locked past ``timeout``
+    """
+    deadline = time.monotonic() + timeout
+    delay = 0.01
+    while True:
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            return
+        except sqlite3.OperationalError as e:
+            if "locked" not in str(e) or time.monotonic() >= deadline:
+                raise
+            time.sleep(delay)
+            delay = min(delay * 2, 0.5)
@@ -0,0 +1,64 @@
+"""
+Token streaming for agent responses.
+
+A turn that is streamed sets a token sink for its context. Agents that
+generate the response text push each chunk into the sink as the model
+produces it; agents called outside a streamed turn see no sink and
+generate the whole response at once as before. The sink is held in a
+context variable, so it follows the turn through the workflow's worker
+threads, the agent tools and the event loops they run agents on.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator, Optional
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+TokenSink = Callable[[str], None]
+
+_token_sink: ContextVar[Optional[TokenSink]] = ContextVar("token_sink", default=None)
+
+
+@contextmanager
+def token_sink(sink: TokenSink) -> Iterator[None]:
+    """Stream the tokens generated within this block into ``sink``."""
+    token = _token_sink.set(sink)
+    try:
+        yield
+    finally:
+        _token_sink.reset(token)
+
+
+def streaming_enabled() -> bool:
+    """Check whether the current turn is being streamed."""
+    return _token_sink.get() is not None
+
+
+def emit_token(text: str) -> None:
+    """Push a chunk of response text to the current turn's sink, if any."""
+    sink = _token_sink.get()
+    if sink is None or not text:
+        return
+    try:
+        sink(text)
+    except Exception as e:
+        # A broken consumer must not fail the turn that is producing the response
+        logger.warning("Token sink failed", error=str(e))
+
+
+def chunk_text(content: Any) -> str:
+    """Extract the text of a message chunk's content, which may be a string or a list of content blocks."""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        parts = []
+        for block in content:
+            if isinstance(block, dict) and block.get("type") == "text":
+                parts.append(block.get("text", ""))
+            elif isinstance(block, str):
+                parts.append(block)
+        return "".join(parts)
+    return ""
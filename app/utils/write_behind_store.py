@@ -0,0 +1,373 @@
+"""
+Write-behind wrapper for conversation stores.
+
+Takes conversation saves off the response path: saves are queued in memory
+and written by a background thread, with repeated saves of the same
+conversation coalesced into one write.
+"""
+
+import atexit
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import structlog
+
+from app.utils.conversation_store import BaseConversationStore
+
+logger = structlog.get_logger(__name__)
+
+# (start index, messages, metadata, monotonic time first queued)
+PendingSave = Tuple[int, List[Dict[str, Any]], Optional[Dict[str, Any]], float]
+
+
+class ConversationWriteError(Exception):
+    """Raised when queued saves could not be written; they stay queued for a retry."""
+
+    def __init__(self, conversation_ids: List[str]) -> None:
+        super().__init__(f"Queued saves of {len(conversation_ids)} conversation(s) could not be written")
+        self.conversation_ids = conversation_ids
+
+
+def _merge_saves(earlier: PendingSave, later: PendingSave) -> Optional[PendingSave]:
+    """Combine two queued saves of a conversation into one.
+
+    The later save's messages replace the earlier one's from its start
+    index on, and its metadata wins. Returns None if the later save starts
+    past the end of the earlier one, leaving a gap.
+    """
+    start_index, messages, _, queued_at = earlier
+    later_start, later_messages, metadata, _ = later
+    if later_start > start_index + len(messages):
+        return None
+    if later_start <= start_index:
+        return (later_start, later_messages, metadata, queued_at)
+    return (start_index, messages[:later_start - start_index] + later_messages, metadata, queued_at)
+
+
+def _append_save(saves: List[PendingSave], save: PendingSave) -> None:
+    """Queue a save after ``saves``, merging it into the last one where possible."""
+    merged = _merge_saves(saves[-1], save) if saves else None
+    if merged is None:
+        saves.append(save)
+    else:
+        saves[-1] = merged
+
+
+class WriteBehindConversationStore(BaseConversationStore):
+    """Conversation store that queues saves for a background writer.
+
+    Only the latest queued save of each conversation is written. The writer
+    flushes when ``max_pending`` conversations are queued or when the oldest
+    queued save is ``flush_interval`` seconds old, so ``flush_interval`` is
+    the window of saves a crash can lose. Reads flush the conversation they
+    touch first, ``flush()`` writes everything queued, and ``close()`` runs
+    at interpreter exit.
+
+    Saves that fail to write stay queued, in order and ahead of any later
+    save of the same conversation. The writer retries them with exponential
+    backoff and gives up after ``max_attempts`` failures; ``flush()`` and
+    ``close()`` retry them too and raise ``ConversationWriteError`` while any
+    remain unwritten, and ``failed_conversations()`` lists them.
+    """
+
+    def __init__(
+        self,
+        store: BaseConversationStore,
+        flush_interval: float = 1.0,
+        max_pending: int = 64,
+        max_attempts: int = 5,
+        max_backoff: float = 60.0,
+    ) -> None:
+        self.store = store
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self.max_backoff = max_backoff
+        self.saves_queued = 0
+        self.saves_written = 0
+        self._pending: "OrderedDict[str, PendingSave]" = OrderedDict()
+        # conversation_id -> saves to write in order, failed attempts and monotonic time of the next retry
+        self._failed: Dict[str, Tuple[List[PendingSave], int, float]] = {}
+        self._condition = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._closed = False
+
+        self._writer = threading.Thread(target=self._run_writer, name="conversation-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def save_conversation(
+        self,
+        conversation_id: str,
+        messages: List[Dict[str, Any]],
+        metadata: Optional[Dict[str, Any]] = None,
+        start_index: int = 0,
+        expected_version: Optional[int] = None,
+    ) -> Optional[int]:
+        """Queue a conversation save for the background writer.
+
+        A save starting inside the messages of a queued save is merged into
+        it. A save with an ``expected_version`` cannot be checked later, so it
+        is written immediately after any queued save of the conversation.
+
+        Args:
+            conversation_id: Unique identifier for the conversation
+            messages: Message dictionaries from ``start_index`` to the end of the conversation
+            metadata: Optional metadata (mood, intent, etc.)
+            start_index: Index in the stored history of the first message in ``messages``
+            expected_version: Reject the save unless this is the stored version
+
+        Returns:
+            The new version if the save was written, None if it was queued
+
+        Raises:
+            ConversationWriteError: If ``expected_version`` is given and a
+                queued save of the conversation cannot be written
+        """
+        if expected_version is not None:
+            with self._write_lock:
+                self._write_pending(conversation_id, raise_errors=True)
+                return self.store.save_conversation(
+                    conversation_id,
+                    messages,
+                    metadata,
+                    start_index=start_index,
+                    expected_version=expected_version,
+                )
+
+        with self._condition:
+            previous = self._pending.get(conversation_id)
+        if previous is not None and start_index > previous[0] + len(previous[1]):
+            with self._write_lock:
+                self._write_pending(conversation_id)
+
+        with self._condition:
+            if not self._closed:
+                save = (start_index, list(messages), dict(metadata or {}), time.monotonic())
+                if conversation_id in self._failed:
+                    _append_save(self._failed[conversation_id][0], save)
+                else:
+                    previous = self._pending.get(conversation_id)
+                    if previous is not None:
+                        save = _merge_saves(previous, save) or save
+                    self._pending[conversation_id] = save
+                self.saves_queued += 1
+                if len(self._pending) == 1 or len(self._pending) >= self.max_pending:
+                    self._condition.notify()
+                return None
+
+        return self.store.save_conversation(conversation_id, messages, metadata, start_index=start_index)
+
+    def flush(self, conversation_id: Optional[str] = None) -> int:
+        """Write queued saves now, retrying any that failed before.
+
+        Args:
+            conversation_id: Only write this conversation's queued saves
+
+        Returns:
+            Number of conversations written
+
+        Raises:
+            ConversationWriteError: If any of the saves could not be written;
+                they stay queued
+        """
+        with self._write_lock:
+            written = self._write_pending(conversation_id, raise_errors=True)
+        if written:
+            logger.debug("Queued conversation saves written", count=written)
+        return written
+
+    def _write_pending(
+        self,
+        conversation_id: Optional[str] = None,
+        raise_errors: bool = False,
+        due_only: bool = False,
+    ) -> int:
+        """Write queued saves, all of them or one conversation's. Must hold the write lock.
+
+        A conversation's failed saves are written before its queued one. If a
+        write fails, the saves not yet written are kept, ahead of any save of
+        the conversation queued meanwhile, and retried after a backoff.
+
+        Args:
+            conversation_id: Only write this conversation's queued saves
+            raise_errors: Raise ``ConversationWriteError`` if any write failed
+            due_only: Skip failed saves whose retry is not due, or that
+                failed ``max_attempts`` times
+
+        Returns:
+            Number of conversations written
+        """
+        now = time.monotonic()
+        with self._condition:
+            if conversation_id is None:
+                failed_ids = [
+                    failed_id
+                    for failed_id, (_, attempts, retry_at) in self._failed.items()
+                    if not due_only or (attempts < self.max_attempts and retry_at <= now)
+                ]
+                batch_ids = failed_ids + [pending_id for pending_id in self._pending if pending_id not in self._failed]
+            else:
+                batch_ids = [conversation_id] if conversation_id in self._pending or conversation_id in self._failed else []
+            batch = []
+            for batch_id in batch_ids:
+                attempts = self._failed[batch_id][1] if batch_id in self._failed else 0
+                batch.append((batch_id, self._drop_queued(batch_id), attempts))
+
+        written = 0
+        errors = []
+        for batch_id, saves, attempts in batch:
+            for i, (start_index, messages, metadata, _) in enumerate(saves):
+                try:
+                    self.store.save_conversation(batch_id, messages, metadata, start_index=start_index)
+                except Exception as e:
+                    attempts += 1
+                    logger.error(
+                        "Queued conversation save failed", conversation_id=batch_id, attempts=attempts, error=str(e)
+                    )
+                    errors.append(batch_id)
+                    remaining = saves[i:]
+                    backoff = min(self.flush_interval * 2 ** (attempts - 1), self.max_backoff)
+                    with self._condition:
+                        if batch_id in self._pending:
+                            _append_save(remaining, self._pending.pop(batch_id))
+                        self._failed[batch_id] = (remaining, attempts, time.monotonic() + backoff)
+                    break
+            else:
+                written += 1
+
+        self.saves_written += written
+        if errors and raise_errors:
+            raise ConversationWriteError(errors)
+        return written
+
+    def _run_writer(self) -> None:
+        """Flush queued saves whenever a size or age threshold is reached or a retry is due."""
+        while True:
+            with self._condition:
+                while not self._closed:
+                    if len(self._pending) >= self.max_pending:
+                        break
+                    deadlines = [
+                        retry_at for _, attempts, retry_at in self._failed.values() if attempts < self.max_attempts
+                    ]
+                    if self._pending:
+                        deadlines.append(next(iter(self._pending.values()))[3] + self.flush_interval)
+                    timeout = min(deadlines) - time.monotonic() if deadlines else None
+                    if timeout is not None and timeout <= 0:
+                        break
+                    self._condition.wait(timeout)
+                if self._closed:
+                    return
+            with self._write_lock:
+                written = self._write_pending(due_only=True)
+            if written:
+                logger.debug("Queued conversation saves written", count=written)
+
+    def close(self) -> None:
+        """Stop the background writer and write everything still queued.
+
+        Raises:
+            ConversationWriteError: If queued saves could not be written
+        """
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify()
+        self._writer.join()
+        try:
+            self.flush()
+        finally:
+            logger.info(
+                "Conversation writer stopped",
+                saves_queued=self.saves_queued,
+                saves_written=self.saves_written,
+                unwritten=self.failed_conversations(),
+            )
+
+    def pending_count(self) -> int:
+        """Get the number of conversations with a queued or failed save."""
+        with self._condition:
+            return len(self._pending.keys() | self._failed.keys())
+
+    def failed_conversations(self) -> Dict[str, int]:
+        """Get the conversations whose queued saves failed to write, with their failed attempts."""
+        with self._condition:
+            return {conversation_id: attempts for conversation_id, (_, attempts, _) in self._failed.items()}
+
+    def _drop_queued(self, conversation_id: str) -> List[PendingSave]:
+        """Take a conversation's failed and queued saves off the queue, in write order."""
+        with self._condition:
+            saves = self._failed.pop(conversation_id, ([], 0, 0.0))[0]
+            if conversation_id in self._pending:
+                _append_save(saves, self._pending.pop(conversation_id))
+        return saves
+
+    def import_conversation(self, data: Dict[str, Any]) -> None:
+        """Drop any queued save and write a conversation record as given."""
+        with self._write_lock:
+            self._drop_queued(data["conversation_id"])
+            self.store.import_conversation(data)
+
+    def load_conversation(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """Load a conversation, writing its queued save first."""
+        self.flush(conversation_id)
+        return self.store.load_conversation(conversation_id)
+
+    def load_tail(self, conversation_id: str, n: int) -> Optional[Dict[str, Any]]:
+        """Load the newest messages of a conversation, writing its queued save first."""
+        self.flush(conversation_id)
+        return self.store.load_tail(conversation_id, n)
+
+    def get_messages(self, conversation_id: str) -> List[Dict[str, Any]]:
+        """Get the messages of a conversation, writing its queued save first."""
+        self.flush(conversation_id)
+        return self.store.get_messages(conversation_id)
+
+    def delete_conversation(self, conversation_id: str, expected_version: Optional[int] = None) -> bool:
+        """Drop any queued save and delete the conversation.
+
+        With ``expected_version`` a queued save is written instead of
+        dropped, so the delete is checked against the version it creates.
+        """
+        with self._write_lock:
+            if expected_version is not None:
+                self._write_pending(conversation_id, raise_errors=True)
+                return self.store.delete_conversation(conversation_id, expected_version)
+            queued = self._drop_queued(conversation_id)
+            return self.store.delete_conversation(conversation_id) or bool(queued)
+
+    def _write_all(self) -> None:
+        """Write everything queued before a read across conversations.
+
+        Failures are not raised, so one conversation that cannot be written
+        does not block reads of the others; they stay queued.
+        """
+        with self._write_lock:
+            self._write_pending()
+
+    def list_conversations(self) -> List[Dict[str, Any]]:
+        """List conversations after writing everything queued."""
+        self._write_all()
+        return self.store.list_conversations()
+
+    def iter_conversations(self, cursor: Optional[str] = None, **filters: Any) -> Iterator[Dict[str, Any]]:
+        """Iterate over conversation summaries after writing everything queued."""
+        self._write_all()
+        return self.store.iter_conversations(cursor=cursor, **filters)
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Search conversations after writing everything queued."""
+        self._write_all()
+        return self.store.search(query, limit)
+
+    def clear_all(self) -> int:
+        """Drop every queued save and delete all conversations."""
+        with self._write_lock:
+            with self._condition:
+                self._pending.clear()
+                self._failed.clear()
+            return self.store.clear_all()
@@ -3,5 +3,6 @@ Workflows module for the Exam helper System.
 """
 
 from .multi_agentic_workflow import MultiAgentWorkflow
+from .session_manager import SessionManager, create_session_manager
 
-__all__ = ["MultiAgentWorkflow"]
\ No newline at end of file
+__all__ = ["MultiAgentWorkflow", "SessionManager", "create_session_manager"]
\ No newline at end of file
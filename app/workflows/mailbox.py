@@ -0,0 +1,114 @@
+"""
+Per-conversation turn mailbox.
+
+A conversation's turns read and advance its checkpoint, persisted
+message count and store version, so two turns of one conversation must
+not overlap. The mailbox runs them one at a time in the order they were
+posted, while turns of other conversations, which have their own
+mailboxes, run in parallel on the event loop or on other threads.
+
+Mailboxes are keyed by conversation ID in a process-wide registry, so
+every workflow handle of a conversation posts to the same one.
+"""
+
+import asyncio
+import threading
+import weakref
+from concurrent.futures import Future, wait
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Iterator, Optional, Tuple
+
+
+class TurnMailbox:
+    """FIFO of one conversation's turns.
+
+    Posting a turn appends it to the mailbox, and the turn starts once
+    every turn posted before it has finished. Threads and event-loop tasks
+    can post to the same mailbox: a thread blocks while its turn waits and
+    a task suspends, and neither holds anything that other conversations
+    need. Calling the blocking ``turn`` from an event loop's thread while a
+    task of that loop has a turn in the mailbox deadlocks; use ``aturn``
+    there.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._tail: Optional[Future] = None
+        self.pending = 0
+        # Bumped by each turn that may change the conversation, so that the
+        # other handles of it know to reload before their next turn
+        self.generation = 0
+
+    def _post(self) -> Tuple[Optional[Future], Future]:
+        """Append a turn; returns the turn before it, if still unfinished, and the turn's own future."""
+        done: Future = Future()
+        with self._lock:
+            previous, self._tail = self._tail, done
+            self.pending += 1
+        return previous, done
+
+    def _finish(self, previous: Optional[Future], done: Future) -> None:
+        if previous is not None and not previous.done():
+            # The turn gave up waiting; the next one may start only once the turns before it have finished
+            previous.add_done_callback(lambda _: self._finish(None, done))
+            return
+        with self._lock:
+            self.pending -= 1
+            if self._tail is done:
+                self._tail = None
+        done.set_result(None)
+
+    @contextmanager
+    def turn(self) -> Iterator[None]:
+        """Block until the turns posted before this one have finished, and hold the mailbox for the block."""
+        previous, done = self._post()
+        try:
+            if previous is not None:
+                wait([previous])
+            yield
+        finally:
+            self._finish(previous, done)
+
+    @asynccontextmanager
+    async def aturn(self) -> AsyncIterator[None]:
+        """Asynchronous ``turn``; waits without blocking the event loop."""
+        previous, done = self._post()
+        try:
+            if previous is not None:
+                # Shielded so that a cancelled waiter does not cancel the turn it waits for
+                await asyncio.shield(asyncio.wrap_future(previous))
+            yield
+        finally:
+            self._finish(previous, done)
+
+
+class MailboxRegistry:
+    """Turn mailboxes keyed by conversation ID.
+
+    Every caller asking for a conversation gets the same mailbox for as
+    long as anyone holds it; a mailbox nobody holds is dropped.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._mailboxes: "weakref.WeakValueDictionary[str, TurnMailbox]" = weakref.WeakValueDictionary()
+
+    def __len__(self) -> int:
+        return len(self._mailboxes)
+
+    def get(self, conversation_id: str) -> TurnMailbox:
+        """Get the mailbox of a conversation, creating it if nobody holds one."""
+        with self._lock:
+            mailbox = self._mailboxes.get(conversation_id)
+            if mailbox is None:
+                mailbox = TurnMailbox()
+                self._mailboxes[conversation_id] = mailbox
+            return mailbox
+
+
+_registry = MailboxRegistry()
+
+
+def get_mailbox(conversation_id: str) -> TurnMailbox:
+    """Get the process-wide mailbox of a conversation."""
+    return _registry.get(conversation_id)
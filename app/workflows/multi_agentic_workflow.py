@@ -5,26 +5,79 @@ Implements a LangGraph workflow that orchestrates multiple therapy agents
 in a coordinated manner
 """
 
-import os
-from typing import Any, Dict, List, Optional
+import asyncio
+import queue
+import threading
+import time
+from contextlib import AsyncExitStack, ExitStack, asynccontextmanager, contextmanager
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
 
 import structlog
-from langchain_core.messages import AIMessage, HumanMessage
-from langgraph.checkpoint.memory import MemorySaver
+from langchain_core.messages import AIMessage, HumanMessage, RemoveMessage
+from langchain_core.runnables import RunnableLambda
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.graph import END, START, StateGraph
+from langgraph.graph.message import REMOVE_ALL_MESSAGES
 from langgraph.graph.state import CompiledStateGraph
+from langgraph.types import StateSnapshot
 
 from app.agents.state import ExamHelperState, get_initial_state
-from app.utils.conversation_store import get_conversation_store
+from app.config.app_config import AppConfigLoader
+from app.utils.background_loop import run_coroutine_sync
+from app.utils.checkpoint_store import get_checkpointer
+from app.utils.conversation_ids import generate_conversation_id
+from app.utils.conversation_store import ConversationConflictError, get_conversation_store
+from app.utils.token_stream import token_sink
+from app.workflows.mailbox import TurnMailbox, get_mailbox
 from app.nodes.orchestrator_node import OrchestratorNode
 
+if TYPE_CHECKING:
+    from app.agents.summarizer_agent import SummarizerAgent
+
 
 logger = structlog.get_logger(__name__)
 
 
+def build_workflow_graph(
+    orchestrator_node: OrchestratorNode,
+    checkpointer: Optional[BaseCheckpointSaver] = None,
+) -> CompiledStateGraph:
+    """Create and compile the LangGraph workflow.
+
+    The compiled graph holds no conversation state: each conversation is
+    a checkpointer thread selected by the ``thread_id`` in the run config,
+    so one graph can serve every conversation.
+
+    Args:
+        orchestrator_node: Node that answers each turn
+        checkpointer: Checkpoint saver, defaults to the global one
+    """
+    workflow = StateGraph(ExamHelperState)
+
+    workflow.add_node("orchestrator", RunnableLambda(orchestrator_node.process, afunc=orchestrator_node.aprocess))
+
+    workflow.add_edge(START, "orchestrator")
+    workflow.add_edge("orchestrator", END)
+
+    return workflow.compile(checkpointer=checkpointer or get_checkpointer())
+
+
 class MultiAgentWorkflow:
     """LangGraph workflow with multi-agent integration for exam helping conversations.
 
+    Instances are lightweight handles on a compiled graph that is usually
+    shared by every conversation. The graph's checkpoint is the
+    conversation state: each turn only sends the new user message, and
+    resuming a conversation is a checkpoint lookup. The conversation store keeps the role/content transcript that
+    listings, search and retention work on, saved from the turn's new
+    messages. Conversations without a checkpoint, such as those saved
+    before checkpoints were persisted, are seeded from the store.
+
+    With a summarizer, messages older than the newest
+    ``summary_window_messages`` are folded into the session summary after
+    a turn has been answered and dropped from the checkpoint, so the
+    orchestrator's input stays bounded however long the session runs.
+
     Architecture:
         User Message
              |
@@ -39,61 +92,171 @@ class MultiAgentWorkflow:
         self,
         orchestrator_node: OrchestratorNode,
         conversation_id: Optional[str] = None,
+        graph: Optional[CompiledStateGraph] = None,
+        summarizer: Optional["SummarizerAgent"] = None,
     ) -> None:
+        """Open a conversation on a workflow graph.
+
+        Args:
+            orchestrator_node: Node that answers each turn
+            conversation_id: Conversation to resume, None starts a new one
+            graph: Compiled graph to share, from ``build_workflow_graph``;
+                by default one is compiled for this instance
+            summarizer: Agent that folds older messages into the session
+                summary, None keeps every message in state
+        """
         self.orchestrator_node = orchestrator_node
+        self.summarizer = summarizer
         self.conversation_store = get_conversation_store()
 
-        self.memory = MemorySaver()
-        self.workflow = self._create_workflow()
-        self.conversation_id = conversation_id or f"exam_helper_session_{hash(str(os.urandom(8)))}"
+        self.workflow = graph or build_workflow_graph(orchestrator_node)
+        self.checkpointer = self.workflow.checkpointer
+        self.conversation_id = conversation_id or generate_conversation_id()
         self.thread_id = self.conversation_id
         self.config = {"configurable": {"thread_id": self.thread_id}}
-        self._state: Optional[ExamHelperState] = None
+        # Whether the thread has a checkpoint, and the state to start it
+        # from on the next turn when it has none or it is stale
+        self._has_checkpoint = False
+        self._seed: Optional[ExamHelperState] = None
+        # Stored messages older than the first message in the checkpoint
+        self._history_offset = 0
+        # Stored message count and version as of the last load or save
+        self._persisted_count = 0
+        self._version: Optional[int] = 0
+        # Number of checkpointed messages covered by the stored history, the
+        # (type, content) of the last of them and the metadata last stored
+        self._state_watermark = 0
+        self._watermark_key: Optional[Tuple[str, Any]] = None
+        self._persisted_metadata: Optional[Dict[str, Any]] = None
+        # Queued saves cannot be checked against the stored version
+        self._check_versions = not AppConfigLoader.app_config().storage.write_behind
+        # Turns, loads and resets of the conversation run one at a time, in
+        # order, across every handle of it in the process
+        self._mailbox = get_mailbox(self.conversation_id)
+        # Mailbox generation this handle's view of the conversation is from
+        self._generation = self._mailbox.generation
+        # Background fold of older messages into the session summary
+        self._summary_task: Optional[asyncio.Future] = None
 
         self._load_conversation_history()
 
         logger.info("MultiAgentWorkflow initialized", conversation_id=self.conversation_id)
 
-    def _create_workflow(self) -> CompiledStateGraph:
-        """Create and compile the LangGraph workflow."""
-
-        workflow = StateGraph(ExamHelperState)
-
-        workflow.add_node("orchestrator", self.orchestrator_node.process)
+    def _load_conversation_history(self) -> None:
+        """Resume the conversation from its checkpoint, or seed it from storage.
 
-        workflow.add_edge(START, "orchestrator")
-        workflow.add_edge("orchestrator", END)
+        Without a usable checkpoint, only the newest
+        ``resume_window_messages`` stored messages are loaded; older history
+        stays in storage and is represented by the stored session summary.
+        """
+        snapshot = self.workflow.get_state(self.config)
+        if snapshot.values:
+            record = self.conversation_store.load_tail(self.conversation_id, 0)
+            if self._apply_checkpoint(snapshot, record):
+                return
+
+        window = AppConfigLoader.app_config().exam_helper.resume_window_messages
+        if window > 0:
+            conversation_data = self.conversation_store.load_tail(self.conversation_id, window)
+        else:
+            conversation_data = self.conversation_store.load_conversation(self.conversation_id)
+        self._apply_conversation_history(conversation_data)
+
+    async def _aload_conversation_history(self) -> None:
+        """Resume the conversation without blocking the event loop."""
+        snapshot = await self.workflow.aget_state(self.config)
+        if snapshot.values:
+            record = await self.conversation_store.aload_tail(self.conversation_id, 0)
+            if self._apply_checkpoint(snapshot, record):
+                return
+
+        window = AppConfigLoader.app_config().exam_helper.resume_window_messages
+        if window > 0:
+            conversation_data = await self.conversation_store.aload_tail(self.conversation_id, window)
+        else:
+            conversation_data = await self.conversation_store.aload_conversation(self.conversation_id)
+        self._apply_conversation_history(conversation_data)
+
+    def _apply_checkpoint(self, snapshot: StateSnapshot, record: Optional[Dict[str, Any]]) -> bool:
+        """Resume from a checkpoint, lining the save watermark up with the stored history.
 
-        return workflow.compile(checkpointer=self.memory)
+        Args:
+            snapshot: Latest checkpoint of the conversation's thread
+            record: Stored conversation header, without messages
 
-    def _load_conversation_history(self) -> None:
-        """Load conversation history from file storage."""
-        stored_messages = self.conversation_store.get_messages(self.conversation_id)
+        Returns:
+            False if the store holds messages the checkpoint lacks, for
+            example after a merge with another writer, so the conversation
+            has to be seeded from storage instead
+        """
+        state_messages = snapshot.values.get("messages", [])
+        history_offset = (snapshot.metadata or {}).get("history_offset", 0)
+        persisted_count = record.get("message_count", 0) if record else 0
+        covered = history_offset + len(self._to_stored_messages(state_messages))
+        if persisted_count > covered:
+            return False
+
+        self._has_checkpoint = True
+        self._seed = None
+        self._history_offset = history_offset
+        self._version = record.get("version", 0) if record else 0
+        self._persisted_metadata = record.get("metadata") if record else None
+        if persisted_count == covered:
+            self._persisted_count = persisted_count
+            self._advance_watermark(state_messages)
+        else:
+            # The last turn was checkpointed but not saved: save it all again
+            self._persisted_count = history_offset
+            self._state_watermark = 0
+            self._watermark_key = None
+
+        logger.info(
+            "Resumed conversation from checkpoint",
+            conversation_id=self.conversation_id,
+            message_count=len(state_messages),
+            history_offset=self._history_offset,
+        )
+        return True
+
+    def _apply_conversation_history(self, conversation_data: Optional[Dict[str, Any]]) -> None:
+        """Build the state to seed the conversation's checkpoint with from loaded conversation data."""
+        stored_messages = conversation_data.get("messages", []) if conversation_data else []
+        self._persisted_count = conversation_data.get("message_count", len(stored_messages)) if conversation_data else 0
+        self._history_offset = self._persisted_count - len(stored_messages)
+        self._version = conversation_data.get("version", 0) if conversation_data else 0
+        self._persisted_metadata = conversation_data.get("metadata") if conversation_data else None
+        self._state_watermark = 0
+        self._watermark_key = None
+        self._seed = None
         if stored_messages:
-            self._state = get_initial_state()
+            self._seed = get_initial_state()
             messages = []
             for msg in stored_messages:
                 if msg.get("role") == "user":
                     messages.append(HumanMessage(content=msg.get("content", "")))
                 elif msg.get("role") == "assistant":
                     messages.append(AIMessage(content=msg.get("content", "")))
-            self._state["messages"] = messages
+            self._seed["messages"] = messages
+            self._advance_watermark(messages)
 
-            conversation_data = self.conversation_store.load_conversation(self.conversation_id)
-            if conversation_data and conversation_data.get("metadata"):
+            if conversation_data.get("metadata"):
                 metadata = conversation_data["metadata"]
-                self._state["user_intent"] = metadata.get("user_intent", "unknown")
-                self._state["turn_count"] = metadata.get("turn_count", 0)
-
-            logger.info("Loaded conversation history", conversation_id=self.conversation_id, message_count=len(messages))
-
-    def _save_conversation(self) -> None:
-        """Save current conversation to file storage."""
-        if self._state is None:
-            return
+                self._seed["user_intent"] = metadata.get("user_intent", "unknown")
+                self._seed["turn_count"] = metadata.get("turn_count", 0)
+                self._seed["session_summary"] = metadata.get("session_summary", "")
+
+            logger.info(
+                "Loaded conversation history",
+                conversation_id=self.conversation_id,
+                message_count=len(messages),
+                history_offset=self._history_offset,
+            )
 
+    @staticmethod
+    def _to_stored_messages(state_messages: List[Any]) -> List[Dict[str, Any]]:
+        """Convert state messages to stored role/content dicts, dropping tool calls and empty replies."""
         messages: List[Dict[str, Any]] = []
-        for msg in self._state.get("messages", []):
+        for msg in state_messages:
             if isinstance(msg, HumanMessage):
                 messages.append({
                     "role": "user",
@@ -105,42 +268,243 @@ class MultiAgentWorkflow:
                         "role": "assistant",
                         "content": msg.content,
                     })
+        return messages
+
+    def _advance_watermark(self, state_messages: List[Any]) -> None:
+        """Mark every message in ``state_messages`` as persisted."""
+        self._state_watermark = len(state_messages)
+        self._watermark_key = (state_messages[-1].type, state_messages[-1].content) if state_messages else None
+
+    def _pending_record(self, state: ExamHelperState) -> Tuple[List[Dict[str, Any]], int, Dict[str, Any]]:
+        """Build what has to be saved since the last load or save.
+
+        Only state messages past the watermark are converted, so the cost
+        depends on the number of new messages. If the state's history no
+        longer starts with what was persisted, for example because it was
+        trimmed, every state message is saved from the history offset.
+
+        Returns:
+            Tuple of (messages to save, their index in the stored history, metadata)
+        """
+        state_messages = state.get("messages", [])
+        watermark = self._state_watermark
+        if watermark <= len(state_messages) and (
+            watermark == 0
+            or (state_messages[watermark - 1].type, state_messages[watermark - 1].content) == self._watermark_key
+        ):
+            messages = self._to_stored_messages(state_messages[watermark:])
+            start_index = self._persisted_count
+        else:
+            messages = self._to_stored_messages(state_messages)
+            start_index = self._history_offset
 
         metadata = {
-            "user_intent": self._state.get("user_intent", "unknown"),
-            "turn_count": self._state.get("turn_count", 0),
+            "user_intent": state.get("user_intent", "unknown"),
+            "turn_count": state.get("turn_count", 0),
         }
+        if state.get("session_summary"):
+            metadata["session_summary"] = state["session_summary"]
+        return messages, start_index, metadata
 
-        self.conversation_store.save_conversation(
-            self.conversation_id,
-            messages,
-            metadata,
+    def _record_saved(
+        self,
+        state: ExamHelperState,
+        messages: List[Dict[str, Any]],
+        start_index: int,
+        metadata: Dict[str, Any],
+        version: Optional[int],
+    ) -> None:
+        """Move the watermark past a completed save."""
+        self._version = version
+        self._persisted_count = start_index + len(messages)
+        self._persisted_metadata = metadata
+        self._advance_watermark(state.get("messages", []))
+
+    async def _asave_conversation(self, state: ExamHelperState) -> None:
+        """Save the messages added since the last save without blocking the event loop."""
+        messages, start_index, metadata = self._pending_record(state)
+        if not messages and start_index == self._persisted_count and metadata == self._persisted_metadata:
+            return
+        try:
+            version = await self.conversation_store.asave_conversation(
+                self.conversation_id,
+                messages,
+                metadata,
+                start_index=start_index,
+                expected_version=self._version if self._check_versions else None,
+            )
+            self._record_saved(state, messages, start_index, metadata, version)
+        except ConversationConflictError as e:
+            self._log_conflict(e)
+            await self._amerge_conflicting_save(state, messages[max(self._persisted_count - start_index, 0):], metadata)
+
+    def _log_conflict(self, error: ConversationConflictError) -> None:
+        logger.warning(
+            "Conversation changed by another writer, merging",
+            conversation_id=self.conversation_id,
+            expected_version=error.expected_version,
+            actual_version=error.actual_version,
         )
 
-    def _get_current_state(self) -> ExamHelperState:
-        """Get the current state or initialize a new one."""
-        if self._state is None:
-            self._state = get_initial_state()
-        return self._state
+    def _merge_record(
+        self,
+        state: ExamHelperState,
+        unsaved: List[Dict[str, Any]],
+        current: Optional[Dict[str, Any]],
+    ) -> List[Dict[str, Any]]:
+        """Pick the messages to append to a stored history another writer has moved on.
+
+        Writers sharing the conversation's checkpoint thread already have
+        each other's turns in their state; if the stored history ends with
+        the state's message at the same position, only what follows it is
+        appended. Otherwise this session's unsaved messages are.
+
+        Args:
+            state: State of the turn being saved
+            unsaved: Messages of the state not persisted yet
+            current: Stored conversation with its last message
+        """
+        if not current or not current.get("messages"):
+            return unsaved
+        stored = self._to_stored_messages(state.get("messages", []))
+        position = current["message_count"] - self._history_offset
+        last = current["messages"][-1]
+        if 0 < position <= len(stored) and (
+            (stored[position - 1]["role"], stored[position - 1]["content"]) == (last.get("role"), last.get("content"))
+        ):
+            return stored[position:]
+        return unsaved
+
+    async def _amerge_conflicting_save(
+        self,
+        state: ExamHelperState,
+        unsaved: List[Dict[str, Any]],
+        metadata: Dict[str, Any],
+    ) -> None:
+        """Append this session's unsaved messages after those saved by another writer.
+
+        The merged history is then reloaded, so the next turn sees the other
+        writer's messages too.
+
+        Args:
+            state: State of the turn being saved
+            unsaved: Messages of the current state not persisted yet
+            metadata: Metadata to save
+        """
+        for attempt in range(3):
+            current = await self.conversation_store.aload_tail(self.conversation_id, 1)
+            try:
+                await self.conversation_store.asave_conversation(
+                    self.conversation_id,
+                    self._merge_record(state, unsaved, current),
+                    metadata,
+                    start_index=current["message_count"] if current else 0,
+                    expected_version=current.get("version", 0) if current else 0,
+                )
+                break
+            except ConversationConflictError:
+                if attempt == 2:
+                    raise
+
+        await self._aload_conversation_history()
+
+    def _turn_input(self, user_message: str) -> Dict[str, Any]:
+        """Build the graph input for a turn.
+
+        A thread with an up-to-date checkpoint only gets the new message;
+        otherwise the seed state replaces whatever the thread holds.
+        """
+        message = HumanMessage(content=user_message)
+        if self._has_checkpoint and self._seed is None:
+            return {"messages": [message], "user_query": user_message}
+
+        state = self._seed or get_initial_state()
+        return {
+            **state,
+            "messages": [RemoveMessage(id=REMOVE_ALL_MESSAGES), *state.get("messages", []), message],
+            "user_query": user_message,
+        }
+
+    def _turn_config(self) -> Dict[str, Any]:
+        """Get the run config for a turn, recording the history offset in its checkpoints."""
+        return {**self.config, "metadata": {"history_offset": self._history_offset}}
+
+    def _mark_changed(self) -> None:
+        """Note that this handle changed the conversation, so other handles of it reload."""
+        self._mailbox.generation += 1
+        self._generation = self._mailbox.generation
+
+    async def _arefresh(self) -> None:
+        """Reload the conversation if another handle of it changed it since this one last did."""
+        if self._generation == self._mailbox.generation:
+            return
+        self._has_checkpoint = False
+        self._seed = None
+        await self._aload_conversation_history()
+        self._generation = self._mailbox.generation
+
+    def _finish_turn(self) -> None:
+        """Note that the thread's checkpoint now holds the conversation state."""
+        self._has_checkpoint = True
+        self._seed = None
+
+    def _mailboxes(self, conversation_id: str, mailbox: TurnMailbox, switch_to: Optional[str]) -> List[TurnMailbox]:
+        """Get the mailboxes a turn holds, in conversation ID order so that handles cannot deadlock."""
+        if switch_to is None or switch_to == conversation_id:
+            return [mailbox]
+        held = sorted([(conversation_id, mailbox), (switch_to, get_mailbox(switch_to))], key=lambda item: item[0])
+        return [item[1] for item in held]
+
+    @contextmanager
+    def _turn(self, switch_to: Optional[str] = None) -> Iterator[None]:
+        """Hold the mailbox of this handle's conversation, and of ``switch_to`` if the handle moves to it.
+
+        Mailboxes are shared by every handle of a conversation. If the
+        handle moved to another conversation while the turn waited, it
+        waits again on the new conversation's mailbox.
+        """
+        while True:
+            conversation_id, mailbox = self.conversation_id, self._mailbox
+            with ExitStack() as stack:
+                for held in self._mailboxes(conversation_id, mailbox, switch_to):
+                    stack.enter_context(held.turn())
+                if self._mailbox is mailbox:
+                    yield
+                    return
+
+    @asynccontextmanager
+    async def _aturn(self, switch_to: Optional[str] = None) -> AsyncIterator[None]:
+        """Asynchronous ``_turn``."""
+        while True:
+            conversation_id, mailbox = self.conversation_id, self._mailbox
+            async with AsyncExitStack() as stack:
+                for held in self._mailboxes(conversation_id, mailbox, switch_to):
+                    await stack.enter_async_context(held.aturn())
+                if self._mailbox is mailbox:
+                    yield
+                    return
 
     async def process_query_async(
         self,
         user_message: str,
     ) -> Dict[str, Any]:
-        """Process a query asynchronously through the workflow."""
-        try:
-            state = self._get_current_state()
-
-            state["messages"] = list(state.get("messages", [])) + [
-                HumanMessage(content=user_message)
-            ]
-            state["user_query"] = user_message
+        """Process a query asynchronously through the workflow.
 
-            final_state = await self.workflow.ainvoke(state, self.config)
+        Turns of this conversation run one at a time, in the order they
+        arrive, whichever handle of the conversation they come through;
+        turns of other conversations are not held up.
+        """
+        async with self._aturn():
+            return await self._aprocess_turn(user_message)
 
-            self._state = dict(final_state)
+    async def _aprocess_turn(self, user_message: str) -> Dict[str, Any]:
+        try:
+            await self._arefresh()
+            final_state = await self.workflow.ainvoke(self._turn_input(user_message), self._turn_config())
+            self._finish_turn()
 
-            self._save_conversation()
+            await self._asave_conversation(final_state)
+            self._schedule_fold(final_state)
 
             response = final_state.get("orchestrator_result", "Hi there! What's up?")
 
@@ -157,52 +521,269 @@ class MultiAgentWorkflow:
                 "response": "Hi there! What's up?",
                 "error": str(e),
             }
+        finally:
+            self._mark_changed()
 
-    def process_query(self, user_message: str) -> Dict[str, Any]:
-        """Process a query synchronously through the workflow."""
-        try:
-            state = self._get_current_state()
+    def _fold_plan(self, state: ExamHelperState) -> List[Any]:
+        """Pick the oldest state messages to fold into the session summary.
 
-            state["messages"] = list(state.get("messages", [])) + [
-                HumanMessage(content=user_message)
-            ]
-            state["user_query"] = user_message
+        A fold is due once ``summary_batch_messages`` messages have piled up
+        past the newest ``summary_window_messages``, so the summary is not
+        rewritten every turn. It ends before a user message, so a tool call
+        is never split from its result, and only covers saved messages.
 
-            final_state = self.workflow.invoke(state, self.config)
+        Returns:
+            The messages to fold, oldest first, empty if no fold is due
+        """
+        config = AppConfigLoader.app_config().exam_helper
+        messages = state.get("messages", [])
+        window = config.summary_window_messages
+        if self.summarizer is None or window <= 0:
+            return []
+        if len(messages) - window < max(config.summary_batch_messages, 1):
+            return []
+
+        for cut in range(min(len(messages) - window, self._state_watermark), 0, -1):
+            if isinstance(messages[cut], HumanMessage):
+                return messages[:cut]
+        return []
+
+    def _schedule_fold(self, state: ExamHelperState) -> None:
+        """Start folding older messages into the session summary, if a fold is due and none is running."""
+        if self._summary_task is not None and not self._summary_task.done():
+            return
+        folded = self._fold_plan(state)
+        if folded:
+            self._summary_task = asyncio.ensure_future(
+                self._afold_history(self.thread_id, state.get("session_summary", ""), folded)
+            )
 
-            self._state = dict(final_state)
+    async def _afold_history(self, thread_id: str, previous_summary: str, folded: List[Any]) -> None:
+        """Summarize messages leaving the window, then drop them from the checkpoint.
 
-            self._save_conversation()
+        The summarizer runs outside the mailbox, so the next turn is not
+        held up by it; only the checkpoint update waits for its turn.
 
-            response = final_state.get("orchestrator_result", "Hi there! What's up?")
+        Args:
+            thread_id: Thread the messages were taken from
+            previous_summary: Session summary the messages are folded into
+            folded: Oldest messages of the thread's state
+        """
+        try:
+            summary = await self.summarizer.summarize(previous_summary, folded)
+        except Exception as e:
+            logger.warning("Session summary failed", conversation_id=self.conversation_id, error=str(e))
+            return
 
-            return {
-                "success": True,
-                "response": response,
-                "state": final_state,
-            }
+        async with self._aturn():
+            try:
+                remaining = await self._aapply_fold(thread_id, previous_summary, folded, summary)
+            except Exception as e:
+                logger.warning(
+                    "Failed to fold messages into the session summary",
+                    conversation_id=self.conversation_id,
+                    error=str(e),
+                )
+                return
+            if remaining is not None:
+                # Turns answered while summarizing may have made another fold due
+                self._summary_task = None
+                self._schedule_fold(remaining)
+
+    async def _aapply_fold(
+        self,
+        thread_id: str,
+        previous_summary: str,
+        folded: List[Any],
+        summary: str,
+    ) -> Optional[ExamHelperState]:
+        """Replace folded messages in the checkpoint with the summary that covers them.
 
-        except Exception as e:
-            logger.error("Workflow processing failed", error=str(e))
-            return {
-                "success": False,
-                "response": "Hi there! What's up?",
-                "error": str(e),
-            }
+        The stored history keeps every message, so the history offset moves
+        past the folded ones. If the conversation was reset, reloaded or
+        resummarized meanwhile, the summary is discarded.
+
+        Returns:
+            The state left in the checkpoint, None if the summary was discarded
+        """
+        if (
+            thread_id != self.thread_id
+            or self._generation != self._mailbox.generation
+            or not self._has_checkpoint
+            or self._seed is not None
+        ):
+            return None
+        snapshot = await self.workflow.aget_state(self.config)
+        messages = snapshot.values.get("messages", [])
+        if (
+            snapshot.values.get("session_summary", "") != previous_summary
+            or len(folded) > self._state_watermark
+            or [msg.id for msg in messages[:len(folded)]] != [msg.id for msg in folded]
+        ):
+            logger.debug(
+                "Conversation changed while summarizing, summary discarded",
+                conversation_id=self.conversation_id,
+            )
+            return None
+
+        history_offset = self._history_offset + len(self._to_stored_messages(folded))
+        await self.workflow.aupdate_state(
+            {**self.config, "metadata": {"history_offset": history_offset}},
+            {"messages": [RemoveMessage(id=msg.id) for msg in folded], "session_summary": summary},
+            as_node="orchestrator",
+        )
+        self._mark_changed()
+        self._history_offset = history_offset
+        self._state_watermark -= len(folded)
+        if self._state_watermark == 0:
+            self._watermark_key = None
+
+        logger.info(
+            "Folded messages into session summary",
+            conversation_id=self.conversation_id,
+            folded_messages=len(folded),
+            history_offset=history_offset,
+        )
+        return {**snapshot.values, "messages": messages[len(folded):], "session_summary": summary}
+
+    def process_query(self, user_message: str) -> Dict[str, Any]:
+        """Process a query synchronously through the workflow.
+
+        The turn runs as ``process_query_async`` on the shared background
+        event loop, so the models' async clients are reused across turns.
+        Must not be called from a coroutine running on that loop.
+        """
+        return run_coroutine_sync(self.process_query_async(user_message))
 
     def chat(self, user_message: str) -> str:
         """Simple chat interface that returns just the response string."""
         result = self.process_query(user_message)
         return result.get("response", "Hi there! What's up?")
 
+    def _log_stream(self, started: float, first_token: Optional[float]) -> None:
+        now = time.perf_counter()
+        logger.debug(
+            "Streamed response",
+            conversation_id=self.conversation_id,
+            first_token_ms=round((first_token - started) * 1000, 1) if first_token is not None else None,
+            total_ms=round((now - started) * 1000, 1),
+        )
+
+    def chat_stream(self, user_message: str) -> Iterator[str]:
+        """Chat interface that yields the response as it is generated.
+
+        The turn runs on a worker thread while the agent generating the
+        response streams its tokens back, so the first chunk arrives as soon
+        as the model produces it rather than when the whole answer is done.
+        A response that was not streamed, such as the fallback after an
+        error, is yielded whole once the turn finishes. If the caller stops
+        iterating early, the turn still completes and is saved.
+
+        Args:
+            user_message: The user's message
+
+        Yields:
+            Chunks of the response text
+        """
+        chunks: "queue.Queue[Optional[str]]" = queue.Queue()
+        result: Dict[str, Any] = {}
+
+        def run_turn() -> None:
+            try:
+                with token_sink(chunks.put):
+                    result.update(self.process_query(user_message))
+            finally:
+                chunks.put(None)
+
+        started = time.perf_counter()
+        first_token: Optional[float] = None
+        thread = threading.Thread(target=run_turn, name="chat-stream", daemon=True)
+        thread.start()
+
+        while True:
+            chunk = chunks.get()
+            if chunk is None:
+                break
+            if first_token is None:
+                first_token = time.perf_counter()
+            yield chunk
+
+        thread.join()
+        response = result.get("response", "Hi there! What's up?")
+        if first_token is None and response:
+            yield response
+        self._log_stream(started, first_token)
+
+    async def astream_query(self, user_message: str) -> AsyncIterator[Tuple[str, Any]]:
+        """Process a query asynchronously, yielding the response as it is generated.
+
+        The turn runs as a task on the running event loop. If the caller
+        stops iterating early, the turn still completes and is saved.
+
+        Args:
+            user_message: The user's message
+
+        Yields:
+            ``("token", text)`` for each chunk of the response, then
+            ``("result", result)`` with the result of ``process_query_async``
+        """
+        loop = asyncio.get_running_loop()
+        chunks: "asyncio.Queue[Optional[str]]" = asyncio.Queue()
+
+        def put(chunk: Optional[str]) -> None:
+            # Tokens may be generated on the workflow's worker threads
+            loop.call_soon_threadsafe(chunks.put_nowait, chunk)
+
+        async def run_turn() -> Dict[str, Any]:
+            try:
+                with token_sink(put):
+                    return await self.process_query_async(user_message)
+            finally:
+                put(None)
+
+        started = time.perf_counter()
+        first_token: Optional[float] = None
+        task = asyncio.ensure_future(run_turn())
+
+        while True:
+            chunk = await chunks.get()
+            if chunk is None:
+                break
+            if first_token is None:
+                first_token = time.perf_counter()
+            yield "token", chunk
+
+        result = await task
+        self._log_stream(started, first_token)
+        yield "result", result
+
+    async def astream(self, user_message: str) -> AsyncIterator[str]:
+        """Asynchronous ``chat_stream``; see ``astream_query``.
+
+        Args:
+            user_message: The user's message
+
+        Yields:
+            Chunks of the response text
+        """
+        streamed = False
+        async for kind, value in self.astream_query(user_message):
+            if kind == "token":
+                streamed = True
+                yield value
+            elif not streamed:
+                response = value.get("response", "Hi there! What's up?")
+                if response:
+                    yield response
+
     def get_greeting(self) -> str:
         """Get initial greeting from the orchestrator."""
         try:
             model = self.orchestrator_node.orchestrator_agent.model
 
-            response = model.invoke(
+            response = run_coroutine_sync(model.ainvoke(
                 "You are a supportive exam helper. Generate a brief, welcoming greeting for a new user who is about to get help for exam from you. Keep it to 1-2 sentences."
-            )
+            ))
 
             if response and response.content:
                 return response.content
@@ -216,20 +797,89 @@ class MultiAgentWorkflow:
 
     def reset(self) -> None:
         """Reset the conversation state and start a new conversation."""
-        self._state = None
-        self.conversation_id = f"therapy_session_{hash(str(os.urandom(8)))}"
-        self.thread_id = self.conversation_id
-        self.config = {"configurable": {"thread_id": self.thread_id}}
-        logger.info("Workflow state reset", new_conversation_id=self.conversation_id)
+        with self._turn():
+            self._has_checkpoint = False
+            self._seed = None
+            self.conversation_id = generate_conversation_id()
+            self._mailbox = get_mailbox(self.conversation_id)
+            self._generation = self._mailbox.generation
+            self._history_offset = 0
+            self._persisted_count = 0
+            self._version = 0
+            self._state_watermark = 0
+            self._watermark_key = None
+            self._persisted_metadata = None
+            self.thread_id = self.conversation_id
+            self.config = {"configurable": {"thread_id": self.thread_id}}
+            logger.info("Workflow state reset", new_conversation_id=self.conversation_id)
 
     def delete_conversation(self) -> bool:
-        """Delete the current conversation from storage."""
-        return self.conversation_store.delete_conversation(self.conversation_id)
+        """Delete the current conversation and its checkpoints from storage."""
+        with self._turn():
+            self.checkpointer.delete_thread(self.thread_id)
+            self._has_checkpoint = False
+            self._mark_changed()
+            return self.conversation_store.delete_conversation(self.conversation_id)
+
+    async def adelete_conversation(self) -> bool:
+        """Delete the current conversation and its checkpoints without blocking the event loop."""
+        async with self._aturn():
+            await self.checkpointer.adelete_thread(self.thread_id)
+            self._has_checkpoint = False
+            self._mark_changed()
+            return await self.conversation_store.adelete_conversation(self.conversation_id)
 
     def list_conversations(self) -> List[Dict[str, Any]]:
         """List all stored conversations."""
         return self.conversation_store.list_conversations()
 
+    async def alist_conversations(self) -> List[Dict[str, Any]]:
+        """List all stored conversations without blocking the event loop."""
+        return await self.conversation_store.alist_conversations()
+
+    def list_conversations_page(
+        self,
+        page_size: int = 50,
+        cursor: Optional[str] = None,
+        **filters: Any,
+    ) -> Dict[str, Any]:
+        """List one page of stored conversations, newest first.
+
+        Args:
+            page_size: Maximum number of conversations to return
+            cursor: ``next_cursor`` of the previous page, None for the first page
+            **filters: updated_after, updated_before, intent or min_messages
+
+        Returns:
+            Dict with ``conversations`` and ``next_cursor``
+        """
+        return self.conversation_store.list_conversations_page(page_size=page_size, cursor=cursor, **filters)
+
+    async def alist_conversations_page(
+        self,
+        page_size: int = 50,
+        cursor: Optional[str] = None,
+        **filters: Any,
+    ) -> Dict[str, Any]:
+        """List one page of stored conversations without blocking the event loop."""
+        return await self.conversation_store.alist_conversations_page(page_size=page_size, cursor=cursor, **filters)
+
+    def search_conversations(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Find stored conversations whose messages match a query.
+
+        Args:
+            query: Free text to search message content for
+            limit: Maximum number of conversations to return
+
+        Returns:
+            Matching conversations, best first, with a snippet of the best-matching message
+        """
+        return self.conversation_store.search(query, limit)
+
+    async def asearch_conversations(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Find stored conversations matching a query without blocking the event loop."""
+        return await self.conversation_store.asearch(query, limit)
+
     def load_conversation(self, conversation_id: str) -> bool:
         """Load a specific conversation by ID.
         
@@ -239,13 +889,39 @@ class MultiAgentWorkflow:
         Returns:
             True if conversation was loaded, False if not found
         """
-        self.conversation_id = conversation_id
-        self.thread_id = conversation_id
-        self.config = {"configurable": {"thread_id": self.thread_id}}
-        self._state = None
-        self._load_conversation_history()
-        return self._state is not None
+        with self._turn(switch_to=conversation_id):
+            self.conversation_id = conversation_id
+            self._mailbox = get_mailbox(conversation_id)
+            self.thread_id = conversation_id
+            self.config = {"configurable": {"thread_id": self.thread_id}}
+            self._has_checkpoint = False
+            self._seed = None
+            self._load_conversation_history()
+            self._generation = self._mailbox.generation
+            return self._has_checkpoint or self._seed is not None
+
+    async def aload_conversation(self, conversation_id: str) -> bool:
+        """Load a specific conversation by ID without blocking the event loop.
+
+        Args:
+            conversation_id: The ID of the conversation to load
+
+        Returns:
+            True if conversation was loaded, False if not found
+        """
+        async with self._aturn(switch_to=conversation_id):
+            self.conversation_id = conversation_id
+            self._mailbox = get_mailbox(conversation_id)
+            self.thread_id = conversation_id
+            self.config = {"configurable": {"thread_id": self.thread_id}}
+            self._has_checkpoint = False
+            self._seed = None
+            await self._aload_conversation_history()
+            self._generation = self._mailbox.generation
+            return self._has_checkpoint or self._seed is not None
 
     def get_state(self) -> Optional[ExamHelperState]:
         """Get the current conversation state."""
-        return self._state
+        if self._seed is not None or not self._has_checkpoint:
+            return self._seed
+        return self.workflow.get_state(self.config).values
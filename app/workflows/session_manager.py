@@ -0,0 +1,340 @@
+"""
+Session manager for serving many conversations from one process.
+
+Keeps a bounded set of live workflow sessions, one per conversation, and
+evicts idle ones. A session's state lives in its checkpoint and the
+conversation store, so an evicted session is rebuilt from storage on its
+next message and resident memory tracks the number of active sessions
+rather than every session ever served.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+
+import structlog
+from langgraph.checkpoint.memory import InMemorySaver
+
+from app.config.app_config import AppConfigLoader
+from app.utils.conversation_ids import generate_conversation_id
+from app.utils.conversation_store import get_io_executor
+from app.workflows.mailbox import get_mailbox
+from app.workflows.multi_agentic_workflow import MultiAgentWorkflow
+
+logger = structlog.get_logger(__name__)
+
+
+def resident_bytes() -> Optional[int]:
+    """Get the resident set size of this process, or None where it cannot be read."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class _Session:
+    """A live workflow and its bookkeeping."""
+
+    __slots__ = ("workflow", "last_used", "active")
+
+    def __init__(self, workflow: MultiAgentWorkflow) -> None:
+        self.workflow = workflow
+        self.last_used = time.monotonic()
+        self.active = 0
+
+
+class SessionManager:
+    """Bounded LRU of live workflow sessions keyed by conversation ID.
+
+    Sessions idle for ``ttl_seconds`` are evicted by ``evict_idle``, which
+    a background sweeper runs every ``sweep_interval`` seconds once
+    ``start`` is called. The least recently used sessions are evicted when
+    more than ``max_sessions`` are live, and a quarter of them per sweep
+    while the process's resident memory exceeds ``max_resident_bytes``.
+    Sessions in the middle of a turn are never evicted.
+
+    Each conversation has one live workflow. The conversation's mailbox,
+    shared with any other handle of it in the process, runs its turns one
+    at a time in arrival order, so callers may send turns of any
+    conversation at any time without serializing across conversations.
+
+    With a checkpointer that does not persist, evicting a session also
+    drops its thread's checkpoints, and the session is seeded from the
+    conversation store when it comes back.
+    """
+
+    def __init__(
+        self,
+        workflow_factory: Callable[[Optional[str]], MultiAgentWorkflow],
+        ttl_seconds: float = 1800.0,
+        max_sessions: int = 1000,
+        max_resident_bytes: Optional[int] = None,
+    ) -> None:
+        self.workflow_factory = workflow_factory
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self.max_resident_bytes = max_resident_bytes
+        self.created = 0
+        self.evictions = 0
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, conversation_id: str) -> bool:
+        return conversation_id in self._sessions
+
+    def _acquire(self, conversation_id: Optional[str]) -> _Session:
+        """Get the live session of a conversation, rehydrating it from storage, and mark it busy."""
+        conversation_id = conversation_id or generate_conversation_id()
+        with self._lock:
+            session = self._sessions.get(conversation_id)
+            if session is not None:
+                self._sessions.move_to_end(conversation_id)
+                session.active += 1
+                session.last_used = time.monotonic()
+                return session
+
+        workflow = self.workflow_factory(conversation_id)
+        with self._lock:
+            # Another caller may have rehydrated the session meanwhile
+            session = self._sessions.get(conversation_id)
+            if session is None:
+                session = _Session(workflow)
+                self._sessions[conversation_id] = session
+                self.created += 1
+            self._sessions.move_to_end(conversation_id)
+            session.active += 1
+            session.last_used = time.monotonic()
+            self._release_evicted(self._evict_over_capacity())
+        return session
+
+    def _release(self, session: _Session) -> None:
+        with self._lock:
+            session.active -= 1
+            session.last_used = time.monotonic()
+
+    @contextmanager
+    def session(self, conversation_id: Optional[str] = None) -> Iterator[MultiAgentWorkflow]:
+        """Hold the workflow of a conversation, rehydrating it if it is not live.
+
+        The session counts as busy, and so is not evicted, until the block
+        exits. The workflow must not be used after that: once evicted, the
+        conversation gets a new workflow on its next use.
+
+        Args:
+            conversation_id: Conversation to get; None starts a new one
+
+        Yields:
+            The conversation's workflow
+        """
+        session = self._acquire(conversation_id)
+        try:
+            yield session.workflow
+        finally:
+            self._release(session)
+
+    @asynccontextmanager
+    async def asession(self, conversation_id: Optional[str] = None) -> AsyncIterator[MultiAgentWorkflow]:
+        """Asynchronous ``session``; rehydrating runs on the conversation I/O executor."""
+        session = await asyncio.get_running_loop().run_in_executor(get_io_executor(), self._acquire, conversation_id)
+        try:
+            yield session.workflow
+        finally:
+            self._release(session)
+
+    def process_query(self, conversation_id: Optional[str], user_message: str) -> Dict[str, Any]:
+        """Run a turn of a conversation; see ``MultiAgentWorkflow.process_query``."""
+        session = self._acquire(conversation_id)
+        try:
+            return session.workflow.process_query(user_message)
+        finally:
+            self._release(session)
+
+    async def aprocess_query(self, conversation_id: Optional[str], user_message: str) -> Dict[str, Any]:
+        """Run a turn of a conversation without blocking the event loop.
+
+        Rehydrating an evicted session reads storage, so it runs on the
+        conversation I/O executor.
+        """
+        session = await asyncio.get_running_loop().run_in_executor(get_io_executor(), self._acquire, conversation_id)
+        try:
+            return await session.workflow.process_query_async(user_message)
+        finally:
+            self._release(session)
+
+    def chat(self, conversation_id: Optional[str], user_message: str) -> str:
+        """Run a turn of a conversation and return just the response string."""
+        result = self.process_query(conversation_id, user_message)
+        return result.get("response", "Hi there! What's up?")
+
+    def chat_stream(self, conversation_id: Optional[str], user_message: str) -> Iterator[str]:
+        """Run a turn of a conversation, yielding the response as it is generated.
+
+        See ``MultiAgentWorkflow.chat_stream``. The session stays busy, and
+        so is not evicted, until the stream is exhausted or closed.
+        """
+        session = self._acquire(conversation_id)
+        try:
+            yield from session.workflow.chat_stream(user_message)
+        finally:
+            self._release(session)
+
+    async def astream(self, conversation_id: Optional[str], user_message: str) -> AsyncIterator[str]:
+        """Asynchronous ``chat_stream``; see ``MultiAgentWorkflow.astream``."""
+        session = await asyncio.get_running_loop().run_in_executor(get_io_executor(), self._acquire, conversation_id)
+        try:
+            async for chunk in session.workflow.astream(user_message):
+                yield chunk
+        finally:
+            self._release(session)
+
+    async def astream_query(self, conversation_id: Optional[str], user_message: str) -> AsyncIterator[Tuple[str, Any]]:
+        """Run a turn of a conversation, yielding its tokens and then its result.
+
+        See ``MultiAgentWorkflow.astream_query``.
+        """
+        session = await asyncio.get_running_loop().run_in_executor(get_io_executor(), self._acquire, conversation_id)
+        try:
+            async for event in session.workflow.astream_query(user_message):
+                yield event
+        finally:
+            self._release(session)
+
+    def _evict_over_capacity(self) -> List[_Session]:
+        """Take the least recently used idle sessions beyond ``max_sessions``. Must hold the lock."""
+        evicted: List[_Session] = []
+        if self.max_sessions <= 0:
+            return evicted
+        for conversation_id in list(self._sessions):
+            if len(self._sessions) <= self.max_sessions:
+                break
+            if self._sessions[conversation_id].active == 0:
+                evicted.append(self._sessions.pop(conversation_id))
+        return evicted
+
+    def _release_evicted(self, evicted: List[_Session]) -> None:
+        """Free what evicted sessions hold outside this manager. Must hold the lock.
+
+        Checkpoints are dropped before the lock is released, so a caller
+        that rehydrates the conversation afterwards cannot build its workflow
+        on them. A workflow that was already being built when they were
+        dropped sees the conversation's mailbox generation change, and
+        reloads the conversation before its next turn.
+        """
+        for session in evicted:
+            checkpointer = session.workflow.checkpointer
+            if isinstance(checkpointer, InMemorySaver):
+                checkpointer.delete_thread(session.workflow.thread_id)
+                get_mailbox(session.workflow.conversation_id).generation += 1
+        if evicted:
+            self.evictions += len(evicted)
+            logger.debug("Sessions evicted", count=len(evicted), live=len(self._sessions))
+
+    def evict(self, conversation_id: str) -> bool:
+        """Evict a session unless it is in the middle of a turn.
+
+        Returns:
+            True if the session was evicted
+        """
+        with self._lock:
+            session = self._sessions.get(conversation_id)
+            if session is None or session.active:
+                return False
+            del self._sessions[conversation_id]
+            self._release_evicted([session])
+        return True
+
+    def evict_idle(self) -> int:
+        """Evict sessions idle for ``ttl_seconds``, then any beyond the memory limit.
+
+        Returns:
+            Number of sessions evicted
+        """
+        cutoff = time.monotonic() - self.ttl_seconds
+        with self._lock:
+            evicted = [
+                self._sessions.pop(conversation_id)
+                for conversation_id, session in list(self._sessions.items())
+                if session.active == 0 and session.last_used < cutoff
+            ]
+            evicted.extend(self._evict_over_capacity())
+
+            if self.max_resident_bytes is not None:
+                resident = resident_bytes()
+                if resident is not None and resident > self.max_resident_bytes:
+                    quota = max(len(self._sessions) // 4, 1)
+                    for conversation_id in list(self._sessions):
+                        if quota == 0:
+                            break
+                        if self._sessions[conversation_id].active == 0:
+                            evicted.append(self._sessions.pop(conversation_id))
+                            quota -= 1
+                    logger.info("Evicting sessions under memory pressure", resident_bytes=resident)
+
+            self._release_evicted(evicted)
+        return len(evicted)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the number of live sessions, sessions created and evictions so far."""
+        return {
+            "live": len(self._sessions),
+            "created": self.created,
+            "evictions": self.evictions,
+            "resident_bytes": resident_bytes(),
+        }
+
+    def start(self, interval: float = 60.0) -> None:
+        """Evict idle sessions every ``interval`` seconds on a background thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,), name="session-sweeper", daemon=True)
+        self._thread.start()
+
+    def _run(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                self.evict_idle()
+            except Exception as e:
+                logger.error("Session sweep failed", error=str(e))
+
+    def stop(self) -> None:
+        """Stop the background sweeper."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def create_session_manager(
+    workflow_factory: Optional[Callable[[Optional[str]], MultiAgentWorkflow]] = None,
+) -> SessionManager:
+    """Create a session manager with the configured limits and start its sweeper.
+
+    Args:
+        workflow_factory: Builds the workflow of a conversation, defaults to
+            ``create_multi_agent_workflow``
+    """
+    if workflow_factory is None:
+        from app.agents.agent_factory import create_multi_agent_workflow
+
+        workflow_factory = create_multi_agent_workflow
+
+    config = AppConfigLoader.app_config().sessions
+    manager = SessionManager(
+        workflow_factory,
+        ttl_seconds=config.ttl_seconds,
+        max_sessions=config.max_sessions,
+        max_resident_bytes=config.max_resident_mb * 1024 * 1024 if config.max_resident_mb > 0 else None,
+    )
+    if config.sweep_interval > 0:
+        manager.start(config.sweep_interval)
+    return manager
@@ -0,0 +1,125 @@
+"""
+Benchmark of the conversation serializers.
+
+Builds synthetic study sessions shaped like real ones (short questions,
+~150 word explainer answers and two-page learner answers) and reports the
+bytes on disk and encode/decode time of every serializer.
+
+Usage:
+    python -m benchmarks.conversation_serializers [--turns 20] [--repeat 20]
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+from app.utils.conversation_serializers import (
+    BinarySerializer,
+    CompactJsonSerializer,
+    ConversationSerializer,
+    JsonSerializer,
+)
+
+SENTENCES = [
+    "A deadlock is a situation in which a set of processes is permanently blocked.",
+    "Each process holds a resource and waits for another resource held by a different process.",
+    "Mutual exclusion means that at least one resource is non-shareable.",
+    "Hold and wait occurs when a process holds one resource while requesting another.",
+    "No preemption means the operating system cannot forcibly take a resource away.",
+    "Circular wait occurs when a closed chain of processes each waits for the next.",
+    "Normalization organizes data in a relational database to reduce redundancy.",
+    "A relation is in third normal form if it has no transitive dependency.",
+    "Functional dependencies identify candidate keys and guide decomposition.",
+    "The Banker's algorithm keeps the system in a safe state before granting a request.",
+    "A resource allocation graph with a cycle indicates a possible deadlock.",
+    "Paging divides memory into fixed-size frames and processes into pages of the same size.",
+]
+
+QUESTIONS = [
+    "Explain deadlock and its necessary conditions for 16 marks.",
+    "Can you explain normalisation simply?",
+    "What is the difference between paging and segmentation?",
+    "Give me exam notes on the Banker's algorithm.",
+]
+
+
+def _paragraphs(rng: random.Random, words: int) -> str:
+    """Build text of roughly ``words`` words from the sentence pool."""
+    parts: List[str] = []
+    count = 0
+    while count < words:
+        sentence = rng.choice(SENTENCES)
+        parts.append(sentence)
+        count += len(sentence.split())
+        if rng.random() < 0.2:
+            parts.append("\n\n• ")
+    return " ".join(parts)
+
+
+def build_conversation(turns: int, seed: int = 0) -> Dict[str, Any]:
+    """Build a synthetic conversation record with ``turns`` question/answer pairs."""
+    rng = random.Random(seed)
+    now = datetime.now().isoformat()
+    messages = []
+    for _ in range(turns):
+        messages.append({"role": "user", "content": rng.choice(QUESTIONS)})
+        answer_words = 900 if rng.random() < 0.5 else 150
+        messages.append({"role": "assistant", "content": _paragraphs(rng, answer_words)})
+
+    return {
+        "conversation_id": f"exam_helper_session_bench_{seed}",
+        "created_at": now,
+        "updated_at": now,
+        "messages": messages,
+        "metadata": {"user_intent": "learn", "turn_count": turns},
+    }
+
+
+def benchmark(serializer: ConversationSerializer, data: Dict[str, Any], repeat: int) -> Dict[str, float]:
+    """Measure one serializer on one conversation."""
+    payload = serializer.dumps(data)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        serializer.dumps(data)
+    encode_ms = (time.perf_counter() - start) * 1000 / repeat
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        decoded = serializer.loads(payload)
+    decode_ms = (time.perf_counter() - start) * 1000 / repeat
+
+    assert decoded["messages"] == data["messages"]
+    return {"bytes": len(payload), "encode_ms": encode_ms, "decode_ms": decode_ms}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--turns", type=int, default=20, help="Question/answer pairs per conversation")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed iterations per serializer")
+    args = parser.parse_args()
+
+    data = build_conversation(args.turns)
+    serializers = {
+        "json-pretty (legacy)": JsonSerializer(),
+        "json": CompactJsonSerializer(),
+        "binary": BinarySerializer(),
+        "binary+zlib": BinarySerializer(compression="zlib"),
+        "binary+lzma": BinarySerializer(compression="lzma"),
+    }
+
+    baseline = None
+    print(f"{'format':<22}{'bytes':>10}{'ratio':>8}{'encode ms':>12}{'decode ms':>12}")
+    for name, serializer in serializers.items():
+        result = benchmark(serializer, data, args.repeat)
+        baseline = baseline or result["bytes"]
+        print(
+            f"{name:<22}{result['bytes']:>10}{result['bytes'] / baseline:>8.2f}"
+            f"{result['encode_ms']:>12.3f}{result['decode_ms']:>12.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()